@@ -0,0 +1,93 @@
+"""Benchmark de carregamento do dataset bruto: CSV vs cópia colunar (Arrow IPC)
+
+Cada leitura roda em um processo novo (sem page cache de objetos Python) e
+mede o tempo até o DataFrame pronto para processa_dados():
+
+* csv: pd.read_csv do arquivo inteiro
+* colunar: carrega_bruto() com a cópia Arrow mapeada em memória
+* colunar (2 colunas): só as colunas pedidas
+
+Sem --csv, gera um CSV sintético com o formato do creditcard.csv
+(284807 linhas, Time, V1..V28, Amount e Class).
+
+Uso:
+    python benchmarks/colunar.py --csv data/raw/creditcard.csv
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+
+PROCESSO_FILHO = """
+import json, sys, time
+t0 = time.perf_counter()
+import pandas as pd
+from src.data.columnar import carrega_bruto
+modo, csv = sys.argv[1], sys.argv[2]
+t1 = time.perf_counter()
+if modo == "csv":
+    dados = pd.read_csv(csv)
+elif modo == "colunar":
+    dados = carrega_bruto(csv)
+else:
+    dados = carrega_bruto(csv, colunas=["V1", "Class"])
+t2 = time.perf_counter()
+print(json.dumps({"carregamento": t2 - t1, "linhas": len(dados)}))
+"""
+
+
+def gera_csv(caminho, n=284807):
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    dados = pd.DataFrame(rng.normal(size=(n, 28)), columns=[f"V{i}" for i in range(1, 29)])
+    dados.insert(0, "Time", np.sort(rng.integers(0, 172792, n)).astype(float))
+    dados["Amount"] = np.round(rng.exponential(88, n), 2)
+    dados["Class"] = (rng.random(n) < 0.00172).astype(int)
+    dados.to_csv(caminho, index=False)
+
+
+def mede(modo, csv, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", PROCESSO_FILHO, modo, csv],
+            env=dict(os.environ, PYTHONPATH=RAIZ), capture_output=True, text=True, check=True
+        )
+        tempos.append(json.loads(saida.stdout.strip().splitlines()[-1])["carregamento"])
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="CSV bruto (padrão: sintético no formato do creditcard.csv)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    from src.data.columnar import atualiza_colunar
+
+    with tempfile.TemporaryDirectory() as temporario:
+        csv = args.csv
+        if csv is None:
+            csv = os.path.join(temporario, "creditcard.csv")
+            gera_csv(csv)
+        destino = f"{os.path.splitext(csv)[0]}.arrow"
+        atualiza_colunar(csv, destino)
+        print(f"CSV: {os.path.getsize(csv) / 1e6:.0f} MB, Arrow: {os.path.getsize(destino) / 1e6:.0f} MB")
+
+        base = None
+        for modo in ("csv", "colunar", "colunar_2"):
+            tempo = mede(modo, csv, args.repeticoes)
+            base = base or tempo
+            print(f"{modo:<10} {tempo * 1000:>8.1f} ms  ({base / tempo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark de memória do treino: .npy legado vs conjunto float32 mapeado
+
+Executa a busca paralela (src.training.search) em um processo novo para
+cada formato e reporta o pico de RSS do processo pai e do maior worker:
+
+* legado: X em float64 e y em int64, carregados inteiros com np.load
+* conjunto: X em float32 e y em uint8 (src.data.store), abertos com mmap
+
+Sem --dados, gera um conjunto sintético com o formato do creditcard.csv
+(284807 transações, 30 features, 0,17% de fraudes).
+
+Uso:
+    python benchmarks/dataset_store.py --dados data/processed_legado
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+
+# Executado em um processo novo para que o pico de RSS seja só desta carga
+PROCESSO_FILHO = """
+import json, resource, sys
+import numpy as np
+from src.data.store import carrega_conjunto
+from src.training.search import executa_busca
+
+formato, diretorio = sys.argv[1], sys.argv[2]
+if formato == "legado":
+    X = np.load(f"{diretorio}/X_train.npy")
+    y = np.load(f"{diretorio}/y_train.npy")
+else:
+    dados = carrega_conjunto(diretorio, ["X_train", "y_train"])
+    X, y = dados["X_train"], dados["y_train"]
+config = [{"n_estimators": 20, "max_depth": 8, "class_weight": "balanced"}]
+executa_busca(config, X, y, cv=3, scoring="f1", nucleos=int(sys.argv[3]), ajuste_final=False, guarda_folds=False)
+print(json.dumps({
+    "pai": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "worker": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+}))
+"""
+
+
+def gera_legado(diretorio, n=284807, n_features=30):
+    """Conjunto sintético no formato antigo de process_data (float64/int64)"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(n, n_features))
+    y = (X[:, 0] + X[:, 1] + X[:, 2] > 5.1).astype(np.int64)
+    np.save(os.path.join(diretorio, "X_train.npy"), X)
+    np.save(os.path.join(diretorio, "y_train.npy"), y)
+
+
+def mede(formato, diretorio, nucleos):
+    saida = subprocess.run(
+        [sys.executable, "-c", PROCESSO_FILHO, formato, diretorio, str(nucleos)],
+        env=dict(os.environ, PYTHONPATH=RAIZ), capture_output=True, text=True, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dados", help="diretório com X_train.npy/y_train.npy no formato legado")
+    parser.add_argument("--nucleos", type=int, default=2)
+    args = parser.parse_args()
+
+    from src.data.store import salva_conjunto
+
+    with tempfile.TemporaryDirectory() as temporario:
+        legado = args.dados
+        if legado is None:
+            legado = os.path.join(temporario, "legado")
+            os.makedirs(legado)
+            gera_legado(legado)
+        conjunto = os.path.join(temporario, "conjunto")
+        salva_conjunto(
+            conjunto,
+            X_train=np.load(os.path.join(legado, "X_train.npy"), mmap_mode="r"),
+            y_train=np.load(os.path.join(legado, "y_train.npy"), mmap_mode="r")
+        )
+
+        print(f"{'formato':<9} {'pico pai':>10} {'pico worker':>12}")
+        resultados = {}
+        for formato, diretorio in (("legado", legado), ("conjunto", conjunto)):
+            resultados[formato] = mede(formato, diretorio, args.nucleos)
+            r = resultados[formato]
+            print(f"{formato:<9} {r['pai']:>8.0f}MB {r['worker']:>10.0f}MB")
+        for chave in ("pai", "worker"):
+            reducao = 1 - resultados["conjunto"][chave] / resultados["legado"][chave]
+            print(f"Redução do pico ({chave}): {reducao:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark de CPU por requisição para cada formato de corpo
+
+Treina uma floresta pequena, salva no formato mapeável e mede o tempo de
+CPU do processo (time.process_time) por requisição em /predict (Flask) e
+/prediz (FastAPI) para JSON, binário float32/float64 e MessagePack, com
+uma transação e com um lote. O modelo é o mesmo em todos os formatos: a
+diferença medida é o custo de parse, validação e serialização.
+
+Uso:
+    python benchmarks/formatos.py --requisicoes 2000 --tamanho-lote 256
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+
+
+def prepara_modelo(caminho, n_features):
+    """Floresta pequena treinada na hora e salva como diretório de .npy"""
+    from sklearn.ensemble import RandomForestClassifier
+    from src.inference.compiled_forest import compila_floresta, salva_floresta
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, n_features))
+    y = (X[:, 0] + X[:, 1] > 1.5).astype(int)
+    floresta = RandomForestClassifier(n_estimators=50, max_depth=10, random_state=0).fit(X, y)
+    salva_floresta(compila_floresta(floresta), caminho)
+
+
+def corpos(linhas):
+    """(content-type, corpo) de cada formato para a matriz de features"""
+    import msgpack
+
+    dados = linhas.tolist()
+    return {
+        "json": ("application/json", json.dumps({"features": dados}).encode()),
+        "float32": ("application/octet-stream; dtype=float32", linhas.astype("<f4").tobytes()),
+        "float64": ("application/octet-stream; dtype=float64", linhas.astype("<f8").tobytes()),
+        "msgpack": ("application/msgpack", msgpack.packb({"features": dados})),
+    }
+
+
+def mede(envia, requisicoes):
+    """Tempo de CPU médio por requisição, em microssegundos"""
+    for _ in range(min(50, requisicoes)):
+        envia()
+    inicio = time.process_time()
+    for _ in range(requisicoes):
+        envia()
+    return (time.process_time() - inicio) / requisicoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--tamanho-lote", type=int, default=256)
+    parser.add_argument("--n-features", type=int, default=29)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # O ambiente precisa estar pronto antes do primeiro import de src.config
+        caminho = os.path.join(diretorio, "modelo")
+        os.environ.update(
+            SERVING_MODEL_PATH=caminho, MODEL_SOURCE="local", FOREST_ENGINE="compiled",
+            RELOAD_INTERVAL="0", CACHE_ENABLED="0", MICROBATCH_ENABLED="0"
+        )
+        prepara_modelo(caminho, args.n_features)
+        # O log INFO do payload recebido dominaria a medição
+        logging.disable(logging.INFO)
+        from fastapi.testclient import TestClient
+        from src.serve import app as app_flask
+        from src.api.app import app as app_fastapi
+
+        cliente_flask = app_flask.test_client()
+        cliente_fastapi = TestClient(app_fastapi)
+
+        rng = np.random.default_rng(1)
+        cenarios = {
+            "unitário": ("/predict", "/prediz", rng.normal(size=args.n_features)),
+            f"lote {args.tamanho_lote}": (
+                "/predict/batch", "/prediz/lote", rng.normal(size=(args.tamanho_lote, args.n_features))
+            ),
+        }
+
+        print(f"{'cenário':<10} {'formato':<8} {'flask µs/req':>13} {'fastapi µs/req':>15}")
+        for cenario, (rota_flask, rota_fastapi, linhas) in cenarios.items():
+            for formato, (tipo, corpo) in corpos(linhas).items():
+                cabecalhos = {"Content-Type": tipo}
+                flask = mede(
+                    lambda: cliente_flask.post(rota_flask, data=corpo, headers=cabecalhos),
+                    args.requisicoes
+                )
+                fastapi = mede(
+                    lambda: cliente_fastapi.post(rota_fastapi, content=corpo, headers=cabecalhos),
+                    args.requisicoes
+                )
+                print(f"{cenario:<10} {formato:<8} {flask:>13.0f} {fastapi:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
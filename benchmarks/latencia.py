@@ -0,0 +1,260 @@
+"""Benchmark de latência, vazão e alocação das APIs, em processo
+
+Treina uma floresta pequena com dados sintéticos, salva no formato mapeável
+e envia requisições JSON pelos clientes de teste de src/serve.py (Flask) e
+src/api/app.py (FastAPI), sem rede. Para cada API e cenário (uma transação
+e um lote) reporta latência p50/p95/p99, requisições por segundo e o pico
+de memória alocada por requisição (tracemalloc, em uma passada separada
+para não distorcer os tempos). Cada métrica é a melhor de --rodadas
+rodadas, o que reduz o ruído de máquinas compartilhadas.
+
+Os resultados podem ser salvos em JSON (--saida) e comparados com um
+baseline salvo antes (--baseline): o script termina com código 1 se
+alguma métrica piorar além da tolerância, para uso em CI.
+
+Com --url, gera carga em um servidor já rodando (ex.: src.serve_workers)
+com várias conexões concorrentes, em vez dos clientes em processo.
+
+Uso:
+    python benchmarks/latencia.py --saida resultados.json
+    python benchmarks/latencia.py --baseline benchmarks/baseline.json --tolerancia 0.25
+    python benchmarks/latencia.py --url http://127.0.0.1:5001 --concorrencia 8 --duracao 10
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+
+# Métricas comparadas com o baseline: True quando maior é melhor
+METRICAS_COMPARADAS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "rps": True, "alocacao_kb": False}
+
+
+def prepara_modelo(caminho, n_features):
+    """Floresta pequena treinada na hora e salva como diretório de .npy"""
+    from sklearn.ensemble import RandomForestClassifier
+    from src.inference.compiled_forest import compila_floresta, salva_floresta
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, n_features))
+    y = (X[:, 0] + X[:, 1] > 1.5).astype(int)
+    floresta = RandomForestClassifier(n_estimators=50, max_depth=10, random_state=0).fit(X, y)
+    salva_floresta(compila_floresta(floresta), caminho)
+
+
+def resume(latencias, duracao):
+    """Percentis (ms) e requisições por segundo de uma série de latências em segundos"""
+    ms = np.asarray(latencias) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"requisicoes": len(ms), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+            "rps": len(ms) / duracao}
+
+
+def mede_latencias(envia, requisicoes, aquecimento=50):
+    """Latência de cada requisição, enviadas uma após a outra"""
+    for _ in range(aquecimento):
+        envia()
+    latencias = np.empty(requisicoes)
+    inicio = time.perf_counter()
+    for i in range(requisicoes):
+        t0 = time.perf_counter()
+        envia()
+        latencias[i] = time.perf_counter() - t0
+    return resume(latencias, time.perf_counter() - inicio)
+
+
+def mede_alocacao(envia, requisicoes):
+    """Mediana do pico de memória alocada durante cada requisição, em kB"""
+    picos = np.empty(requisicoes)
+    tracemalloc.start()
+    try:
+        for i in range(requisicoes):
+            antes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            envia()
+            picos[i] = tracemalloc.get_traced_memory()[1] - antes
+    finally:
+        tracemalloc.stop()
+    return float(np.median(picos) / 1024)
+
+
+def melhor_rodada(rodadas):
+    """Melhor valor de cada métrica entre as rodadas (maior rps, menores latências)"""
+    return {
+        metrica: (max if METRICAS_COMPARADAS.get(metrica) else min)(r[metrica] for r in rodadas)
+        for metrica in rodadas[0]
+    }
+
+
+def executa_em_processo(requisicoes, tamanho_lote, n_features, requisicoes_alocacao, rodadas=3):
+    """Mede as duas APIs com seus clientes de teste; devolve {api/cenário: métricas}"""
+    with tempfile.TemporaryDirectory() as diretorio:
+        # O ambiente precisa estar pronto antes do primeiro import de src.config
+        caminho = os.path.join(diretorio, "modelo")
+        os.environ.update(
+            SERVING_MODEL_PATH=caminho, MODEL_SOURCE="local", FOREST_ENGINE="compiled",
+            RELOAD_INTERVAL="0", CACHE_ENABLED="0", MICROBATCH_ENABLED="0"
+        )
+        prepara_modelo(caminho, n_features)
+        # O log INFO do payload recebido dominaria a medição
+        logging.disable(logging.INFO)
+        from fastapi.testclient import TestClient
+        from src.serve import app as app_flask
+        from src.api.app import app as app_fastapi
+
+        cliente_flask = app_flask.test_client()
+        cliente_fastapi = TestClient(app_fastapi)
+
+        rng = np.random.default_rng(1)
+        unitario = json.dumps({"features": rng.normal(size=n_features).tolist()})
+        lote = json.dumps({"features": rng.normal(size=(tamanho_lote, n_features)).tolist()})
+        cabecalhos = {"Content-Type": "application/json"}
+        envios = {
+            "flask/unitario":
+                lambda: cliente_flask.post("/predict", data=unitario, headers=cabecalhos),
+            f"flask/lote_{tamanho_lote}":
+                lambda: cliente_flask.post("/predict/batch", data=lote, headers=cabecalhos),
+            "fastapi/unitario":
+                lambda: cliente_fastapi.post("/prediz", content=unitario, headers=cabecalhos),
+            f"fastapi/lote_{tamanho_lote}":
+                lambda: cliente_fastapi.post("/prediz/lote", content=lote, headers=cabecalhos),
+        }
+
+        resultados = {}
+        for nome, envia in envios.items():
+            resposta = envia()
+            if resposta.status_code != 200:
+                raise RuntimeError(f"{nome}: status {resposta.status_code}: {resposta.text}")
+            resultados[nome] = melhor_rodada([mede_latencias(envia, requisicoes) for _ in range(rodadas)])
+            resultados[nome]["alocacao_kb"] = mede_alocacao(envia, requisicoes_alocacao)
+        return resultados
+
+
+def _cliente_carga(url, rota, corpo, fim, latencias, erros):
+    partes = urlsplit(url)
+    conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80)
+    cabecalhos = {"Content-Type": "application/json"}
+    while time.perf_counter() < fim:
+        t0 = time.perf_counter()
+        try:
+            conexao.request("POST", rota, corpo, cabecalhos)
+            resposta = conexao.getresponse()
+            resposta.read()
+            if resposta.status != 200:
+                erros.append(resposta.status)
+                continue
+            latencias.append(time.perf_counter() - t0)
+        except (OSError, http.client.HTTPException):
+            erros.append("conexao")
+            conexao.close()
+            conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80)
+    conexao.close()
+
+
+def executa_carga(url, rota, concorrencia, duracao, n_features):
+    """Gera carga em um servidor já rodando, com uma conexão por cliente"""
+    corpo = json.dumps({"features": np.random.default_rng(1).normal(size=n_features).tolist()})
+    latencias, erros = [], []
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    clientes = [
+        threading.Thread(target=_cliente_carga, args=(url, rota, corpo, fim, latencias, erros))
+        for _ in range(concorrencia)
+    ]
+    for cliente in clientes:
+        cliente.start()
+    for cliente in clientes:
+        cliente.join()
+    if not latencias:
+        raise RuntimeError(f"Nenhuma requisição bem-sucedida em {url}{rota} ({len(erros)} erros)")
+    resultado = resume(latencias, time.perf_counter() - inicio)
+    resultado["erros"] = len(erros)
+    return {f"carga{rota.replace('/', '_')}_c{concorrencia}": resultado}
+
+
+def compara_baseline(resultados, baseline, tolerancia):
+    """Lista de regressões: métricas que pioraram mais que a tolerância relativa"""
+    regressoes = []
+    for cenario, anteriores in baseline.items():
+        atuais = resultados.get(cenario)
+        if atuais is None:
+            continue
+        for metrica, maior_melhor in METRICAS_COMPARADAS.items():
+            if metrica not in anteriores or metrica not in atuais or not anteriores[metrica]:
+                continue
+            razao = atuais[metrica] / anteriores[metrica]
+            if (razao < 1 / (1 + tolerancia)) if maior_melhor else (razao > 1 + tolerancia):
+                regressoes.append({"cenario": cenario, "metrica": metrica, "baseline": anteriores[metrica],
+                                   "atual": atuais[metrica], "razao": razao})
+    return regressoes
+
+
+def imprime(resultados):
+    print(f"{'cenário':<22} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>9} {'alocação':>10}")
+    for cenario, r in resultados.items():
+        alocacao = f"{r['alocacao_kb']:>8.1f}kB" if "alocacao_kb" in r else f"{'-':>10}"
+        print(f"{cenario:<22} {r['p50_ms']:>6.2f}ms {r['p95_ms']:>6.2f}ms {r['p99_ms']:>6.2f}ms "
+              f"{r['rps']:>9.0f} {alocacao}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--requisicoes-alocacao", type=int, default=200)
+    parser.add_argument("--rodadas", type=int, default=3)
+    parser.add_argument("--tamanho-lote", type=int, default=256)
+    parser.add_argument("--n-features", type=int, default=29)
+    parser.add_argument("--saida", help="grava os resultados neste JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="piora relativa aceita")
+    parser.add_argument("--url", help="gera carga neste servidor em vez de usar os clientes em processo")
+    parser.add_argument("--rota", default="/predict")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--duracao", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.url:
+        resultados = executa_carga(args.url, args.rota, args.concorrencia, args.duracao, args.n_features)
+    else:
+        resultados = executa_em_processo(
+            args.requisicoes, args.tamanho_lote, args.n_features, args.requisicoes_alocacao, args.rodadas
+        )
+    resultados = {cenario: {k: float(v) for k, v in r.items()} for cenario, r in resultados.items()}
+    imprime(resultados)
+
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump({
+                "ambiente": {"python": platform.python_version(), "numpy": np.__version__,
+                             "maquina": platform.machine(), "cpus": os.cpu_count()},
+                "parametros": vars(args),
+                "resultados": resultados,
+            }, f, indent=2)
+        print(f"Resultados salvos em {args.saida}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["resultados"]
+        regressoes = compara_baseline(resultados, baseline, args.tolerancia)
+        for r in regressoes:
+            print(f"REGRESSÃO {r['cenario']} {r['metrica']}: {r['baseline']:.3f} -> {r['atual']:.3f} "
+                  f"({r['razao']:.2f}x)")
+        if regressoes:
+            sys.exit(1)
+        print(f"Sem regressões além de {args.tolerancia:.0%} em relação a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark de inicialização da API FastAPI
+
+Mede, em um processo novo para cada repetição, três tempos separados:
+importação de src.api.app, carregamento do modelo e primeira predição.
+
+Uso:
+    python benchmarks/startup.py models/melhor_modelo.joblib models/modelo_inferencia
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Executado em um processo novo: nada importado ou em cache de antemão
+PROCESSO_FILHO = """
+import json, time
+t0 = time.perf_counter()
+import src.api.app as api
+t1 = time.perf_counter()
+modelo = api.modelo_servido.obtem()
+t2 = time.perf_counter()
+api.pontua([[0.0] * modelo.n_features_in_])
+t3 = time.perf_counter()
+print(json.dumps({"importacao": t1 - t0, "carregamento": t2 - t1, "primeira_predicao": t3 - t2}))
+"""
+
+
+def mede_inicializacao(caminho, fonte="local"):
+    """Mede importação, carregamento e primeira predição em um processo novo"""
+    ambiente = dict(
+        os.environ,
+        SERVING_MODEL_PATH=caminho,
+        MODEL_SOURCE=fonte,
+        PYTHONPATH=RAIZ
+    )
+    saida = subprocess.run(
+        [sys.executable, "-c", PROCESSO_FILHO],
+        env=ambiente, capture_output=True, text=True, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("caminhos", nargs="+", help="Artefatos de modelo a comparar")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--fonte", default="local", choices=["local", "registry"])
+    args = parser.parse_args()
+
+    print(f"{'artefato':<40} {'importação':>12} {'carregamento':>14} {'1ª predição':>13}")
+    for caminho in args.caminhos:
+        medidas = [mede_inicializacao(caminho, args.fonte) for _ in range(args.repeticoes)]
+        medianas = {
+            etapa: np.median([m[etapa] for m in medidas]) * 1000
+            for etapa in ("importacao", "carregamento", "primeira_predicao")
+        }
+        print(
+            f"{caminho:<40} {medianas['importacao']:>10.1f}ms "
+            f"{medianas['carregamento']:>12.1f}ms {medianas['primeira_predicao']:>11.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark de memória e vazão do servidor multiprocesso
+
+Para cada número de workers (1..N) inicia src.serve_workers, gera carga
+em /predict por alguns segundos e reporta a vazão e a memória de cada
+worker: RSS, PSS (páginas compartilhadas divididas entre os processos) e a
+parte de RSS que vem de arquivos mapeados (a floresta em mmap).
+
+Uso:
+    python benchmarks/workers.py --max-workers 4 --duracao 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def memoria_processo(pid):
+    """Rss, Pss e RssFile (kB) de um processo, lidos de /proc"""
+    memoria = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for linha in f:
+            partes = linha.split()
+            if partes[0] in ("Rss:", "Pss:"):
+                memoria[partes[0][:-1]] = int(partes[1])
+    with open(f"/proc/{pid}/status") as f:
+        for linha in f:
+            if linha.startswith("RssFile:"):
+                memoria["RssFile"] = int(linha.split()[1])
+    return memoria
+
+
+def filhos(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def aguarda_workers(pid, porta, n_workers, timeout=60):
+    """Espera todos os workers subirem e o servidor responder"""
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+            conexao.request("GET", "/metrics")
+            conexao.getresponse().read()
+            if len(filhos(pid)) == n_workers:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError("Servidor não respondeu a tempo")
+
+
+def gera_carga(porta, duracao, corpo, contador):
+    """Cliente: envia requisições em uma conexão persistente até o prazo"""
+    conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    cabecalhos = {"Content-Type": "application/json"}
+    total = 0
+    fim = time.time() + duracao
+    while time.time() < fim:
+        try:
+            conexao.request("POST", "/predict", corpo, cabecalhos)
+            conexao.getresponse().read()
+            total += 1
+        except (OSError, http.client.HTTPException):
+            conexao.close()
+            conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    with contador.get_lock():
+        contador.value += total
+
+
+def mede(n_workers, porta, duracao, clientes, n_features):
+    ambiente = dict(os.environ, PYTHONPATH=RAIZ, RELOAD_INTERVAL="0", CACHE_ENABLED="0")
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "src.serve_workers", "--workers", str(n_workers), "--porta", str(porta)],
+        env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        aguarda_workers(servidor.pid, porta, n_workers)
+        corpo = json.dumps({"features": [0.1] * n_features})
+        contador = multiprocessing.Value("l", 0)
+        processos = [
+            multiprocessing.Process(target=gera_carga, args=(porta, duracao, corpo, contador))
+            for _ in range(clientes)
+        ]
+        for p in processos:
+            p.start()
+        for p in processos:
+            p.join()
+        memorias = [memoria_processo(pid) for pid in filhos(servidor.pid)]
+        return contador.value / duracao, memorias
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--duracao", type=float, default=10.0)
+    parser.add_argument("--clientes-por-worker", type=int, default=2)
+    parser.add_argument("--porta", type=int, default=5099)
+    parser.add_argument("--n-features", type=int, default=29)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>9} {'escala':>7} {'RSS/worker':>11} {'PSS/worker':>11} {'RssFile':>9}")
+    base = None
+    for n in range(1, args.max_workers + 1):
+        vazao, memorias = mede(n, args.porta, args.duracao, n * args.clientes_por_worker, args.n_features)
+        base = base or vazao
+        media = {k: sum(m[k] for m in memorias) / len(memorias) / 1024 for k in ("Rss", "Pss", "RssFile")}
+        print(
+            f"{n:>7} {vazao:>9.0f} {vazao / base:>6.2f}x {media['Rss']:>9.1f}MB "
+            f"{media['Pss']:>9.1f}MB {media['RssFile']:>7.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
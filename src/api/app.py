@@ -1,14 +1,28 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from prometheus_client import generate_latest
 from pydantic import BaseModel
+import logging
 import numpy as np
-import mlflow
-import joblib
-from typing import List
+from typing import List, Optional
 from src.config import (
-    MLFLOW_TRACKING_URI, API_TITLE, 
+    API_TITLE,
     API_DESCRIPTION, API_VERSION,
-    API_HOST, API_PORT, MODEL_PATH
+    API_HOST, API_PORT,
+    FRAUD_THRESHOLD, BATCH_MAX_SIZE,
+    MICROBATCH_ENABLED, MICROBATCH_MAX_WAIT_US, MICROBATCH_MAX_SIZE,
+    RELOAD_INTERVAL, PROFILER_ENABLED, MODEL_SOURCE
 )
+from src.inference.batch import pontua_lote
+from src.inference.loader import ModeloServido, versao_local
+from src.inference.reload import RecarregadorModelo
+from src.inference.codecs import (
+    decodifica, codifica, FormatoNaoSuportado,
+    TIPO_JSON, TIPO_BINARIO, TIPO_MSGPACK
+)
+from src.inference.telemetry import Cronometro, perfilador
+from src.inference.request_log import configura_logging, para_logging, registra_sucesso
+from src.api.micro_batch import MicroLote
 
 # Configuração da API
 app = FastAPI(
@@ -26,23 +40,89 @@ class Predicao(BaseModel):
     """Resultado da predição"""
     prob_fraude: float
     eh_fraude: bool
-    limite: float = 0.5
+    limite: float = FRAUD_THRESHOLD
+
+class Lote(BaseModel):
+    """Lote de transações (matriz N×F) para predição"""
+    features: List[list]
+
+class ErroLinha(BaseModel):
+    """Erro de validação de uma transação do lote"""
+    indice: int
+    erro: str
+
+class PredicaoLote(BaseModel):
+    """Resultado da predição em lote"""
+    prob_fraude: List[Optional[float]]
+    eh_fraude: List[Optional[bool]]
+    erros: List[ErroLinha]
+    limite: float = FRAUD_THRESHOLD
+
+def corpo_openapi(modelo):
+    """Documenta no /docs o corpo lido manualmente (sem validação do pydantic)"""
+    binario = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": {
+        TIPO_JSON: {"schema": modelo.model_json_schema()},
+        TIPO_BINARIO: binario,
+        TIPO_MSGPACK: binario
+    }}}
 
-# Carrega o modelo
-def carrega_modelo():
-    """Carrega o modelo treinado"""
+async def le_features(request: Request):
+    """Decodifica o corpo conforme o Content-Type e devolve o campo 'features'
+
+    JSON continua sendo o padrão; application/octet-stream (float32/float64
+    little-endian) e application/msgpack evitam o parse e a validação do
+    pydantic no caminho de predição.
+    """
     try:
-        # Tenta carregar do MLflow
-        return mlflow.sklearn.load_model("models:/melhor_modelo_fraude/Production")
-    except:
-        try:
-            # Tenta carregar do MLflow (versão latest)
-            return mlflow.sklearn.load_model("models:/melhor_modelo_fraude/latest")
-        except:
-            # Carrega do arquivo local
-            return joblib.load(MODEL_PATH)
+        dados = decodifica(await request.body(), request.headers.get("content-type"))
+    except FormatoNaoSuportado as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Payload malformado: {str(e)}")
+    if not isinstance(dados, dict) or "features" not in dados:
+        raise HTTPException(status_code=422, detail="O campo 'features' é obrigatório")
+    return dados["features"]
+
+def responde(dados, request: Request):
+    """Resposta no formato pedido em Accept (JSON por padrão)"""
+    corpo, tipo = codifica(dados, request.headers.get("accept"))
+    return Response(content=corpo, media_type=tipo)
 
-modelo = carrega_modelo()
+# Modelo carregado sob demanda (MODEL_SOURCE define a ordem: registro ou arquivo local)
+# Com MODEL_SOURCE=local a versão inicial é a do arquivo; do registro, só a recarga a conhece
+modelo_servido = ModeloServido(versiona=versao_local if MODEL_SOURCE == "local" else None)
+
+def pontua(modelo, X):
+    """Probabilidade de fraude de cada linha de X segundo o modelo dado"""
+    return modelo.predict_proba(X)[:, 1]
+
+async def obtem_modelo():
+    """Modelo em produção, carregado fora do event loop na primeira chamada"""
+    if modelo_servido.carregado:
+        return modelo_servido.obtem()
+    return await run_in_threadpool(modelo_servido.obtem)
+
+micro_lote = MicroLote(
+    pontua, MICROBATCH_MAX_WAIT_US, MICROBATCH_MAX_SIZE, obtem_modelo=modelo_servido.obtem
+)
+
+# Recarga sem downtime quando o artefato (ou o registro) for atualizado
+recarregador = RecarregadorModelo(modelo_servido)
+
+@app.on_event("startup")
+async def inicializa():
+    """Configura o logging e carrega o modelo antes de aceitar requisições"""
+    configura_logging()
+    await obtem_modelo()
+    if RELOAD_INTERVAL > 0:
+        recarregador.inicia()
+
+@app.on_event("shutdown")
+async def finaliza():
+    """Interrompe a observação de novas versões do modelo e esvazia a fila de logs"""
+    recarregador.para()
+    para_logging()
 
 # Rotas
 @app.get("/")
@@ -52,31 +132,115 @@ def inicio():
         "mensagem": "API de Detecção de Fraude - Use /docs para ver a documentação"
     }
 
-@app.post("/prediz", response_model=Predicao)
-def prediz(transacao: Transacao):
+@app.post("/prediz", response_model=Predicao, openapi_extra=corpo_openapi(Transacao))
+async def prediz(request: Request):
     """Faz a predição de fraude"""
+    cronometro = Cronometro("fastapi", "/prediz")
     try:
-        # Prepara dados
-        features = np.array(transacao.features).reshape(1, -1)
-        
-        # Faz predição
-        prob_fraude = modelo.predict_proba(features)[0, 1]
-        eh_fraude = prob_fraude > 0.5
+        features = await le_features(request)
+        cronometro.marca("parse")
+        try:
+            features = np.asarray(features, dtype=np.float64)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=422, detail=f"Features devem ser numéricas: {str(e)}")
+
+        modelo = await obtem_modelo()
+        if features.shape != (modelo.n_features_in_,):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Esperadas {modelo.n_features_in_} features, recebidas {features.size}"
+            )
+        if not np.isfinite(features).all():
+            raise HTTPException(status_code=422, detail="Features contêm valores não finitos")
+        cronometro.marca("validate")
+
+        try:
+            # Faz predição (agrupada com as requisições concorrentes, se habilitado)
+            if MICROBATCH_ENABLED:
+                prob_fraude = await micro_lote.submete(features)
+            else:
+                prob_fraude = (await run_in_threadpool(pontua, modelo, features.reshape(1, -1)))[0]
+            eh_fraude = prob_fraude > FRAUD_THRESHOLD
+            cronometro.marca("predict")
         
-        return Predicao(
-            prob_fraude=float(prob_fraude),
-            eh_fraude=bool(eh_fraude)
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao fazer predição: {str(e)}"
-        )
+            predicao = {
+                "prob_fraude": float(prob_fraude),
+                "eh_fraude": bool(eh_fraude),
+                "limite": FRAUD_THRESHOLD
+            }
+            registra_sucesso("Predição bem-sucedida", endpoint="/prediz", features=features, **predicao)
+            resposta = responde(predicao, request)
+            cronometro.marca("serialize")
+            return resposta
+        except Exception as e:
+            logging.exception("Erro inesperado durante a predição:")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao fazer predição: {str(e)}"
+            )
+    finally:
+        # Erros (4xx/5xx) também entram na latência
+        cronometro.finaliza()
+
+@app.post("/prediz/lote", response_model=PredicaoLote, openapi_extra=corpo_openapi(Lote))
+async def prediz_lote(request: Request):
+    """Faz a predição de fraude para um lote de transações"""
+    cronometro = Cronometro("fastapi", "/prediz/lote")
+    try:
+        linhas = await le_features(request)
+        cronometro.marca("parse")
+        # Valida contra o próprio modelo, como o /prediz
+        modelo = await obtem_modelo()
+        num_features = modelo.n_features_in_
+        if isinstance(linhas, np.ndarray):
+            # Corpo binário: matriz N×F achatada, sem cópia
+            if linhas.size % num_features:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"O corpo binário deve conter N×{num_features} valores"
+                )
+            linhas = linhas.reshape(-1, num_features)
+        elif not isinstance(linhas, list):
+            raise HTTPException(status_code=422, detail="O campo 'features' deve ser uma matriz N×F")
+
+        if len(linhas) == 0:
+            raise HTTPException(
+                status_code=400,
+                detail="O lote deve conter ao menos uma transação"
+            )
+        if len(linhas) > BATCH_MAX_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"O lote excede o limite de {BATCH_MAX_SIZE} transações"
+            )
+
+        cronometro.lote(len(linhas))
+
+        try:
+            resultado = await run_in_threadpool(
+                pontua_lote, modelo, linhas, num_features, FRAUD_THRESHOLD, cronometro
+            )
+            resultado["limite"] = FRAUD_THRESHOLD
+            registra_sucesso("Predição em lote concluída", endpoint="/prediz/lote",
+                             transacoes=len(linhas), erros=len(resultado["erros"]))
+            resposta = responde(resultado, request)
+            cronometro.marca("serialize")
+            return resposta
+        except Exception as e:
+            logging.exception("Erro inesperado durante a predição em lote:")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao fazer predição em lote: {str(e)}"
+            )
+    finally:
+        # Erros (4xx/5xx) também entram na latência
+        cronometro.finaliza()
 
 @app.get("/info-modelo")
 def info_modelo():
     """Informações sobre o modelo"""
     try:
+        modelo = modelo_servido.obtem()
         return {
             "tipo": type(modelo).__name__,
             "num_features": modelo.n_features_in_,
@@ -89,6 +253,21 @@ def info_modelo():
             detail=f"Erro ao buscar informações: {str(e)}"
         )
 
+@app.get("/metrics")
+def metrics():
+    """Métricas no formato Prometheus"""
+    return Response(generate_latest(), media_type="text/plain")
+
+if PROFILER_ENABLED:
+    @app.post("/debug/perfil")
+    def arma_perfil(requisicoes: int = 100):
+        """Amostra as pilhas durante as próximas N requisições de predição"""
+        try:
+            arquivo = perfilador.arma(requisicoes)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return {"arquivo": arquivo, "requisicoes": requisicoes}
+
 # Inicia servidor
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import numpy as np
+from prometheus_client import Gauge, Histogram
+
+# Métricas Prometheus do micro-lote
+fila_profundidade = Gauge(
+    'microbatch_queue_depth', 'Requisições aguardando na fila do micro-lote'
+)
+lote_tamanho = Histogram(
+    'microbatch_batch_size', 'Tamanho dos lotes efetivamente pontuados',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+lote_espera = Histogram(
+    'microbatch_wait_seconds', 'Tempo entre a chegada da requisição e o envio do lote',
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+)
+
+
+class MicroLote:
+    """Agrupa requisições concorrentes em uma única chamada ao modelo
+
+    Cada requisição entra em uma fila asyncio. Um worker junta as que chegam
+    dentro da janela (espera_max_us) até tamanho_max, pontua o lote inteiro
+    fora do event loop e devolve a cada requisição o seu resultado.
+
+    Com obtem_modelo, o modelo é lido uma única vez por lote e entregue a
+    pontua(modelo, X): uma recarga no meio do lote não mistura versões.
+    """
+
+    def __init__(self, pontua, espera_max_us, tamanho_max, executor=None, obtem_modelo=None):
+        self.pontua = pontua
+        self.obtem_modelo = obtem_modelo
+        self.espera_max = espera_max_us / 1_000_000
+        self.tamanho_max = tamanho_max
+        self.executor = executor
+        self._loop = None
+        self._fila = None
+        self._worker = None
+
+    def _inicia(self, loop):
+        """Cria a fila e o worker no event loop em execução"""
+        self._loop = loop
+        self._fila = asyncio.Queue()
+        self._worker = loop.create_task(self._executa())
+
+    async def submete(self, x):
+        """Enfileira uma transação e aguarda o resultado do seu lote"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            self._inicia(loop)
+
+        futuro = loop.create_future()
+        self._fila.put_nowait((x, futuro, time.perf_counter()))
+        fila_profundidade.set(self._fila.qsize())
+        return await futuro
+
+    async def _coleta(self):
+        """Junta as requisições que chegam dentro da janela de espera"""
+        lote = [await self._fila.get()]
+        prazo = self._loop.time() + self.espera_max
+        while len(lote) < self.tamanho_max:
+            if not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+                continue
+            restante = prazo - self._loop.time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self._fila.get(), restante))
+            except asyncio.TimeoutError:
+                break
+        fila_profundidade.set(self._fila.qsize())
+        return lote
+
+    def _pontua_lote(self, X):
+        """Pontua o lote com um único snapshot do modelo, se houver"""
+        if self.obtem_modelo is None:
+            return self.pontua(X)
+        return self.pontua(self.obtem_modelo(), X)
+
+    async def _executa(self):
+        """Worker: coleta, pontua fora do event loop e distribui os resultados"""
+        while True:
+            lote = await self._coleta()
+
+            agora = time.perf_counter()
+            for _, _, chegada in lote:
+                lote_espera.observe(agora - chegada)
+            lote_tamanho.observe(len(lote))
+
+            try:
+                X = np.vstack([x for x, _, _ in lote])
+                resultados = await self._loop.run_in_executor(self.executor, self._pontua_lote, X)
+            except Exception as e:
+                for _, futuro, _ in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+
+            for (_, futuro, _), resultado in zip(lote, resultados):
+                if not futuro.done():
+                    futuro.set_result(resultado)
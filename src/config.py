@@ -3,7 +3,10 @@ import os
 # Configurações do MLflow
 MLFLOW_TRACKING_URI = f"sqlite:///{os.path.abspath('mlruns/mlflow.db')}"
 MLFLOW_EXPERIMENT = "Fraud Detection"
-MLFLOW_ARTIFACT_ROOT = f"file:///{os.path.normpath(os.path.abspath('mlruns')).replace('\\', '/')}"
+_MLRUNS_DIR = os.path.normpath(os.path.abspath('mlruns')).replace('\\', '/')
+MLFLOW_ARTIFACT_ROOT = f"file:///{_MLRUNS_DIR}"
+# Tempo máximo (s) para esvaziar a fila de logging assíncrono ao fim de cada run
+MLFLOW_LOG_TIMEOUT = float(os.getenv("MLFLOW_LOG_TIMEOUT", 30))
 
 # Garante que o diretório mlruns existe com as permissões corretas
 os.makedirs(os.path.abspath("mlruns"), exist_ok=True)
@@ -37,13 +40,50 @@ MODEL_CONFIGS = [
 RANDOM_STATE = 42
 TEST_SIZE = 0.2
 CV_SPLITS = 5
+# Linhas por bloco no pré-processamento em streaming (memória limitada pelo bloco)
+PROCESSING_CHUNK_ROWS = int(os.getenv("PROCESSING_CHUNK_ROWS", 100000))
+# Núcleos disponíveis para a busca de hiperparâmetros (processos × threads por ajuste)
+TRAINING_CORES = int(os.getenv("TRAINING_CORES", os.cpu_count() or 1))
+# Fração das transações legítimas mantida no treino de cada floresta (1 = todas).
+# As fraudes são todas mantidas e pesos por amostra corrigem as probabilidades
+NEGATIVE_SAMPLING_RATE = float(os.getenv("NEGATIVE_SAMPLING_RATE", 1))
+# Modelo final de cada configuração: "refit" ajusta no treino completo; "folds"
+# serve o ensemble dos modelos da validação cruzada, sem o ajuste extra
+FINAL_MODEL = os.getenv("FINAL_MODEL", "refit")
+if FINAL_MODEL not in ("refit", "folds"):
+    raise ValueError(f"FINAL_MODEL deve ser 'refit' ou 'folds' (recebido: {FINAL_MODEL!r})")
+# Custos usados na avaliação por limiar (ajuste ao custo real de cada erro)
+COST_FALSE_POSITIVE = float(os.getenv("COST_FALSE_POSITIVE", 1))
+COST_FALSE_NEGATIVE = float(os.getenv("COST_FALSE_NEGATIVE", 10))
+# "grid" valida todas as configurações com CV completa; "halving" usa busca
+# sucessiva: poucas amostras (ou árvores) para todas e mais recurso só para as melhores
+SEARCH_MODE = os.getenv("SEARCH_MODE", "grid")
+HALVING_FACTOR = int(os.getenv("HALVING_FACTOR", 3))
+HALVING_RESOURCE = os.getenv("HALVING_RESOURCE", "amostras")
 
 # Caminhos dos arquivos
 DATA_DIR = "data"
 RAW_DIR = f"{DATA_DIR}/raw"
 PROCESSED_DIR = f"{DATA_DIR}/processed"
+# Cópia colunar (Arrow IPC, float32/uint8) do CSV bruto, refeita quando o CSV muda
+RAW_COLUMNAR_PATH = f"{RAW_DIR}/creditcard.arrow"
 MODELS_DIR = "models"
 MODEL_PATH = f"{MODELS_DIR}/melhor_modelo.joblib"
+SCALER_PATH = f"{PROCESSED_DIR}/scaler.joblib"
+# Probabilidades fora do fold de cada configuração (uma pasta por run)
+OOF_DIR = f"{PROCESSED_DIR}/oof"
+# Floresta compilada com o scaler incorporado: pontua transações brutas.
+# Diretório com um .npy por array, aberto com mmap na inicialização
+INFERENCE_MODEL_PATH = f"{MODELS_DIR}/modelo_inferencia"
+# Diferença máxima de probabilidade aceita na paridade da exportação
+EXPORT_TOLERANCE = float(os.getenv("EXPORT_TOLERANCE", 1e-9))
+# Floresta compactada por src/training/compaction.py (poda de árvores, fusão de
+# folhas e quantização): diretório mapeável, como INFERENCE_MODEL_PATH
+COMPACT_MODEL_PATH = f"{MODELS_DIR}/modelo_compacto"
+# Artefato mapeável compartilhado pelos workers de src/serve_workers.py
+SHARED_MODEL_PATH = f"{MODELS_DIR}/melhor_modelo_compartilhado"
+# Saídas das etapas de src/pipeline.py, indexadas pelo hash das entradas
+PIPELINE_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", ".cache/pipeline")
 
 # URLs
 DATASET_URL = "https://www.kaggle.com/datasets/mlg-ulb/creditcardfraud/download"
@@ -53,4 +93,52 @@ API_HOST = "0.0.0.0"
 API_PORT = 8000
 API_TITLE = "API de Detecção de Fraude"
 API_DESCRIPTION = "API para prever fraudes em transações"
-API_VERSION = "1.0.0" 
\ No newline at end of file
+API_VERSION = "1.0.0"
+
+# Configurações de inferência
+NUM_FEATURES = 29
+FRAUD_THRESHOLD = 0.5
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 10000))
+# Modelo carregado pelas APIs (MODEL_PATH ou INFERENCE_MODEL_PATH)
+SERVING_MODEL_PATH = os.getenv("SERVING_MODEL_PATH", MODEL_PATH)
+# "registry" tenta o MLflow Model Registry antes do arquivo local; "local" tenta o arquivo primeiro
+MODEL_SOURCE = os.getenv("MODEL_SOURCE", "registry")
+REGISTRY_MODEL_NAME = "melhor_modelo_fraude"
+# Tempo máximo (s) de cada consulta ao Model Registry
+REGISTRY_TIMEOUT = float(os.getenv("REGISTRY_TIMEOUT", 5))
+# Recarga sem downtime: intervalo (s) entre verificações (0 desativa) e fonte observada
+# ("file" = mtime de SERVING_MODEL_PATH, "registry" = estágio Production, "both")
+RELOAD_INTERVAL = float(os.getenv("RELOAD_INTERVAL", 30))
+RELOAD_SOURCE = os.getenv("RELOAD_SOURCE", "file")
+# Processos de src/serve_workers.py
+SERVING_WORKERS = int(os.getenv("SERVING_WORKERS", os.cpu_count() or 1))
+# "compiled" usa a floresta achatada em arrays NumPy; "sklearn" usa o estimador original
+FOREST_ENGINE = os.getenv("FOREST_ENGINE", "compiled")
+# Micro-lote do FastAPI: agrupa requisições concorrentes de /prediz
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "1") == "1"
+MICROBATCH_MAX_WAIT_US = int(os.getenv("MICROBATCH_MAX_WAIT_US", 500))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", 64))
+# Cache de predições do /predict (Flask): LRU com TTL por processo
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_MAX_ITEMS = int(os.getenv("CACHE_MAX_ITEMS", 100000))
+CACHE_TTL = float(os.getenv("CACHE_TTL", 300))
+# Backend compartilhado entre workers (ex.: redis://localhost:6379/0); vazio desativa
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+# Perfilador por amostragem das APIs: habilita a rota /debug/perfil, que o arma
+# por N requisições e grava as pilhas amostradas (formato collapsed) em PROFILE_DIR
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", 2))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Logging das APIs: fila limitada com thread de escrita ("json" ou "text"); com a
+# fila cheia os registros são descartados e contados em log_records_dropped_total
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Fração das predições bem-sucedidas registradas (avisos e erros são sempre registrados)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.01))
+# Compactação da floresta: perda máxima de PR-AUC de validação na poda de
+# árvores, diferença máxima de probabilidade entre folhas irmãs fundidas
+# (0 funde só folhas idênticas) e fração do teste usada como validação
+COMPACTION_TOLERANCE = float(os.getenv("COMPACTION_TOLERANCE", 0.002))
+COMPACTION_LEAF_TOLERANCE = float(os.getenv("COMPACTION_LEAF_TOLERANCE", 0.0))
+COMPACTION_VALIDATION_FRACTION = float(os.getenv("COMPACTION_VALIDATION_FRACTION", 0.5))
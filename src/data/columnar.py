@@ -0,0 +1,126 @@
+"""Cópia colunar (Arrow IPC) do CSV bruto
+
+O CSV é convertido uma única vez, em blocos, para um arquivo Arrow IPC sem
+compressão com features em float32 e Class em uint8. Os processamentos
+seguintes abrem esse arquivo com mmap e leem só as colunas necessárias, sem
+parse de texto. Um arquivo lateral (<destino>.fonte.json) guarda tamanho,
+mtime e hash do CSV de origem: se o CSV mudar, a cópia é refeita.
+
+pyarrow é opcional: sem ele, carrega_bruto lê o CSV diretamente.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow é opcional: sem ele o CSV é lido com pandas
+    pa = None
+
+from src.config import RAW_DIR, RAW_COLUMNAR_PATH
+
+COLUNA_CLASSE = "Class"
+
+
+def _hash_arquivo(caminho):
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, "rb") as f:
+        while bloco := f.read(1 << 20):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _caminho_fonte(destino):
+    return f"{destino}.fonte.json"
+
+
+def colunar_atualizado(caminho_csv, destino):
+    """True se destino foi gerado a partir do conteúdo atual de caminho_csv
+
+    Tamanho e mtime iguais bastam. Se só o mtime mudou (ex.: arquivo copiado
+    de novo), o hash decide e, se o conteúdo for o mesmo, o mtime registrado
+    é atualizado.
+    """
+    if not (os.path.exists(destino) and os.path.exists(_caminho_fonte(destino))):
+        return False
+    with open(_caminho_fonte(destino)) as f:
+        fonte = json.load(f)
+    estado = os.stat(caminho_csv)
+    if estado.st_size != fonte["tamanho"]:
+        return False
+    if estado.st_mtime_ns == fonte["mtime_ns"]:
+        return True
+    if _hash_arquivo(caminho_csv) != fonte["hash"]:
+        return False
+    fonte["mtime_ns"] = estado.st_mtime_ns
+    with open(_caminho_fonte(destino), "w") as f:
+        json.dump(fonte, f, indent=2)
+    return True
+
+
+def converte_csv(caminho_csv, destino):
+    """Converte o CSV em blocos para Arrow IPC (float32 e Class em uint8)"""
+    if pa is None:
+        raise ImportError("Instale o pacote 'pyarrow' para gerar a cópia colunar")
+
+    with open(caminho_csv) as f:
+        colunas = f.readline().strip().replace('"', '').split(",")
+    tipos = {coluna: pa.float32() for coluna in colunas}
+    tipos[COLUNA_CLASSE] = pa.uint8()
+
+    leitor = pa_csv.open_csv(caminho_csv, convert_options=pa_csv.ConvertOptions(column_types=tipos))
+    temporario = f"{destino}.tmp"
+    linhas = 0
+    with pa.OSFile(temporario, "wb") as saida, pa.ipc.new_file(saida, leitor.schema) as escritor:
+        for lote in leitor:
+            escritor.write_batch(lote)
+            linhas += lote.num_rows
+    os.replace(temporario, destino)
+
+    estado = os.stat(caminho_csv)
+    with open(_caminho_fonte(destino), "w") as f:
+        json.dump({
+            "csv": caminho_csv,
+            "tamanho": estado.st_size,
+            "mtime_ns": estado.st_mtime_ns,
+            "hash": _hash_arquivo(caminho_csv),
+            "linhas": linhas,
+        }, f, indent=2)
+    return linhas
+
+
+def atualiza_colunar(caminho_csv=f"{RAW_DIR}/creditcard.csv", destino=RAW_COLUMNAR_PATH):
+    """Gera (ou refaz, se o CSV mudou) a cópia colunar; devolve True se converteu"""
+    if colunar_atualizado(caminho_csv, destino):
+        return False
+    print(f"Convertendo '{caminho_csv}' para o formato colunar em '{destino}'...")
+    linhas = converte_csv(caminho_csv, destino)
+    print(f"Cópia colunar gerada: {linhas} linhas")
+    return True
+
+
+def le_colunar(destino=RAW_COLUMNAR_PATH, colunas=None):
+    """Tabela Arrow mapeada em memória com apenas as colunas pedidas"""
+    with pa.memory_map(destino, "r") as fonte:
+        tabela = pa.ipc.open_file(fonte).read_all()
+    return tabela if colunas is None else tabela.select(colunas)
+
+
+def carrega_bruto(caminho_csv=f"{RAW_DIR}/creditcard.csv", colunas=None, destino=None):
+    """DataFrame do dataset bruto, lido da cópia colunar sempre que possível
+
+    Sem destino, a cópia fica ao lado do CSV, com extensão .arrow.
+    """
+    if pa is None:
+        # Mesmos tipos da cópia colunar: float32 nas features e uint8 na classe
+        dados = pd.read_csv(caminho_csv, usecols=colunas, dtype=np.float32)
+        if COLUNA_CLASSE in dados:
+            dados[COLUNA_CLASSE] = dados[COLUNA_CLASSE].astype(np.uint8)
+        return dados
+    destino = destino or f"{os.path.splitext(caminho_csv)[0]}.arrow"
+    atualiza_colunar(caminho_csv, destino)
+    return le_colunar(destino, colunas).to_pandas()
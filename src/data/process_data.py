@@ -1,12 +1,15 @@
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import os
 import joblib
+from src.data.columnar import carrega_bruto
+from src.data.store import salva_conjunto, escreve_manifesto, dtype_de
 from src.config import (
     PROCESSED_DIR, RAW_DIR, RANDOM_STATE, 
-    TEST_SIZE
+    TEST_SIZE, SCALER_PATH, PROCESSING_CHUNK_ROWS
 )
 
 def processa_dados():
@@ -18,7 +21,8 @@ def processa_dados():
     
     # Carrega dados
     print("Carregando dados brutos...")
-    dados = pd.read_csv(f"{RAW_DIR}/creditcard.csv")
+    # Cópia colunar mapeada em memória (gerada na primeira vez), sem parse do CSV
+    dados = carrega_bruto(f"{RAW_DIR}/creditcard.csv")
     
     # Separa features e target
     X = dados.drop('Class', axis=1)
@@ -38,17 +42,109 @@ def processa_dados():
     
     # Salva dados processados
     print("Salvando dados processados...")
-    np.save(f"{PROCESSED_DIR}/X_train.npy", X_train)
-    np.save(f"{PROCESSED_DIR}/X_test.npy", X_test)
-    np.save(f"{PROCESSED_DIR}/y_train.npy", y_train)
-    np.save(f"{PROCESSED_DIR}/y_test.npy", y_test)
+    # float32/uint8 com manifesto, abertos com mmap pelo treino
+    salva_conjunto(
+        PROCESSED_DIR,
+        X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test
+    )
     
     # Salva scaler
-    joblib.dump(scaler, f"{PROCESSED_DIR}/scaler.joblib")
+    joblib.dump(scaler, SCALER_PATH)
     
     print("Dados processados com sucesso!")
     print(f"Shape dos dados de treino: {X_train.shape}")
     print(f"Shape dos dados de teste: {X_test.shape}")
 
+def _mistura(h):
+    """Finalizador do splitmix64, vetorizado em uint64"""
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+def eh_teste(valores, test_size=TEST_SIZE, semente=RANDOM_STATE):
+    """Sorteio determinístico de cada linha para o teste, pelo hash do seu conteúdo
+
+    A decisão depende só dos valores da linha (incluindo a classe), não da
+    posição no arquivo nem do tamanho do bloco. Como é independente da
+    classe, cada classe fica com ~test_size das suas linhas no teste.
+    """
+    bits = np.ascontiguousarray(valores, dtype=np.float64).view(np.uint64)
+    h = np.full(len(bits), semente, dtype=np.uint64)
+    for coluna in bits.T:
+        h = _mistura(h ^ coluna)
+    uniforme = (h >> np.uint64(11)) / float(1 << 53)
+    return uniforme < test_size
+
+def _blocos(caminho_csv, tamanho_bloco):
+    """(features, classe, máscara de teste) de cada bloco do CSV"""
+    for bloco in pd.read_csv(caminho_csv, chunksize=tamanho_bloco, dtype=np.float64):
+        teste = eh_teste(bloco.to_numpy())
+        y = bloco.pop('Class').to_numpy()
+        yield bloco.to_numpy(), y, teste
+
+def processa_dados_streaming(caminho_csv=f"{RAW_DIR}/creditcard.csv", destino=PROCESSED_DIR,
+                             caminho_scaler=SCALER_PATH, tamanho_bloco=PROCESSING_CHUNK_ROWS):
+    """Processa o CSV bruto em blocos, com memória limitada pelo tamanho do bloco
+
+    Primeira passada: conta as linhas de cada conjunto e ajusta o scaler com
+    partial_fit nas linhas de treino. Segunda passada: normaliza cada bloco e
+    o grava direto nos .npy de saída, pré-alocados e mapeados em memória.
+    """
+    print(f"Processando dados em blocos de {tamanho_bloco} linhas...")
+    os.makedirs(destino, exist_ok=True)
+
+    print("Primeira passada: dividindo em treino e teste e ajustando o scaler...")
+    scaler = StandardScaler()
+    n_treino = n_teste = 0
+    for X, y, teste in _blocos(caminho_csv, tamanho_bloco):
+        if (~teste).any():
+            scaler.partial_fit(X[~teste])
+        n_teste += int(teste.sum())
+        n_treino += len(teste) - int(teste.sum())
+    if n_treino == 0:
+        # CSV só com o cabeçalho (ou sem linhas de treino): o scaler não foi ajustado
+        raise ValueError(f"Nenhuma linha de treino em '{caminho_csv}'; o CSV está vazio?")
+    n_features = scaler.n_features_in_
+    print(f"Treino: {n_treino} linhas, teste: {n_teste} linhas, {n_features} features")
+
+    print("Segunda passada: normalizando e gravando...")
+    formatos = {
+        "X_train": (n_treino, n_features), "y_train": (n_treino,),
+        "X_test": (n_teste, n_features), "y_test": (n_teste,),
+    }
+    saidas = {
+        nome: np.lib.format.open_memmap(
+            os.path.join(destino, f"{nome}.npy"), mode="w+", dtype=dtype_de(nome), shape=formato
+        )
+        for nome, formato in formatos.items()
+    }
+    posicoes = {"train": 0, "test": 0}
+    for X, y, teste in _blocos(caminho_csv, tamanho_bloco):
+        X = scaler.transform(X)
+        for sufixo, mascara in (("train", ~teste), ("test", teste)):
+            inicio = posicoes[sufixo]
+            fim = inicio + int(mascara.sum())
+            saidas[f"X_{sufixo}"][inicio:fim] = X[mascara]
+            saidas[f"y_{sufixo}"][inicio:fim] = y[mascara]
+            posicoes[sufixo] = fim
+
+    for array in saidas.values():
+        array.flush()
+    del saidas
+    escreve_manifesto(destino, formatos)
+    joblib.dump(scaler, caminho_scaler)
+
+    print("Dados processados com sucesso!")
+    print(f"Shape dos dados de treino: {formatos['X_train']}")
+    print(f"Shape dos dados de teste: {formatos['X_test']}")
+
 if __name__ == "__main__":
-    processa_dados() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Pré-processamento do dataset de fraude")
+    parser.add_argument("--streaming", action="store_true",
+                        help="lê o CSV em blocos (para arquivos maiores que a memória)")
+    parser.add_argument("--tamanho-bloco", type=int, default=PROCESSING_CHUNK_ROWS)
+    args = parser.parse_args()
+    if args.streaming:
+        processa_dados_streaming(tamanho_bloco=args.tamanho_bloco)
+    else:
+        processa_dados()
@@ -0,0 +1,90 @@
+"""Armazenamento dos conjuntos processados para treino
+
+Features são gravadas como float32 contíguo e rótulos como uint8, um .npy
+por array, junto de um manifesto (manifesto.json) com formato, dtype e
+SHA-256 de cada arquivo. O treino abre os arrays com mmap_mode='r': folds e
+workers da busca leem as mesmas páginas do page cache, sem cópias.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+MANIFESTO = "manifesto.json"
+
+# dtype de cada array pelo prefixo do nome (X_train, y_test, oof, ...)
+DTYPES_CONJUNTO = {"X": np.dtype(np.float32), "y": np.dtype(np.uint8), "oof": np.dtype(np.float32)}
+
+
+def dtype_de(nome):
+    """dtype gravado para o array, a partir do prefixo do nome"""
+    return DTYPES_CONJUNTO[nome.split("_", 1)[0]]
+
+
+def checksum(caminho):
+    """SHA-256 do arquivo, lido em blocos de 1 MB"""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        while bloco := f.read(1 << 20):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def escreve_manifesto(diretorio, nomes):
+    """Registra formato, dtype e checksum dos .npy já gravados em diretorio"""
+    manifesto = {}
+    for nome in nomes:
+        caminho = os.path.join(diretorio, f"{nome}.npy")
+        array = np.load(caminho, mmap_mode="r")
+        manifesto[nome] = {
+            "arquivo": f"{nome}.npy",
+            "shape": list(array.shape),
+            "dtype": array.dtype.str,
+            "sha256": checksum(caminho),
+        }
+    with open(os.path.join(diretorio, MANIFESTO), "w") as f:
+        json.dump(manifesto, f, indent=2)
+    return manifesto
+
+
+def salva_conjunto(diretorio, **arrays):
+    """Grava os arrays (X_* e oof em float32, y_* em uint8) e o manifesto"""
+    os.makedirs(diretorio, exist_ok=True)
+    for nome, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=dtype_de(nome))
+        np.save(os.path.join(diretorio, f"{nome}.npy"), array)
+    return escreve_manifesto(diretorio, arrays)
+
+
+def carrega_conjunto(diretorio, nomes=None, mmap=True, verifica=False):
+    """Abre os arrays do conjunto (mapeados em memória por padrão)
+
+    Confere formato e dtype de cada array com o manifesto e, se verifica,
+    também os checksums. Diretórios gravados antes do manifesto são lidos
+    como estão.
+    """
+    modo = "r" if mmap else None
+    caminho_manifesto = os.path.join(diretorio, MANIFESTO)
+    if not os.path.exists(caminho_manifesto):
+        print(f"Aviso: '{diretorio}' não tem {MANIFESTO}; lendo os .npy sem verificação")
+        nomes = nomes or ["X_train", "X_test", "y_train", "y_test"]
+        return {nome: np.load(os.path.join(diretorio, f"{nome}.npy"), mmap_mode=modo) for nome in nomes}
+
+    with open(caminho_manifesto) as f:
+        manifesto = json.load(f)
+
+    arrays = {}
+    for nome in nomes or manifesto:
+        item = manifesto[nome]
+        caminho = os.path.join(diretorio, item["arquivo"])
+        if verifica and checksum(caminho) != item["sha256"]:
+            raise ValueError(f"Checksum de '{caminho}' não confere com o manifesto")
+        array = np.load(caminho, mmap_mode=modo)
+        if list(array.shape) != item["shape"] or array.dtype.str != item["dtype"]:
+            raise ValueError(
+                f"'{caminho}' tem formato {array.shape} {array.dtype}, "
+                f"manifesto espera {tuple(item['shape'])} {item['dtype']}"
+            )
+        arrays[nome] = array
+    return arrays
@@ -0,0 +1,91 @@
+import numpy as np
+
+
+def prepara_lote(linhas, num_features):
+    """Converte uma matriz N×F em array, separando as linhas inválidas
+
+    Retorna a matriz apenas com as linhas válidas, os índices dessas linhas
+    no lote original e a lista de erros por linha.
+    """
+    # Caminho rápido: matriz retangular e numérica, validada de uma só vez
+    try:
+        X = np.asarray(linhas, dtype=np.float64)
+    except (ValueError, TypeError):
+        X = None
+
+    if X is not None and X.ndim == 2 and X.shape[1] == num_features:
+        finitas = np.isfinite(X).all(axis=1)
+        if finitas.all():
+            return X, np.arange(X.shape[0]), []
+        indices = np.flatnonzero(finitas)
+        erros = [
+            {'indice': int(i), 'erro': 'Features contêm valores não finitos.'}
+            for i in np.flatnonzero(~finitas)
+        ]
+        return X[indices], indices, erros
+
+    # Caminho lento: valida linha a linha para reportar o erro de cada uma
+    validas = []
+    indices = []
+    erros = []
+    for i, linha in enumerate(linhas):
+        try:
+            x = np.asarray(linha, dtype=np.float64)
+        except (ValueError, TypeError):
+            erros.append({'indice': i, 'erro': 'Features devem ser numéricas.'})
+            continue
+        if x.ndim != 1 or x.shape[0] != num_features:
+            erros.append({
+                'indice': i,
+                'erro': f'Formato de features inválido: {x.shape}. Esperado: ({num_features},).'
+            })
+            continue
+        if not np.isfinite(x).all():
+            erros.append({'indice': i, 'erro': 'Features contêm valores não finitos.'})
+            continue
+        validas.append(x)
+        indices.append(i)
+
+    if validas:
+        X = np.vstack(validas)
+    else:
+        X = np.empty((0, num_features), dtype=np.float64)
+    return X, np.asarray(indices, dtype=np.intp), erros
+
+
+def pontua_lote(modelo, linhas, num_features, limite, cronometro=None):
+    """Pontua um lote com uma única chamada vetorizada a predict_proba
+
+    Linhas inválidas recebem None em 'prob_fraude' e 'eh_fraude' e são
+    descritas em 'erros', sem invalidar o restante do lote. Com um
+    Cronometro (src.inference.telemetry), marca as etapas de validação e
+    predição.
+    """
+    X, indices, erros = prepara_lote(linhas, num_features)
+    if cronometro is not None:
+        cronometro.marca("validate")
+
+    if X.shape[0] == 0:
+        probs = np.empty(0)
+    else:
+        probs = modelo.predict_proba(X)[:, 1]
+    if cronometro is not None:
+        cronometro.marca("predict")
+
+    if not erros:
+        return {
+            'prob_fraude': probs.tolist(),
+            'eh_fraude': (probs > limite).tolist(),
+            'erros': []
+        }
+
+    prob_fraude = [None] * len(linhas)
+    eh_fraude = [None] * len(linhas)
+    for i, prob in zip(indices.tolist(), probs.tolist()):
+        prob_fraude[i] = prob
+        eh_fraude[i] = prob > limite
+    return {
+        'prob_fraude': prob_fraude,
+        'eh_fraude': eh_fraude,
+        'erros': erros
+    }
@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+# Métricas Prometheus do cache de predições
+cache_consultas = Counter(
+    'prediction_cache_requests_total', 'Consultas ao cache de predições', ['resultado']
+)
+cache_remocoes = Counter(
+    'prediction_cache_evictions_total', 'Entradas removidas do cache de predições', ['motivo']
+)
+cache_tamanho = Gauge('prediction_cache_size', 'Entradas no cache local de predições')
+
+
+def chave_predicao(features, versao):
+    """Hash de 16 bytes do vetor de features validado e da versão do modelo"""
+    x = np.ascontiguousarray(features, dtype=np.float64)
+    h = hashlib.blake2b(x.tobytes(), digest_size=16)
+    h.update(str(versao).encode())
+    return h.digest()
+
+
+class BackendMemoria:
+    """Backend compartilhado em memória, substituto local do Redis nos testes"""
+
+    def __init__(self, relogio=time.monotonic):
+        self._dados = {}
+        self._relogio = relogio
+
+    def get(self, chave):
+        item = self._dados.get(chave)
+        if item is None:
+            return None
+        valor, expira = item
+        if self._relogio() >= expira:
+            del self._dados[chave]
+            return None
+        return valor
+
+    def set(self, chave, valor, ttl):
+        self._dados[chave] = (valor, self._relogio() + ttl)
+
+
+class BackendRedis:
+    """Backend compartilhado entre workers usando Redis (dependência opcional)"""
+
+    def __init__(self, url, prefixo="predicao:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("Instale o pacote 'redis' para usar CACHE_REDIS_URL") from e
+        self._cliente = redis.Redis.from_url(url)
+        self._prefixo = prefixo.encode()
+
+    def get(self, chave):
+        return self._cliente.get(self._prefixo + chave)
+
+    def set(self, chave, valor, ttl):
+        self._cliente.set(self._prefixo + chave, valor, ex=max(int(ttl), 1))
+
+
+class CachePredicoes:
+    """Cache LRU com TTL para probabilidades de fraude
+
+    A memória é limitada por max_itens (cada entrada guarda uma chave de 16
+    bytes e um float). A versão do modelo faz parte da chave e limpa() é
+    chamado a cada recarga, então predições de um modelo antigo nunca são
+    reaproveitadas. Um backend compartilhado opcional (ex.: Redis) é
+    consultado quando a entrada não está no cache local.
+    """
+
+    def __init__(self, max_itens, ttl, backend=None, relogio=time.monotonic):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.backend = backend
+        self._relogio = relogio
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _busca_local(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira = item
+            if self._relogio() >= expira:
+                del self._itens[chave]
+                cache_remocoes.labels('ttl').inc()
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def _guarda_local(self, chave, valor):
+        with self._trava:
+            self._itens[chave] = (valor, self._relogio() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                cache_remocoes.labels('capacidade').inc()
+            cache_tamanho.set(len(self._itens))
+
+    def obtem(self, chave):
+        """Probabilidade em cache para a chave, ou None"""
+        valor = self._busca_local(chave)
+        if valor is None and self.backend is not None:
+            try:
+                bruto = self.backend.get(chave)
+            except Exception as e:
+                logging.warning(f"Cache compartilhado indisponível: {e}")
+                bruto = None
+            if bruto is not None:
+                valor = struct.unpack('<d', bruto)[0]
+                self._guarda_local(chave, valor)
+        cache_consultas.labels('hit' if valor is not None else 'miss').inc()
+        return valor
+
+    def guarda(self, chave, valor):
+        """Armazena a probabilidade calculada no cache local e no compartilhado"""
+        self._guarda_local(chave, valor)
+        if self.backend is not None:
+            try:
+                self.backend.set(chave, struct.pack('<d', valor), self.ttl)
+            except Exception as e:
+                logging.warning(f"Cache compartilhado indisponível: {e}")
+
+    def limpa(self, *_):
+        """Descarta o cache local (chamado quando o modelo é recarregado)"""
+        with self._trava:
+            self._itens.clear()
+            cache_tamanho.set(0)
@@ -0,0 +1,113 @@
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: usa o json da biblioteca padrão
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack é opcional: só é exigido por quem usa o formato
+    msgpack = None
+
+TIPO_JSON = "application/json"
+TIPO_BINARIO = "application/octet-stream"
+TIPO_MSGPACK = "application/msgpack"
+
+# dtypes aceitos no corpo binário (sempre little-endian)
+DTYPES_BINARIOS = {"float32": np.dtype("<f4"), "float64": np.dtype("<f8")}
+
+
+class FormatoNaoSuportado(ValueError):
+    """Content-Type ou Accept que a API não sabe tratar"""
+
+
+def _tipo_e_parametros(content_type):
+    partes = [p.strip() for p in (content_type or "").split(";")]
+    parametros = {}
+    for parte in partes[1:]:
+        if "=" in parte:
+            chave, valor = parte.split("=", 1)
+            parametros[chave.strip().lower()] = valor.strip().strip('"')
+    return partes[0].lower(), parametros
+
+
+def formato_de(content_type):
+    """Formato do corpo da requisição: 'json', 'binario' ou 'msgpack'"""
+    tipo, _ = _tipo_e_parametros(content_type)
+    if tipo in ("", TIPO_JSON):
+        return "json"
+    if tipo == TIPO_BINARIO:
+        return "binario"
+    if tipo in (TIPO_MSGPACK, "application/x-msgpack"):
+        return "msgpack"
+    raise FormatoNaoSuportado(f"Content-Type não suportado: {tipo}")
+
+
+def decodifica(corpo, content_type):
+    """Decodifica o corpo da requisição em um dict com o campo 'features'
+
+    - application/json (padrão): {"features": [...]}
+    - application/octet-stream; dtype=float32|float64: floats little-endian
+      crus, lidos sem cópia com np.frombuffer
+    - application/msgpack: {"features": [...]} ou {"features": <bytes float64>}
+    """
+    formato = formato_de(content_type)
+
+    if formato == "binario":
+        _, parametros = _tipo_e_parametros(content_type)
+        nome_dtype = parametros.get("dtype", "float64")
+        if nome_dtype not in DTYPES_BINARIOS:
+            raise FormatoNaoSuportado(f"dtype binário não suportado: {nome_dtype}")
+        dtype = DTYPES_BINARIOS[nome_dtype]
+        if len(corpo) % dtype.itemsize:
+            raise ValueError(f"Corpo binário com {len(corpo)} bytes não é múltiplo de {dtype.itemsize}")
+        return {"features": np.frombuffer(corpo, dtype=dtype)}
+
+    if formato == "msgpack":
+        if msgpack is None:
+            raise FormatoNaoSuportado("Instale o pacote 'msgpack' para usar application/msgpack")
+        dados = msgpack.unpackb(corpo)
+        if isinstance(dados, dict) and isinstance(dados.get("features"), bytes):
+            dados["features"] = np.frombuffer(dados["features"], dtype=DTYPES_BINARIOS["float64"])
+        return dados
+
+    return orjson.loads(corpo) if orjson is not None else json.loads(corpo)
+
+
+def tipo_resposta(accept):
+    """Escolhe o formato da resposta a partir do cabeçalho Accept"""
+    for item in (accept or "").split(","):
+        tipo, _ = _tipo_e_parametros(item)
+        if tipo == TIPO_BINARIO:
+            return TIPO_BINARIO
+        if tipo in (TIPO_MSGPACK, "application/x-msgpack") and msgpack is not None:
+            return TIPO_MSGPACK
+        if tipo in (TIPO_JSON, "*/*", "application/*"):
+            return TIPO_JSON
+    return TIPO_JSON
+
+
+def codifica(dados, accept=None):
+    """Codifica a resposta de predição e devolve (corpo, media type)
+
+    Em application/octet-stream o corpo traz apenas as probabilidades de
+    fraude como float64 little-endian (NaN para linhas inválidas do lote).
+    """
+    tipo = tipo_resposta(accept)
+
+    if tipo == TIPO_BINARIO:
+        probs = dados["prob_fraude"]
+        if not isinstance(probs, list):
+            probs = [probs]
+        probs = [np.nan if p is None else p for p in probs]
+        return np.asarray(probs, dtype=DTYPES_BINARIOS["float64"]).tobytes(), TIPO_BINARIO
+
+    if tipo == TIPO_MSGPACK:
+        return msgpack.packb(dados), TIPO_MSGPACK
+
+    if orjson is not None:
+        return orjson.dumps(dados), TIPO_JSON
+    return json.dumps(dados).encode(), TIPO_JSON
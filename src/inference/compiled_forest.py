@@ -0,0 +1,323 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from src.config import MODEL_PATH, FOREST_ENGINE
+
+# Linhas avaliadas por vez no caminho em lote (limita a matriz árvores × linhas)
+TAMANHO_BLOCO = 1024
+
+
+class FlorestaCompilada:
+    """Floresta aleatória achatada em tabelas contíguas de nós
+
+    Todas as árvores ficam concatenadas em arrays NumPy: índice da feature,
+    limiar, filhos (esquerdo, direito) e probabilidades das folhas. As folhas
+    apontam para si mesmas, de modo que a travessia avança todas as árvores
+    um nível por iteração, sem desvios por nó.
+    """
+
+    def __init__(self, feature, limiar, filhos, valor, raizes, profundidade,
+                 classes, n_features, params=None, dtype_entrada=np.float32):
+        self.feature = feature
+        self.limiar = limiar
+        self.filhos = filhos
+        self.valor = valor
+        self.raizes = raizes
+        self.profundidade = int(profundidade)
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.params = params or {}
+        self.dtype_entrada = np.dtype(dtype_entrada)
+
+    @property
+    def n_arvores(self):
+        return len(self.raizes)
+
+    @property
+    def n_nos(self):
+        return len(self.feature)
+
+    def get_params(self, deep=True):
+        """Parâmetros do estimador de origem (compatível com o sklearn)"""
+        return dict(self.params)
+
+    def _avanca(self, nos, valores):
+        """Desce um nível: filho esquerdo em 2*nó, direito em 2*nó + 1"""
+        vai_direita = valores > self.limiar.take(nos)
+        return self.filhos.take(2 * nos + vai_direita)
+
+    def _percorre_linha(self, x):
+        """Caminho rápido para uma única transação"""
+        nos = self.raizes
+        for _ in range(self.profundidade):
+            nos = self._avanca(nos, x.take(self.feature.take(nos)))
+        # Acumula em float64 mesmo com folhas em float32 (floresta compactada)
+        return self.valor.take(nos, axis=0).mean(axis=0, dtype=np.float64)
+
+    def _folhas_bloco(self, X):
+        """Folha alcançada por cada árvore em cada linha do bloco (árvores × linhas)"""
+        n_linhas, n_features = X.shape
+        plano = X.ravel()
+        base = np.arange(n_linhas, dtype=np.intp)[np.newaxis, :] * n_features
+        nos = np.repeat(self.raizes[:, np.newaxis], n_linhas, axis=1)
+        for _ in range(self.profundidade):
+            nos = self._avanca(nos, plano.take(base + self.feature.take(nos)))
+        return nos
+
+    def _percorre_bloco(self, X):
+        """Avalia todas as árvores sobre um bloco de linhas, nível a nível"""
+        return self.valor.take(self._folhas_bloco(X), axis=0).mean(axis=0, dtype=np.float64)
+
+    def _valida(self, X):
+        X = np.ascontiguousarray(X, dtype=self.dtype_entrada)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X tem formato {X.shape}, mas o modelo espera "
+                f"{self.n_features_in_} features."
+            )
+        # A travessia mandaria NaN sempre para a esquerda, divergindo do sklearn
+        if not np.isfinite(X).all():
+            raise ValueError("X contém valores não finitos (NaN ou infinito).")
+        return X
+
+    def apply(self, X):
+        """Índice (na tabela de nós) da folha de cada árvore: linhas × árvores, como no sklearn"""
+        X = self._valida(X)
+        folhas = np.empty((X.shape[0], self.n_arvores), dtype=np.intp)
+        for inicio in range(0, X.shape[0], TAMANHO_BLOCO):
+            fim = inicio + TAMANHO_BLOCO
+            folhas[inicio:fim] = self._folhas_bloco(X[inicio:fim]).T
+        return folhas
+
+    def predict_proba(self, X):
+        """Probabilidade de cada classe, no mesmo formato do sklearn"""
+        X = self._valida(X)
+
+        if X.shape[0] == 1:
+            return self._percorre_linha(X[0])[np.newaxis, :]
+
+        saida = np.empty((X.shape[0], self.valor.shape[1]), dtype=np.float64)
+        for inicio in range(0, X.shape[0], TAMANHO_BLOCO):
+            fim = inicio + TAMANHO_BLOCO
+            saida[inicio:fim] = self._percorre_bloco(X[inicio:fim])
+        return saida
+
+    def predict(self, X):
+        """Classe mais provável de cada linha"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def compila_floresta(modelo):
+    """Converte um RandomForestClassifier treinado em FlorestaCompilada"""
+    if modelo.n_outputs_ != 1:
+        raise ValueError("Apenas florestas com uma única saída são suportadas.")
+
+    arvores = [estimador.tree_ for estimador in modelo.estimators_]
+    tamanhos = np.array([arvore.node_count for arvore in arvores])
+    deslocamentos = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    n_nos = int(tamanhos.sum())
+    n_classes = len(modelo.classes_)
+
+    feature = np.empty(n_nos, dtype=np.intp)
+    limiar = np.empty(n_nos, dtype=np.float64)
+    filhos = np.empty((n_nos, 2), dtype=np.intp)
+    valor = np.empty((n_nos, n_classes), dtype=np.float64)
+
+    for arvore, inicio in zip(arvores, deslocamentos):
+        fim = inicio + arvore.node_count
+        indices = np.arange(inicio, fim)
+        eh_folha = arvore.children_left == -1
+
+        # Folhas apontam para si mesmas e comparam contra a feature 0
+        feature[inicio:fim] = np.where(eh_folha, 0, arvore.feature)
+        limiar[inicio:fim] = np.where(eh_folha, 0.0, arvore.threshold)
+        filhos[inicio:fim, 0] = np.where(eh_folha, indices, arvore.children_left + inicio)
+        filhos[inicio:fim, 1] = np.where(eh_folha, indices, arvore.children_right + inicio)
+
+        # Normaliza os valores das folhas como no predict_proba do sklearn
+        valores = arvore.value[:, 0, :n_classes]
+        soma = valores.sum(axis=1, keepdims=True)
+        soma[soma == 0] = 1.0
+        valor[inicio:fim] = valores / soma
+
+    return FlorestaCompilada(
+        feature=feature,
+        limiar=limiar,
+        filhos=filhos.ravel(),
+        valor=valor,
+        raizes=deslocamentos.astype(np.intp),
+        profundidade=max(arvore.max_depth for arvore in arvores),
+        classes=np.asarray(modelo.classes_),
+        n_features=modelo.n_features_in_,
+        params=modelo.get_params()
+    )
+
+
+def incorpora_scaler(floresta, scaler):
+    """Reescreve os limiares da floresta no espaço das features brutas
+
+    Como x_escalado = (x - média) / escala com escala > 0, o teste
+    x_escalado <= limiar equivale a x <= limiar * escala + média. A floresta
+    resultante pontua transações brutas sem nenhum pré-processamento.
+    """
+    if scaler.n_features_in_ != floresta.n_features_in_:
+        raise ValueError(
+            f"O scaler tem {scaler.n_features_in_} features, mas a floresta "
+            f"espera {floresta.n_features_in_}."
+        )
+
+    media = scaler.mean_ if scaler.mean_ is not None else np.zeros(floresta.n_features_in_)
+    escala = scaler.scale_ if scaler.scale_ is not None else np.ones(floresta.n_features_in_)
+    limiar = floresta.limiar * escala[floresta.feature] + media[floresta.feature]
+
+    return FlorestaCompilada(
+        feature=floresta.feature,
+        limiar=limiar,
+        filhos=floresta.filhos,
+        valor=floresta.valor,
+        raizes=floresta.raizes,
+        profundidade=floresta.profundidade,
+        classes=floresta.classes_,
+        n_features=floresta.n_features_in_,
+        params=floresta.params,
+        # Limiares no espaço bruto não são valores float32 do treino
+        dtype_entrada=np.float64
+    )
+
+
+# Arrays que compõem a floresta compilada em disco
+ARRAYS_FLORESTA = ("feature", "limiar", "filhos", "valor", "raizes", "classes")
+
+
+def _metadados(floresta):
+    return {
+        "profundidade": floresta.profundidade,
+        "n_features": floresta.n_features_in_,
+        "dtype_entrada": floresta.dtype_entrada.name,
+        "params": floresta.params
+    }
+
+
+def _arrays(floresta):
+    return {
+        "feature": floresta.feature,
+        "limiar": floresta.limiar,
+        "filhos": floresta.filhos,
+        "valor": floresta.valor,
+        "raizes": floresta.raizes,
+        "classes": floresta.classes_
+    }
+
+
+def _monta_floresta(arrays, metadados):
+    return FlorestaCompilada(
+        feature=arrays["feature"],
+        limiar=arrays["limiar"],
+        filhos=arrays["filhos"],
+        valor=arrays["valor"],
+        raizes=arrays["raizes"],
+        profundidade=metadados["profundidade"],
+        classes=arrays["classes"],
+        n_features=metadados["n_features"],
+        params=metadados["params"],
+        dtype_entrada=metadados["dtype_entrada"]
+    )
+
+
+def salva_floresta(floresta, caminho):
+    """Salva a floresta compilada
+
+    Caminhos terminados em .npz geram um único arquivo compactável. Qualquer
+    outro caminho vira um link simbólico para um diretório versionado
+    (caminho.v<ns>) com um .npy por array e metadados.json, formato que pode
+    ser aberto com mmap.
+    """
+    caminho = str(caminho)
+    metadados = json.dumps(_metadados(floresta), default=str)
+
+    if caminho.endswith(".npz"):
+        np.savez(caminho, metadados=np.array(metadados), **_arrays(floresta))
+        return
+
+    # Cada versão vai para um diretório próprio e caminho é um link simbólico
+    # trocado com os.replace (atômico): o caminho nunca fica ausente e os
+    # processos que mapearam a versão anterior continuam lendo os arquivos antigos
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    versao = f"{nome}.v{time.time_ns()}"
+    temporario = os.path.join(pasta, f"{versao}.tmp")
+    os.makedirs(temporario)
+    for nome_array, array in _arrays(floresta).items():
+        np.save(os.path.join(temporario, f"{nome_array}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(temporario, "metadados.json"), "w") as f:
+        f.write(metadados)
+    os.rename(temporario, os.path.join(pasta, versao))
+
+    anterior = os.readlink(caminho) if os.path.islink(caminho) else None
+    if os.path.isdir(caminho) and anterior is None:
+        # Diretório salvo antes dos links: vira a versão anterior
+        anterior = f"{nome}.v0"
+        os.rename(caminho, os.path.join(pasta, anterior))
+    link = os.path.join(pasta, f"{versao}.link")
+    os.symlink(versao, link)
+    os.replace(link, caminho)
+
+    # Mantém a versão anterior (pode estar sendo carregada agora) e remove as demais
+    for entrada in os.listdir(pasta):
+        if entrada.startswith(f"{nome}.v") and entrada not in (versao, anterior):
+            shutil.rmtree(os.path.join(pasta, entrada), ignore_errors=True)
+
+
+def carrega_floresta(caminho, mmap=True):
+    """Carrega uma floresta salva com salva_floresta
+
+    No formato de diretório os arrays são mapeados em memória (mmap): o
+    carregamento é quase instantâneo e as páginas só são lidas do disco
+    quando a travessia as acessa.
+    """
+    caminho = str(caminho)
+
+    if caminho.endswith(".npz"):
+        with np.load(caminho) as arquivo:
+            metadados = json.loads(str(arquivo["metadados"]))
+            return _monta_floresta({nome: arquivo[nome] for nome in ARRAYS_FLORESTA}, metadados)
+
+    # Resolve o link uma vez: todos os arrays vêm da mesma versão
+    caminho = os.path.realpath(caminho)
+    with open(os.path.join(caminho, "metadados.json")) as f:
+        metadados = json.load(f)
+    modo = "r" if mmap else None
+    arrays = {
+        # asarray descarta a subclasse np.memmap, mantendo o buffer mapeado
+        nome: np.asarray(np.load(os.path.join(caminho, f"{nome}.npy"), mmap_mode=modo))
+        for nome in ARRAYS_FLORESTA
+    }
+    return _monta_floresta(arrays, metadados)
+
+
+def prepara_modelo(modelo, motor=FOREST_ENGINE):
+    """Compila a floresta quando o motor 'compiled' está ativo
+
+    Com motor 'sklearn' (ou para estimadores que não são florestas) o modelo
+    é devolvido sem alterações.
+    """
+    if motor == "sklearn" or not hasattr(modelo, "estimators_"):
+        return modelo
+    return compila_floresta(modelo)
+
+
+def carrega_modelo_inferencia(caminho=MODEL_PATH, motor=FOREST_ENGINE):
+    """Carrega o modelo salvo em caminho pronto para inferência
+
+    Florestas compiladas exportadas (.npz ou diretório mapeável) são
+    carregadas diretamente, sem depender do sklearn.
+    """
+    if str(caminho).endswith(".npz") or os.path.isdir(caminho):
+        return carrega_floresta(caminho)
+    # joblib (e o sklearn, ao desserializar) só são importados para modelos em pickle
+    import joblib
+    return prepara_modelo(joblib.load(caminho), motor)
@@ -0,0 +1,43 @@
+import numpy as np
+import joblib
+from src.config import MODEL_PATH, SCALER_PATH, INFERENCE_MODEL_PATH, PROCESSED_DIR, EXPORT_TOLERANCE
+from src.data.store import carrega_conjunto
+from src.inference.compiled_forest import compila_floresta, incorpora_scaler, salva_floresta
+
+
+def exporta_modelo(caminho_modelo=MODEL_PATH, caminho_scaler=SCALER_PATH,
+                   destino=INFERENCE_MODEL_PATH, tolerancia=EXPORT_TOLERANCE):
+    """Exporta a floresta com o scaler incorporado nos limiares
+
+    O artefato gerado pontua transações brutas diretamente. Antes de salvar,
+    confere a paridade com scaler + modelo no conjunto de teste: se alguma
+    probabilidade divergir mais que tolerancia, lança ValueError e nada é
+    salvo.
+    """
+    print("Carregando modelo e scaler...")
+    modelo = joblib.load(caminho_modelo)
+    scaler = joblib.load(caminho_scaler)
+
+    print("Incorporando o scaler na floresta...")
+    floresta = incorpora_scaler(compila_floresta(modelo), scaler)
+
+    print("Verificando paridade no conjunto de teste...")
+    X_teste = carrega_conjunto(PROCESSED_DIR, ["X_test"])["X_test"]
+    X_bruto = scaler.inverse_transform(np.asarray(X_teste, dtype=np.float64))
+    esperado = modelo.predict_proba(scaler.transform(X_bruto))[:, 1]
+    obtido = floresta.predict_proba(X_bruto)[:, 1]
+    divergencia = np.abs(esperado - obtido)
+    print(f"Diferença máxima de probabilidade: {divergencia.max():.2e}")
+    print(f"Transações com diferença: {np.count_nonzero(divergencia > tolerancia)}/{len(X_bruto)}")
+    if divergencia.max() > tolerancia:
+        raise ValueError(
+            f"Paridade falhou: diferença máxima {divergencia.max():.2e} acima da tolerância {tolerancia:.0e}"
+        )
+
+    salva_floresta(floresta, destino)
+    print(f"Modelo de inferência salvo em: {destino}")
+    return divergencia
+
+
+if __name__ == "__main__":
+    exporta_modelo()
@@ -0,0 +1,154 @@
+import logging
+import os
+import threading
+import time
+
+from src.config import (
+    SERVING_MODEL_PATH, FOREST_ENGINE, MODEL_SOURCE,
+    REGISTRY_MODEL_NAME, REGISTRY_TIMEOUT
+)
+from src.inference.compiled_forest import carrega_modelo_inferencia, prepara_modelo
+from src.inference.telemetry import registra_carga
+
+
+def carrega_do_registro(uri, timeout=REGISTRY_TIMEOUT):
+    """Carrega um modelo do MLflow Model Registry com tempo limite
+
+    O mlflow só é importado aqui, fora do caminho de importação das APIs. A
+    consulta roda em uma thread daemon: se o servidor de tracking não
+    responder dentro do prazo, a thread é abandonada e TimeoutError é lançado.
+    """
+    # Limita também as tentativas HTTP do próprio cliente do MLflow
+    os.environ.setdefault("MLFLOW_HTTP_REQUEST_TIMEOUT", str(int(max(timeout, 1))))
+    os.environ.setdefault("MLFLOW_HTTP_REQUEST_MAX_RETRIES", "0")
+    import mlflow.sklearn
+
+    resultado = {}
+
+    def carrega():
+        try:
+            resultado["modelo"] = mlflow.sklearn.load_model(uri)
+        except Exception as e:
+            resultado["erro"] = e
+
+    thread = threading.Thread(target=carrega, name="carrega-registro", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"Model Registry não respondeu em {timeout}s ({uri})")
+    if "erro" in resultado:
+        raise resultado["erro"]
+    return resultado["modelo"]
+
+
+def carrega_modelo(fonte=MODEL_SOURCE, caminho=SERVING_MODEL_PATH,
+                   timeout=REGISTRY_TIMEOUT, motor=FOREST_ENGINE):
+    """Carrega o modelo de produção seguindo a ordem de fontes configurada
+
+    Com fonte "registry" tenta os estágios Production e latest do Model
+    Registry e depois o arquivo local; com fonte "local" tenta o arquivo
+    primeiro e só consulta o registro se ele não existir.
+    """
+    uris = [
+        f"models:/{REGISTRY_MODEL_NAME}/Production",
+        f"models:/{REGISTRY_MODEL_NAME}/latest"
+    ]
+
+    if fonte == "local" and os.path.exists(caminho):
+        return carrega_modelo_inferencia(caminho, motor)
+
+    for uri in uris:
+        try:
+            return prepara_modelo(carrega_do_registro(uri, timeout), motor)
+        except Exception as e:
+            logging.warning(f"Não foi possível carregar {uri}: {e}")
+
+    # Carrega do arquivo local
+    return carrega_modelo_inferencia(caminho, motor)
+
+
+def versao_arquivo(caminho):
+    """Versão do artefato local: mtime do arquivo (ou dos metadados do diretório)"""
+    if os.path.isdir(caminho):
+        caminho = os.path.join(caminho, "metadados.json")
+    return f"arquivo:{os.stat(caminho).st_mtime_ns}"
+
+
+def versao_local(caminho=SERVING_MODEL_PATH):
+    """Versão do artefato local, ou None se ele não existir"""
+    return versao_arquivo(caminho) if os.path.exists(caminho) else None
+
+
+# Marca o modelo ainda não carregado (None é um resultado válido de carrega)
+_NAO_CARREGADO = object()
+
+
+class ModeloServido:
+    """Referência ao modelo em produção, carregada sob demanda
+
+    O carregamento acontece na primeira chamada a obtem() (ou em
+    pre_carrega(), no startup do servidor), nunca na importação do módulo.
+    troca() substitui o par (modelo, versão) de uma só vez, sob a trava:
+    cada requisição chama obtem() (ou obtem_com_versao()) uma única vez e
+    termina no modelo que recebeu.
+
+    versiona (opcional) informa a versão do que carrega vai carregar; ela é
+    lida antes da carga inicial e publicada na métrica model_info, mesmo sem
+    recarga a quente.
+    """
+
+    def __init__(self, carrega=carrega_modelo, versiona=None):
+        self._carrega = carrega
+        self._versiona = versiona
+        self._atual = (_NAO_CARREGADO, None)
+        self._trava = threading.Lock()
+
+    @property
+    def carregado(self):
+        return self._atual[0] is not _NAO_CARREGADO
+
+    @property
+    def versao(self):
+        return self._atual[1]
+
+    @versao.setter
+    def versao(self, versao):
+        with self._trava:
+            self._atual = (self._atual[0], versao)
+
+    def obtem_com_versao(self):
+        """Devolve o par (modelo, versão), carregando o modelo na primeira chamada
+
+        Os dois vêm da mesma troca: use a versão devolvida (e não o atributo
+        versao, que pode mudar entre duas leituras) em chaves de cache.
+        """
+        atual = self._atual
+        if atual[0] is _NAO_CARREGADO:
+            with self._trava:
+                if self._atual[0] is _NAO_CARREGADO:
+                    versao = self._atual[1]
+                    if versao is None and self._versiona is not None:
+                        versao = self._versiona()
+                    inicio = time.perf_counter()
+                    modelo = self._carrega()
+                    if modelo is None:
+                        # Carga falhou: a versão fica em aberto para a recarga tentar de novo
+                        versao = None
+                    self._atual = (modelo, versao)
+                    registra_carga(time.perf_counter() - inicio,
+                                   None if modelo is None else versao or "desconhecida")
+                atual = self._atual
+        return atual
+
+    def obtem(self):
+        """Devolve o modelo, carregando-o na primeira chamada"""
+        return self.obtem_com_versao()[0]
+
+    def pre_carrega(self):
+        """Carrega o modelo antecipadamente (ex.: no startup do servidor)"""
+        self.obtem()
+
+    def troca(self, modelo, versao=None):
+        """Passa a servir outro modelo; requisições em andamento não são afetadas"""
+        with self._trava:
+            self._atual = (modelo, versao)
@@ -0,0 +1,143 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from src.config import (
+    SERVING_MODEL_PATH, FOREST_ENGINE, REGISTRY_MODEL_NAME,
+    REGISTRY_TIMEOUT, RELOAD_INTERVAL, RELOAD_SOURCE
+)
+from src.inference.compiled_forest import carrega_modelo_inferencia, prepara_modelo
+from src.inference.loader import carrega_do_registro, versao_arquivo
+from src.inference.telemetry import modelo_versao, registra_carga
+
+# Métricas Prometheus da recarga
+recarga_duracao = Histogram(
+    'model_reload_duration_seconds', 'Tempo para carregar, aquecer e trocar o modelo',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+recargas_total = Counter('model_reloads_total', 'Recargas de modelo', ['resultado'])
+
+# Linhas do lote canário pontuado antes de cada troca
+TAMANHO_CANARIO = 64
+
+
+def versao_registro(nome=REGISTRY_MODEL_NAME, estagio="Production"):
+    """Versão do modelo no estágio informado do MLflow Model Registry"""
+    from mlflow.tracking import MlflowClient
+
+    versoes = MlflowClient().get_latest_versions(nome, stages=[estagio])
+    if not versoes:
+        return None
+    return f"registro:{versoes[0].version}"
+
+
+def valida_canario(modelo):
+    """Pontua um lote canário e confere o formato e a faixa das probabilidades"""
+    rng = np.random.default_rng(0)
+    X = np.vstack([
+        np.zeros((1, modelo.n_features_in_)),
+        rng.normal(size=(TAMANHO_CANARIO - 1, modelo.n_features_in_))
+    ])
+    probs = modelo.predict_proba(X)
+    if probs.shape != (TAMANHO_CANARIO, len(modelo.classes_)):
+        raise ValueError(f"Canário devolveu formato inesperado: {probs.shape}")
+    if not np.all(np.isfinite(probs)) or probs.min() < 0 or probs.max() > 1:
+        raise ValueError("Canário devolveu probabilidades fora de [0, 1]")
+
+
+class RecarregadorModelo:
+    """Recarrega o modelo em produção sem reiniciar o processo
+
+    Uma thread em segundo plano observa o mtime de SERVING_MODEL_PATH e/ou
+    o estágio Production do Model Registry. Quando a versão muda, o novo
+    modelo é carregado e aquecido nessa mesma thread, validado com um lote
+    canário e só então trocado na ModeloServido.
+    """
+
+    def __init__(self, modelo_servido, caminho=SERVING_MODEL_PATH, fonte=RELOAD_SOURCE,
+                 intervalo=RELOAD_INTERVAL, motor=FOREST_ENGINE, ao_trocar=None):
+        self.modelo_servido = modelo_servido
+        self.caminho = caminho
+        self.fonte = fonte
+        self.intervalo = intervalo
+        self.motor = motor
+        self.ao_trocar = list(ao_trocar or [])
+        self._parar = threading.Event()
+        self._thread = None
+
+    def versao_disponivel(self):
+        """Versão mais recente publicada na fonte observada"""
+        if self.fonte in ("registry", "both"):
+            try:
+                versao = versao_registro()
+                if versao is not None:
+                    return versao
+            except Exception as e:
+                logging.warning(f"Não foi possível consultar o Model Registry: {e}")
+            if self.fonte == "registry":
+                return None
+        if os.path.exists(self.caminho):
+            return versao_arquivo(self.caminho)
+        return None
+
+    def _carrega(self, versao):
+        if versao.startswith("registro:"):
+            numero = versao.split(":", 1)[1]
+            modelo = carrega_do_registro(f"models:/{REGISTRY_MODEL_NAME}/{numero}", REGISTRY_TIMEOUT)
+            return prepara_modelo(modelo, self.motor)
+        return carrega_modelo_inferencia(self.caminho, self.motor)
+
+    def recarrega(self, versao):
+        """Carrega, aquece e troca o modelo; mantém o atual em caso de falha"""
+        inicio = time.perf_counter()
+        try:
+            novo = self._carrega(versao)
+            valida_canario(novo)
+        except Exception as e:
+            recargas_total.labels('falha').inc()
+            logging.error(f"Recarga do modelo {versao} falhou, mantendo o atual: {e}")
+            return False
+
+        self.modelo_servido.troca(novo, versao)
+        for callback in self.ao_trocar:
+            callback(versao)
+
+        duracao = time.perf_counter() - inicio
+        recarga_duracao.observe(duracao)
+        registra_carga(duracao, versao)
+        recargas_total.labels('sucesso').inc()
+        logging.info(f"Modelo {versao} em produção (recarga em {duracao:.2f}s).")
+        return True
+
+    def verifica(self):
+        """Recarrega se a versão publicada for diferente da servida"""
+        versao = self.versao_disponivel()
+        if versao is not None and versao != self.modelo_servido.versao:
+            return self.recarrega(versao)
+        return False
+
+    def _executa(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verifica()
+            except Exception:
+                logging.exception("Erro inesperado ao verificar nova versão do modelo:")
+
+    def inicia(self):
+        """Registra a versão atual e começa a observar em segundo plano"""
+        # Sem modelo carregado (artefato ausente ou quebrado) a versão fica
+        # em aberto, e a primeira verificação tenta carregá-lo de novo
+        if self.modelo_servido.versao is None and self.modelo_servido.obtem() is not None:
+            versao = self.versao_disponivel()
+            self.modelo_servido.versao = versao
+            if versao is not None:
+                modelo_versao.info({'versao': versao})
+        self._thread = threading.Thread(target=self._executa, name="recarga-modelo", daemon=True)
+        self._thread.start()
+
+    def para(self):
+        self._parar.set()
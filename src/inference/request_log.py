@@ -0,0 +1,122 @@
+"""Logging das APIs fora do caminho da requisição
+
+O handler do logger raiz só enfileira o registro (QueueHandler); uma thread
+do QueueListener formata em JSON e escreve no destino. A fila é limitada:
+cheia, o registro é descartado e contado em log_records_dropped_total em vez
+de bloquear a requisição.
+
+Predições bem-sucedidas são amostradas (LOG_SAMPLE_RATE) antes mesmo de o
+registro ser criado; avisos e erros continuam sendo sempre registrados.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from prometheus_client import Counter
+
+from src.config import LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLE_RATE
+
+FORMATO_TEXTO = '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
+
+registros_descartados = Counter(
+    'log_records_dropped_total', 'Registros de log descartados com a fila cheia', ['nivel']
+)
+
+
+def _serializavel(valor):
+    """Converte arrays e escalares NumPy (ex.: features) para JSON"""
+    if hasattr(valor, "tolist"):
+        return valor.tolist()
+    return str(valor)
+
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro, com os campos passados em extra={'campos': {...}}"""
+
+    def format(self, record):
+        dados = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "nivel": record.levelname,
+            "modulo": record.module,
+            "mensagem": record.getMessage(),
+        }
+        dados.update(getattr(record, "campos", None) or {})
+        if record.exc_text:
+            dados["excecao"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=_serializavel)
+
+
+class FilaLimitadaHandler(QueueHandler):
+    """QueueHandler que descarta e conta em vez de bloquear ou falhar com a fila cheia"""
+
+    def prepare(self, record):
+        # Só o necessário na thread da requisição: a mensagem com os argumentos
+        # e o traceback (os frames não sobrevivem à requisição). A formatação
+        # em JSON fica para a thread de escrita.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            registros_descartados.labels(record.levelname).inc()
+
+
+_listener = None
+
+
+def configura_logging(nivel=LOG_LEVEL, formato=LOG_FORMAT, tamanho_fila=LOG_QUEUE_SIZE, destino=None):
+    """Substitui os handlers do logger raiz pela fila e inicia a thread de escrita
+
+    Chamadas repetidas (ex.: app reimportado) reconfiguram a fila.
+    Devolve o QueueListener.
+    """
+    global _listener
+    para_logging()
+
+    saida = logging.StreamHandler(destino or sys.stderr)
+    saida.setFormatter(FormatadorJson() if formato == "json" else logging.Formatter(FORMATO_TEXTO))
+    fila = queue.Queue(maxsize=tamanho_fila)
+    _listener = QueueListener(fila, saida, respect_handler_level=True)
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        if isinstance(handler, FilaLimitadaHandler) or type(handler) is logging.StreamHandler:
+            raiz.removeHandler(handler)
+    raiz.addHandler(FilaLimitadaHandler(fila))
+    raiz.setLevel(nivel)
+    _listener.start()
+    return _listener
+
+
+def para_logging():
+    """Esvazia a fila e encerra a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(para_logging)
+
+
+def registra_sucesso(mensagem, taxa=None, **campos):
+    """Registra em INFO uma fração taxa (padrão LOG_SAMPLE_RATE) das chamadas
+
+    O sorteio vem antes de qualquer formatação: chamadas não amostradas custam
+    um número aleatório.
+    """
+    taxa = LOG_SAMPLE_RATE if taxa is None else taxa
+    if taxa < 1 and random.random() >= taxa:
+        return
+    logging.info(mensagem, extra={"campos": campos})
@@ -0,0 +1,154 @@
+"""Telemetria das APIs de predição
+
+Histogramas Prometheus da latência de ponta a ponta e de cada etapa da
+requisição (parse do corpo, validação, predict_proba e serialização), do
+tamanho dos lotes e gauges do modelo carregado. Flask e FastAPI usam as
+mesmas métricas, separadas pelo rótulo 'app'.
+
+O perfilador por amostragem é opcional (PROFILER_ENABLED): armado por N
+requisições, amostra as pilhas de todas as threads a cada intervalo e grava
+um arquivo no formato "collapsed" (uma pilha por linha com a contagem), que
+ferramentas de flame graph como flamegraph.pl e speedscope leem diretamente.
+Desarmado, custa uma verificação de atributo por requisição.
+"""
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+
+from prometheus_client import Gauge, Histogram, Info
+
+from src.config import PROFILER_INTERVAL_MS, PROFILE_DIR
+
+ETAPAS = ("parse", "validate", "predict", "serialize")
+
+latencia_requisicao = Histogram(
+    'inference_request_duration_seconds', 'Latência de ponta a ponta das requisições de predição',
+    ['app', 'endpoint'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+latencia_etapa = Histogram(
+    'inference_stage_duration_seconds', 'Duração de cada etapa da requisição de predição',
+    ['app', 'endpoint', 'etapa'],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+tamanho_lote = Histogram(
+    'inference_batch_size', 'Transações por requisição de predição em lote',
+    ['app', 'endpoint'],
+    buckets=(1, 4, 16, 64, 256, 1024, 4096, 10000)
+)
+modelo_carga = Gauge('model_load_duration_seconds', 'Tempo da última carga do modelo em produção')
+modelo_carregado_em = Gauge('model_loaded_timestamp_seconds', 'Instante (epoch) da última troca de modelo')
+modelo_versao = Info('model', 'Versão do modelo em produção')
+
+
+class Cronometro:
+    """Mede as etapas de uma requisição e observa os histogramas
+
+    marca(etapa) registra o tempo desde a marca anterior; finaliza() registra
+    a latência de ponta a ponta e avisa o perfilador, se armado.
+    """
+
+    __slots__ = ("app", "endpoint", "inicio", "_ultimo")
+
+    def __init__(self, app, endpoint):
+        self.app = app
+        self.endpoint = endpoint
+        self.inicio = self._ultimo = time.perf_counter()
+
+    def marca(self, etapa):
+        agora = time.perf_counter()
+        latencia_etapa.labels(self.app, self.endpoint, etapa).observe(agora - self._ultimo)
+        self._ultimo = agora
+
+    def lote(self, tamanho):
+        tamanho_lote.labels(self.app, self.endpoint).observe(tamanho)
+
+    def finaliza(self):
+        latencia_requisicao.labels(self.app, self.endpoint).observe(time.perf_counter() - self.inicio)
+        if perfilador.ativo:
+            perfilador.requisicao_concluida()
+
+
+def registra_carga(duracao, versao=None):
+    """Atualiza os gauges (e a versão, se conhecida) do modelo após uma carga ou troca"""
+    modelo_carga.set(duracao)
+    modelo_carregado_em.set(time.time())
+    if versao is not None:
+        modelo_versao.info({'versao': versao})
+
+
+def _pilha(frame):
+    """Pilha do frame no formato collapsed: raiz;...;folha"""
+    funcoes = []
+    while frame is not None:
+        codigo = frame.f_code
+        funcoes.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(funcoes))
+
+
+class PerfiladorAmostragem:
+    """Amostra as pilhas de todas as threads enquanto N requisições terminam"""
+
+    def __init__(self, intervalo_ms=PROFILER_INTERVAL_MS, diretorio=PROFILE_DIR):
+        self.intervalo = intervalo_ms / 1000
+        self.diretorio = diretorio
+        self.ativo = False
+        self.ultimo_arquivo = None
+        self._restantes = 0
+        self._amostras = collections.Counter()
+        self._trava = threading.Lock()
+        self._concluido = threading.Event()
+        self._thread = None
+
+    def arma(self, requisicoes):
+        """Começa a amostrar; devolve o caminho do arquivo que será gravado"""
+        with self._trava:
+            if self.ativo:
+                raise RuntimeError("O perfilador já está armado")
+            self._restantes = requisicoes
+            self._amostras = collections.Counter()
+            self._concluido.clear()
+            self.ultimo_arquivo = os.path.join(self.diretorio, f"perfil_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+            self.ativo = True
+        self._thread = threading.Thread(target=self._amostra, name="perfilador", daemon=True)
+        self._thread.start()
+        logging.info(f"Perfilador armado por {requisicoes} requisições ({self.ultimo_arquivo})")
+        return self.ultimo_arquivo
+
+    def requisicao_concluida(self):
+        with self._trava:
+            self._restantes -= 1
+            if self._restantes <= 0:
+                self.ativo = False
+
+    def aguarda(self, timeout=None):
+        """Espera o arquivo do perfil ser gravado"""
+        return self._concluido.wait(timeout)
+
+    def _amostra(self):
+        proprio = threading.get_ident()
+        nomes = {}
+        while self.ativo:
+            for ident, frame in sys._current_frames().items():
+                if ident == proprio:
+                    continue
+                if ident not in nomes:
+                    nomes = {t.ident: t.name for t in threading.enumerate()}
+                self._amostras[f"{nomes.get(ident, ident)};{_pilha(frame)}"] += 1
+            time.sleep(self.intervalo)
+        self._salva()
+
+    def _salva(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        with open(self.ultimo_arquivo, "w") as f:
+            for pilha, contagem in self._amostras.most_common():
+                f.write(f"{pilha} {contagem}\n")
+        logging.info(f"Perfil gravado em {self.ultimo_arquivo} ({sum(self._amostras.values())} amostras)")
+        self._concluido.set()
+
+
+perfilador = PerfiladorAmostragem()
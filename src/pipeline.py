@@ -0,0 +1,277 @@
+"""Executor do pipeline download → processamento → treino → compactação com cache por conteúdo
+
+A chave de cada etapa é o hash das suas entradas: digest dos arquivos lidos,
+valores relevantes de src/config.py e digest do código-fonte da etapa. As
+saídas ficam em PIPELINE_CACHE_DIR/<etapa>/<chave>/ (hardlinks quando
+possível); uma etapa cuja chave já existe não é executada e suas saídas são
+restauradas do cache.
+
+Uso:
+    python -m src.pipeline
+    python -m src.pipeline --from-stage train    # refaz o treino mesmo com cache
+    python -m src.pipeline --force               # refaz todas as etapas
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from src.config import (
+    RAW_DIR, PROCESSED_DIR, MODEL_PATH, SCALER_PATH, PIPELINE_CACHE_DIR,
+    DATASET_URL, RANDOM_STATE, TEST_SIZE, CV_SPLITS, MODEL_CONFIGS,
+    SEARCH_MODE, HALVING_FACTOR, HALVING_RESOURCE, COST_FALSE_POSITIVE, COST_FALSE_NEGATIVE,
+    FINAL_MODEL, NEGATIVE_SAMPLING_RATE, COMPACT_MODEL_PATH, COMPACTION_TOLERANCE,
+    COMPACTION_LEAF_TOLERANCE, COMPACTION_VALIDATION_FRACTION
+)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ARRAYS_PROCESSADOS = [f"{PROCESSED_DIR}/{nome}.npy" for nome in ("X_train", "X_test", "y_train", "y_test")]
+
+
+class Etapa:
+    """Uma etapa do pipeline e tudo o que entra na sua chave de cache"""
+
+    def __init__(self, nome, executa, saidas, entradas=(), config=None, fontes=()):
+        self.nome = nome
+        self.executa = executa
+        self.saidas = list(saidas)
+        self.entradas = list(entradas)
+        self.config = dict(config or {})
+        self.fontes = list(fontes)
+
+
+def _baixa():
+    from src.data.download_data import baixa_dados
+    baixa_dados()
+
+
+def _processa():
+    from src.data.process_data import processa_dados
+    processa_dados()
+
+
+def _processa_streaming():
+    from src.data.process_data import processa_dados_streaming
+    processa_dados_streaming()
+
+
+def _treina():
+    from src.train import treina_modelo
+    treina_modelo()
+
+
+def _compacta():
+    from src.training.compaction import compacta_modelo
+    compacta_modelo()
+
+
+def etapas_padrao(streaming=False):
+    """Etapas do pipeline de fraude, na ordem de execução"""
+    csv = f"{RAW_DIR}/creditcard.csv"
+    processados = ARRAYS_PROCESSADOS + [f"{PROCESSED_DIR}/manifesto.json", SCALER_PATH]
+    return [
+        Etapa(
+            "download", _baixa, saidas=[csv],
+            config={"DATASET_URL": DATASET_URL},
+            fontes=["src/data/download_data.py"]
+        ),
+        Etapa(
+            "process", _processa_streaming if streaming else _processa, saidas=processados,
+            entradas=[csv],
+            config={"RANDOM_STATE": RANDOM_STATE, "TEST_SIZE": TEST_SIZE, "streaming": streaming},
+            fontes=["src/data/process_data.py", "src/data/columnar.py", "src/data/store.py"]
+        ),
+        Etapa(
+            "train", _treina, saidas=[MODEL_PATH],
+            entradas=ARRAYS_PROCESSADOS,
+            config={
+                "MODEL_CONFIGS": MODEL_CONFIGS, "RANDOM_STATE": RANDOM_STATE, "CV_SPLITS": CV_SPLITS,
+                "SEARCH_MODE": SEARCH_MODE, "HALVING_FACTOR": HALVING_FACTOR,
+                "HALVING_RESOURCE": HALVING_RESOURCE, "COST_FALSE_POSITIVE": COST_FALSE_POSITIVE,
+                "COST_FALSE_NEGATIVE": COST_FALSE_NEGATIVE, "FINAL_MODEL": FINAL_MODEL,
+                "NEGATIVE_SAMPLING_RATE": NEGATIVE_SAMPLING_RATE
+            },
+            fontes=["src/train.py", "src/training/search.py", "src/training/evaluation.py",
+                    "src/training/sampling.py", "src/data/store.py"]
+        ),
+        Etapa(
+            "compact", _compacta, saidas=[COMPACT_MODEL_PATH],
+            entradas=[MODEL_PATH] + ARRAYS_PROCESSADOS,
+            config={
+                "COMPACTION_TOLERANCE": COMPACTION_TOLERANCE,
+                "COMPACTION_LEAF_TOLERANCE": COMPACTION_LEAF_TOLERANCE,
+                "COMPACTION_VALIDATION_FRACTION": COMPACTION_VALIDATION_FRACTION, "RANDOM_STATE": RANDOM_STATE
+            },
+            fontes=["src/training/compaction.py", "src/inference/compiled_forest.py", "src/training/evaluation.py"]
+        ),
+    ]
+
+
+class CacheDigests:
+    """Digest de arquivos, recalculado só quando tamanho ou mtime mudam"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._digests = {}
+        if os.path.exists(caminho):
+            with open(caminho) as f:
+                self._digests = json.load(f)
+
+    def digest(self, arquivo):
+        estado = os.stat(arquivo)
+        assinatura = [estado.st_size, estado.st_mtime_ns]
+        chave = os.path.abspath(arquivo)
+        item = self._digests.get(chave)
+        if item is None or item["assinatura"] != assinatura:
+            h = hashlib.blake2b(digest_size=16)
+            with open(arquivo, "rb") as f:
+                while bloco := f.read(1 << 20):
+                    h.update(bloco)
+            item = {"assinatura": assinatura, "digest": h.hexdigest()}
+            self._digests[chave] = item
+        return item["digest"]
+
+    def salva(self):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        with open(self.caminho, "w") as f:
+            json.dump(self._digests, f)
+
+
+def chave_etapa(etapa, digests, raiz=RAIZ):
+    """Hash das entradas, da configuração e do código-fonte da etapa"""
+    descricao = {
+        "etapa": etapa.nome,
+        "config": {nome: repr(valor) for nome, valor in sorted(etapa.config.items())},
+        "fontes": {fonte: digests.digest(os.path.join(raiz, fonte)) for fonte in etapa.fontes},
+        "entradas": {entrada: digests.digest(entrada) for entrada in etapa.entradas},
+    }
+    return hashlib.blake2b(json.dumps(descricao, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def _vincula(origem, destino):
+    """Hardlink de origem em destino, ou cópia se o link não for possível
+
+    Saídas que são diretórios (ex.: florestas mapeáveis) são vinculadas
+    arquivo a arquivo.
+    """
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    if os.path.isdir(origem):
+        shutil.copytree(origem, destino, copy_function=_vincula)
+        return
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+
+
+def _desvincula_saidas(etapa):
+    # Saídas ligadas ao cache são removidas antes de executar: a etapa grava
+    # arquivos novos em vez de sobrescrever o conteúdo guardado no cache
+    # (diretórios são regravados por salva_floresta em uma versão nova)
+    for saida in etapa.saidas:
+        if os.path.isfile(saida) and os.stat(saida).st_nlink > 1:
+            os.unlink(saida)
+
+
+def _remove(caminho):
+    if os.path.isdir(caminho) and not os.path.islink(caminho):
+        shutil.rmtree(caminho)
+    else:
+        os.unlink(caminho)
+
+
+def guarda_saidas(etapa, diretorio, duracao):
+    """Copia (por hardlink) as saídas da etapa para o diretório da chave"""
+    temporario = f"{diretorio}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+    for i, saida in enumerate(etapa.saidas):
+        _vincula(saida, os.path.join(temporario, f"{i}_{os.path.basename(saida)}"))
+    with open(os.path.join(temporario, "registro.json"), "w") as f:
+        json.dump({"saidas": etapa.saidas, "duracao": duracao, "criado_em": time.time()}, f, indent=2)
+    os.rename(temporario, diretorio)
+
+
+def restaura_saidas(etapa, diretorio):
+    """Restaura as saídas do cache e devolve o tempo da execução original"""
+    with open(os.path.join(diretorio, "registro.json")) as f:
+        registro = json.load(f)
+    for i, saida in enumerate(etapa.saidas):
+        guardada = os.path.join(diretorio, f"{i}_{os.path.basename(saida)}")
+        if os.path.lexists(saida):
+            if not os.path.isdir(guardada) and os.path.samefile(saida, guardada):
+                continue
+            _remove(saida)
+        _vincula(guardada, saida)
+    return registro["duracao"]
+
+
+def executa_pipeline(etapas, diretorio_cache=PIPELINE_CACHE_DIR, forca=False, a_partir_de=None):
+    """Executa as etapas em ordem, reaproveitando as que já estão no cache
+
+    forca refaz todas as etapas; a_partir_de refaz a etapa indicada e as
+    seguintes. Devolve um relatório com situação, duração e tempo economizado
+    de cada etapa.
+    """
+    nomes = [etapa.nome for etapa in etapas]
+    if a_partir_de is not None and a_partir_de not in nomes:
+        raise ValueError(f"Etapa desconhecida: {a_partir_de}. Opções: {', '.join(nomes)}")
+
+    digests = CacheDigests(os.path.join(diretorio_cache, "digests.json"))
+    relatorio = []
+    refazendo = forca
+    for etapa in etapas:
+        refazendo = refazendo or etapa.nome == a_partir_de
+        chave = chave_etapa(etapa, digests)
+        diretorio = os.path.join(diretorio_cache, etapa.nome, chave)
+
+        if os.path.isdir(diretorio) and not refazendo:
+            economizado = restaura_saidas(etapa, diretorio)
+            print(f"[{etapa.nome}] reaproveitada do cache ({chave[:12]}), economizou {economizado:.1f}s")
+            relatorio.append({"etapa": etapa.nome, "situacao": "cache", "duracao": 0.0,
+                              "economizado": economizado})
+            continue
+
+        print(f"[{etapa.nome}] executando ({chave[:12]})...")
+        _desvincula_saidas(etapa)
+        inicio = time.perf_counter()
+        etapa.executa()
+        duracao = time.perf_counter() - inicio
+
+        faltando = [saida for saida in etapa.saidas if not os.path.exists(saida)]
+        if faltando:
+            digests.salva()
+            raise RuntimeError(f"Etapa '{etapa.nome}' não gerou: {', '.join(faltando)}")
+        shutil.rmtree(diretorio, ignore_errors=True)
+        guarda_saidas(etapa, diretorio, duracao)
+        relatorio.append({"etapa": etapa.nome, "situacao": "executada", "duracao": duracao,
+                          "economizado": 0.0})
+
+    digests.salva()
+    return relatorio
+
+
+def imprime_relatorio(relatorio):
+    print(f"\n{'etapa':<10} {'situação':<10} {'duração':>9} {'economizado':>12}")
+    for item in relatorio:
+        print(f"{item['etapa']:<10} {item['situacao']:<10} {item['duracao']:>8.1f}s {item['economizado']:>11.1f}s")
+    print(f"Tempo economizado pelo cache: {sum(item['economizado'] for item in relatorio):.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline download → processamento → treino")
+    parser.add_argument("--force", action="store_true", help="refaz todas as etapas")
+    parser.add_argument("--from-stage", choices=[etapa.nome for etapa in etapas_padrao()],
+                        help="refaz esta etapa e as seguintes")
+    parser.add_argument("--streaming", action="store_true", help="processa o CSV em blocos")
+    args = parser.parse_args()
+
+    relatorio = executa_pipeline(etapas_padrao(args.streaming), forca=args.force, a_partir_de=args.from_stage)
+    imprime_relatorio(relatorio)
+
+
+if __name__ == "__main__":
+    main()
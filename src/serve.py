@@ -1,47 +1,104 @@
-import joblib
 from flask import Flask, request, jsonify, Response
 import numpy as np
 import logging
 from prometheus_client import generate_latest, Counter
+from src.config import (
+    FRAUD_THRESHOLD, BATCH_MAX_SIZE,
+    SERVING_MODEL_PATH, FOREST_ENGINE, RELOAD_INTERVAL,
+    CACHE_ENABLED, CACHE_MAX_ITEMS, CACHE_TTL, CACHE_REDIS_URL,
+    PROFILER_ENABLED
+)
+from src.inference.batch import pontua_lote
+from src.inference.compiled_forest import carrega_modelo_inferencia
+from src.inference.loader import ModeloServido, versao_local
+from src.inference.reload import RecarregadorModelo
+from src.inference.cache import CachePredicoes, BackendRedis, chave_predicao
+from src.inference.codecs import decodifica, codifica, FormatoNaoSuportado
+from src.inference.telemetry import Cronometro, perfilador
+from src.inference.request_log import configura_logging, registra_sucesso
 
 app = Flask(__name__)
 
-# Configurar o logging
-logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s')
+# Configurar o logging (fila com thread de escrita; sucessos amostrados)
+configura_logging()
 
 # Métricas Prometheus
 requests_total = Counter('http_requests_total', 'Total de requisições HTTP', ['method', 'endpoint', 'status'])
 errors_total = Counter('http_errors_total', 'Total de erros HTTP', ['method', 'endpoint', 'status'])
 
 # Carregar o modelo
-try:
-    model = joblib.load('models/melhor_modelo.joblib')
-    logging.info("Modelo 'melhor_modelo.joblib' carregado com sucesso.")
-except FileNotFoundError:
-    logging.error("Erro: O arquivo do modelo 'models/melhor_modelo.joblib' não foi encontrado.")
-    model = None # Definir modelo como None para evitar NameError
-except Exception as e:
-    logging.error(f"Erro ao carregar o modelo: {e}")
-    model = None
+def carrega_modelo():
+    try:
+        model = carrega_modelo_inferencia(SERVING_MODEL_PATH, FOREST_ENGINE)
+        logging.info(f"Modelo '{SERVING_MODEL_PATH}' carregado com sucesso (motor: {FOREST_ENGINE}).")
+        return model
+    except FileNotFoundError:
+        logging.error(f"Erro: O arquivo do modelo '{SERVING_MODEL_PATH}' não foi encontrado.")
+    except Exception as e:
+        logging.error(f"Erro ao carregar o modelo: {e}")
+    return None # Modelo None: as rotas respondem 503 até uma recarga bem-sucedida
+
+modelo_servido = ModeloServido(carrega_modelo, versiona=lambda: versao_local(SERVING_MODEL_PATH))
+modelo_servido.pre_carrega()
+
+# Cache de predições para transações repetidas (retries e reenvios)
+cache = None
+if CACHE_ENABLED:
+    cache = CachePredicoes(
+        CACHE_MAX_ITEMS, CACHE_TTL,
+        backend=BackendRedis(CACHE_REDIS_URL) if CACHE_REDIS_URL else None
+    )
+
+# Recarga sem downtime quando o artefato for atualizado (invalida o cache)
+recarregador = RecarregadorModelo(modelo_servido, ao_trocar=[cache.limpa] if cache else None)
+if RELOAD_INTERVAL > 0:
+    recarregador.inicia()
+
+def le_payload():
+    """Decodifica o corpo conforme o Content-Type (JSON, binário ou MessagePack)
+
+    Devolve None para payloads ausentes ou malformados.
+    """
+    try:
+        data = decodifica(request.get_data(cache=False), request.content_type)
+    except FormatoNaoSuportado:
+        raise
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+def responde(dados):
+    """Resposta de sucesso no formato pedido em Accept (JSON por padrão)"""
+    corpo, tipo = codifica(dados, request.headers.get('Accept'))
+    return Response(corpo, mimetype=tipo)
+
+@app.errorhandler(FormatoNaoSuportado)
+def formato_nao_suportado(e):
+    logging.warning(f"Formato de requisição não suportado: {e}")
+    requests_total.labels('POST', request.path, '415').inc()
+    errors_total.labels('POST', request.path, '415').inc()
+    return jsonify({'error': str(e)}), 415
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    cronometro = Cronometro('flask', '/predict')
+    # Versão lida junto com o modelo: a chave do cache nunca mistura duas recargas
+    model, versao = modelo_servido.obtem_com_versao()
     if model is None:
         logging.error("Tentativa de predição, mas o modelo não foi carregado.")
         requests_total.labels('POST', '/predict', '503').inc()
         errors_total.labels('POST', '/predict', '503').inc()
+        cronometro.finaliza()
         return jsonify({'error': 'O modelo não está disponível. Por favor, verifique os logs do servidor.'}), 503
 
     try:
-        data = request.get_json()
+        data = le_payload()
+        cronometro.marca('parse')
         if data is None:
             logging.warning("Requisição recebida sem payload JSON.")
             requests_total.labels('POST', '/predict', '400').inc()
             errors_total.labels('POST', '/predict', '400').inc()
             return jsonify({'error': 'Payload JSON ausente ou malformado.'}), 400
-        
-        # Logar a requisição recebida
-        logging.info(f"Requisição recebida: {data}")
 
         if 'features' not in data:
             logging.warning("Campo 'features' ausente na requisição.")
@@ -49,26 +106,45 @@ def predict():
             errors_total.labels('POST', '/predict', '400').inc()
             return jsonify({'error': 'O campo \'features\' é obrigatório no payload JSON.'}), 400
 
-        features = np.array(data['features'])
+        features = np.asarray(data['features'])
         
         # Validação do formato das features
-        if features.ndim != 1 or features.shape[0] != 29:
-            logging.warning(f"Formato de features inválido: {features.shape}. Esperado: (29,).")
+        if features.ndim != 1 or features.shape[0] != model.n_features_in_:
+            logging.warning(f"Formato de features inválido: {features.shape}. Esperado: ({model.n_features_in_},).")
+            requests_total.labels('POST', '/predict', '400').inc()
+            errors_total.labels('POST', '/predict', '400').inc()
+            return jsonify({'error': f'Formato de features inválido. Esperado um array de {model.n_features_in_} features.'}), 400
+        if not np.isfinite(features).all():
+            logging.warning("Features com valores não finitos.")
             requests_total.labels('POST', '/predict', '400').inc()
             errors_total.labels('POST', '/predict', '400').inc()
-            return jsonify({'error': 'Formato de features inválido. Esperado um array de 29 features.'}), 400
+            return jsonify({'error': 'Features contêm valores não finitos.'}), 400
+        cronometro.marca('validate')
 
-        prediction_proba = model.predict_proba(features.reshape(1, -1))[0][1] # Probabilidade da classe positiva (fraude)
-        prediction_class = bool(model.predict(features.reshape(1, -1))[0])
+        chave = None
+        prediction_proba = None
+        if cache is not None:
+            chave = chave_predicao(features, versao)
+            prediction_proba = cache.obtem(chave)
+        if prediction_proba is None:
+            prediction_proba = model.predict_proba(features.reshape(1, -1))[0][1] # Probabilidade da classe positiva (fraude)
+            if cache is not None:
+                cache.guarda(chave, float(prediction_proba))
+        prediction_class = bool(prediction_proba > FRAUD_THRESHOLD) # Mesmo critério do predict, sem percorrer a floresta de novo
+        cronometro.marca('predict')
 
         response = {
             'prob_fraude': float(prediction_proba),
             'eh_fraude': prediction_class
         }
-        logging.info(f"Predição bem-sucedida: {response}")
+        registra_sucesso("Predição bem-sucedida", endpoint='/predict', features=features, **response)
         requests_total.labels('POST', '/predict', '200').inc()
-        return jsonify(response)
+        resposta = responde(response)
+        cronometro.marca('serialize')
+        return resposta
 
+    except FormatoNaoSuportado:
+        raise
     except ValueError as ve:
         logging.error(f"Erro de validação de dados na predição: {ve}")
         requests_total.labels('POST', '/predict', '400').inc()
@@ -84,10 +160,89 @@ def predict():
         requests_total.labels('POST', '/predict', '500').inc()
         errors_total.labels('POST', '/predict', '500').inc()
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+    finally:
+        # Erros (4xx/5xx) também entram na latência
+        cronometro.finaliza()
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    cronometro = Cronometro('flask', '/predict/batch')
+    model = modelo_servido.obtem()
+    if model is None:
+        logging.error("Tentativa de predição em lote, mas o modelo não foi carregado.")
+        requests_total.labels('POST', '/predict/batch', '503').inc()
+        errors_total.labels('POST', '/predict/batch', '503').inc()
+        cronometro.finaliza()
+        return jsonify({'error': 'O modelo não está disponível. Por favor, verifique os logs do servidor.'}), 503
+
+    try:
+        data = le_payload()
+        cronometro.marca('parse')
+        if data is None or 'features' not in data:
+            logging.warning("Requisição de lote sem o campo 'features'.")
+            requests_total.labels('POST', '/predict/batch', '400').inc()
+            errors_total.labels('POST', '/predict/batch', '400').inc()
+            return jsonify({'error': 'O campo \'features\' é obrigatório no payload JSON.'}), 400
+
+        # Valida contra o próprio modelo, como o /prediz do FastAPI
+        num_features = model.n_features_in_
+        linhas = data['features']
+        if isinstance(linhas, np.ndarray):
+            # Corpo binário: matriz N×F achatada, sem cópia
+            if linhas.size % num_features:
+                logging.warning(f"Corpo binário com {linhas.size} valores não forma linhas de {num_features} features.")
+                requests_total.labels('POST', '/predict/batch', '400').inc()
+                errors_total.labels('POST', '/predict/batch', '400').inc()
+                return jsonify({'error': f'O corpo binário deve conter N×{num_features} valores.'}), 400
+            linhas = linhas.reshape(-1, num_features)
+        elif not isinstance(linhas, list):
+            linhas = []
+        if len(linhas) == 0:
+            logging.warning("Lote vazio ou em formato inválido.")
+            requests_total.labels('POST', '/predict/batch', '400').inc()
+            errors_total.labels('POST', '/predict/batch', '400').inc()
+            return jsonify({'error': 'O campo \'features\' deve ser uma lista não vazia de transações.'}), 400
+
+        if len(linhas) > BATCH_MAX_SIZE:
+            logging.warning(f"Lote com {len(linhas)} transações excede o limite de {BATCH_MAX_SIZE}.")
+            requests_total.labels('POST', '/predict/batch', '413').inc()
+            errors_total.labels('POST', '/predict/batch', '413').inc()
+            return jsonify({'error': f'O lote excede o limite de {BATCH_MAX_SIZE} transações.'}), 413
+
+        cronometro.lote(len(linhas))
+        response = pontua_lote(model, linhas, num_features, FRAUD_THRESHOLD, cronometro)
+        registra_sucesso("Predição em lote concluída", endpoint='/predict/batch',
+                         transacoes=len(linhas), erros=len(response['erros']))
+        requests_total.labels('POST', '/predict/batch', '200').inc()
+        resposta = responde(response)
+        cronometro.marca('serialize')
+        return resposta
+
+    except FormatoNaoSuportado:
+        raise
+    except Exception as e:
+        logging.exception("Erro inesperado durante a predição em lote:")
+        requests_total.labels('POST', '/predict/batch', '500').inc()
+        errors_total.labels('POST', '/predict/batch', '500').inc()
+        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+    finally:
+        # Erros (4xx/5xx) também entram na latência
+        cronometro.finaliza()
 
 @app.route('/metrics')
 def metrics():
     return Response(generate_latest(), mimetype='text/plain')
 
+if PROFILER_ENABLED:
+    @app.route('/debug/perfil', methods=['POST'])
+    def arma_perfil():
+        """Amostra as pilhas durante as próximas N requisições (?requisicoes=N)"""
+        requisicoes = request.args.get('requisicoes', 100, type=int)
+        try:
+            arquivo = perfilador.arma(requisicoes)
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+        return jsonify({'arquivo': arquivo, 'requisicoes': requisicoes})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001) 
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""API de predição mínima: WSGI puro, NumPy e a floresta compilada
+
+Para workers que só pontuam transações. A importação carrega apenas a
+biblioteca padrão, o NumPy e src.inference (floresta compilada, lote e
+codecs): Flask, FastAPI, Prometheus, sklearn e mlflow ficam de fora. O
+joblib (e o sklearn) só são importados se SERVING_MODEL_PATH não estiver no
+formato compilado. Sem recarga a quente nem /metrics; para isso use
+src.serve ou src.api.app.
+
+Mesmas rotas e formatos de src.serve:
+    POST /predict        {"features": [29 floats]}
+    POST /predict/batch  {"features": [[...], ...]} ou corpo binário N×F
+    GET  /health
+
+Uso:
+    python -m src.serve_slim
+    python -m src.serve_workers --app slim --workers 4
+"""
+import json
+import logging
+
+import numpy as np
+
+from src.config import FRAUD_THRESHOLD, BATCH_MAX_SIZE, SERVING_MODEL_PATH
+from src.inference.batch import pontua_lote
+from src.inference.codecs import decodifica, codifica, FormatoNaoSuportado
+from src.inference.compiled_forest import carrega_modelo_inferencia
+
+STATUS = {
+    200: "200 OK", 400: "400 Bad Request", 404: "404 Not Found", 405: "405 Method Not Allowed",
+    413: "413 Payload Too Large", 415: "415 Unsupported Media Type",
+    500: "500 Internal Server Error", 503: "503 Service Unavailable",
+}
+
+
+class ErroRequisicao(Exception):
+    """Erro com o status HTTP a devolver"""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def carrega_modelo(caminho=SERVING_MODEL_PATH):
+    """Floresta compilada em caminho; None se não puder ser carregada (rotas respondem 503)"""
+    try:
+        modelo = carrega_modelo_inferencia(caminho, "compiled")
+    except Exception as e:
+        logging.error(f"Erro ao carregar o modelo '{caminho}': {e}")
+        return None
+    logging.info(f"Modelo '{caminho}' carregado com sucesso.")
+    return modelo
+
+
+modelo = carrega_modelo()
+
+
+def le_features(environ):
+    """Campo 'features' do corpo, decodificado conforme o Content-Type"""
+    tamanho = int(environ.get("CONTENT_LENGTH") or 0)
+    corpo = environ["wsgi.input"].read(tamanho) if tamanho else b""
+    try:
+        dados = decodifica(corpo, environ.get("CONTENT_TYPE"))
+    except FormatoNaoSuportado:
+        raise
+    except Exception:
+        raise ErroRequisicao(400, "Payload ausente ou malformado.")
+    if not isinstance(dados, dict) or "features" not in dados:
+        raise ErroRequisicao(400, "O campo 'features' é obrigatório no payload.")
+    return dados["features"]
+
+
+def prediz(features):
+    features = np.asarray(features, dtype=np.float64)
+    if features.shape != (modelo.n_features_in_,):
+        raise ErroRequisicao(400, f"Formato de features inválido. Esperado um array de {modelo.n_features_in_} features.")
+    if not np.isfinite(features).all():
+        raise ErroRequisicao(400, "Features contêm valores não finitos.")
+    prob_fraude = float(modelo.predict_proba(features.reshape(1, -1))[0, 1])
+    return {"prob_fraude": prob_fraude, "eh_fraude": prob_fraude > FRAUD_THRESHOLD}
+
+
+def prediz_lote(linhas):
+    num_features = modelo.n_features_in_
+    if isinstance(linhas, np.ndarray):
+        # Corpo binário: matriz N×F achatada, sem cópia
+        if linhas.size % num_features:
+            raise ErroRequisicao(400, f"O corpo binário deve conter N×{num_features} valores.")
+        linhas = linhas.reshape(-1, num_features)
+    elif not isinstance(linhas, list):
+        linhas = []
+    if len(linhas) == 0:
+        raise ErroRequisicao(400, "O campo 'features' deve ser uma lista não vazia de transações.")
+    if len(linhas) > BATCH_MAX_SIZE:
+        raise ErroRequisicao(413, f"O lote excede o limite de {BATCH_MAX_SIZE} transações.")
+    return pontua_lote(modelo, linhas, num_features, FRAUD_THRESHOLD)
+
+
+ROTAS = {"/predict": prediz, "/predict/batch": prediz_lote}
+
+
+def _responde(start_response, status, corpo, tipo):
+    start_response(STATUS[status], [("Content-Type", tipo), ("Content-Length", str(len(corpo)))])
+    return [corpo]
+
+
+def _erro(start_response, status, mensagem):
+    corpo = json.dumps({"error": mensagem}, ensure_ascii=False).encode()
+    return _responde(start_response, status, corpo, "application/json")
+
+
+def app(environ, start_response):
+    """Aplicação WSGI"""
+    rota = environ.get("PATH_INFO", "")
+    if rota == "/health":
+        if modelo is None:
+            return _erro(start_response, 503, "O modelo não está disponível.")
+        return _responde(start_response, 200, b'{"status": "ok"}', "application/json")
+
+    rotina = ROTAS.get(rota)
+    if rotina is None:
+        return _erro(start_response, 404, "Rota não encontrada.")
+    if environ["REQUEST_METHOD"] != "POST":
+        return _erro(start_response, 405, "Use POST.")
+    if modelo is None:
+        return _erro(start_response, 503, "O modelo não está disponível. Por favor, verifique os logs do servidor.")
+
+    try:
+        corpo, tipo = codifica(rotina(le_features(environ)), environ.get("HTTP_ACCEPT"))
+    except FormatoNaoSuportado as e:
+        return _erro(start_response, 415, str(e))
+    except ErroRequisicao as e:
+        return _erro(start_response, e.status, str(e))
+    except (ValueError, TypeError) as e:
+        return _erro(start_response, 400, f"Erro de validação de dados: {e}")
+    except Exception as e:
+        logging.exception("Erro inesperado durante a predição:")
+        return _erro(start_response, 500, f"Erro interno do servidor: {e}")
+    return _responde(start_response, 200, corpo, tipo)
+
+
+def cria_servidor(host, porta, sock=None):
+    """Servidor WSGI da biblioteca padrão, uma thread por conexão
+
+    Com sock (socket já em escuta, ex.: herdado de src.serve_workers), não
+    abre um novo.
+    """
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+    class Servidor(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class Handler(WSGIRequestHandler):
+        def log_message(self, formato, *args):
+            pass  # Sem log por requisição
+
+    servidor = Servidor((host, porta), Handler, bind_and_activate=sock is None)
+    if sock is not None:
+        servidor.socket.close()
+        servidor.socket = sock
+        servidor.server_name, servidor.server_port = sock.getsockname()[:2]
+        servidor.setup_environ()
+    servidor.set_app(app)
+    return servidor
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s')
+    cria_servidor("0.0.0.0", 5001).serve_forever()
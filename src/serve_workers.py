@@ -0,0 +1,196 @@
+"""Servidor multiprocesso com uma única cópia da floresta em memória
+
+O processo pai garante um artefato mapeável (diretório de .npy), lê suas
+páginas para o page cache e só então abre o socket e faz fork dos workers.
+Cada worker abre o mesmo artefato com mmap: as tabelas de nós ficam em
+páginas de arquivo compartilhadas, sem cópia por worker.
+
+Quando SERVING_MODEL_PATH é um .joblib ou .npz, o pai observa seu mtime a
+cada RELOAD_INTERVAL e recompila o artefato compartilhado quando ele muda;
+os workers de Flask e FastAPI trocam de modelo pela recarga a quente
+(RELOAD_SOURCE=file). O src.serve_slim não recarrega: reinicie o servidor.
+
+Uso:
+    python -m src.serve_workers --workers 4 --app flask
+    python -m src.serve_workers --workers 4 --app fastapi
+    python -m src.serve_workers --workers 4 --app slim
+"""
+import argparse
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import src.config as config
+from src.config import (
+    SERVING_MODEL_PATH, SHARED_MODEL_PATH, SERVING_WORKERS, API_HOST, API_PORT,
+    RELOAD_INTERVAL
+)
+from src.inference.compiled_forest import (
+    carrega_floresta, carrega_modelo_inferencia, salva_floresta
+)
+
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s')
+
+APPS = {
+    "flask": ("src.serve", 5001),
+    "fastapi": ("src.api.app", API_PORT),
+    "slim": ("src.serve_slim", 5001),
+}
+
+
+def prepara_modelo_compartilhado(caminho=SERVING_MODEL_PATH, destino=SHARED_MODEL_PATH):
+    """Garante um artefato mapeável e carrega suas páginas no page cache
+
+    Modelos .joblib ou .npz são compilados e salvos uma única vez em destino.
+    Devolve o caminho do diretório que os workers devem abrir com mmap.
+    """
+    if not os.path.isdir(caminho):
+        logging.info(f"Compilando '{caminho}' para o formato mapeável em '{destino}'...")
+        salva_floresta(carrega_modelo_inferencia(caminho, "compiled"), destino)
+        caminho = destino
+
+    # Valida o artefato e lê seus arquivos uma vez: os workers encontram as
+    # páginas já no page cache e as mapeiam sem cópia
+    carrega_floresta(caminho)
+    tamanho = 0
+    for arquivo in sorted(os.listdir(caminho)):
+        with open(os.path.join(caminho, arquivo), "rb") as f:
+            while bloco := f.read(1 << 20):
+                tamanho += len(bloco)
+    logging.info(f"Modelo compartilhado: {caminho} ({tamanho / 1024 / 1024:.1f} MB)")
+    return caminho
+
+
+def reexporta_se_mudou(caminho, destino, versao):
+    """Recompila caminho em destino se o mtime mudou; devolve o mtime observado
+
+    salva_floresta troca o destino atomicamente e os workers percebem a nova
+    versão pelo mtime dos metadados. Em caso de falha o artefato atual é
+    mantido até a próxima alteração da origem.
+    """
+    try:
+        atual = os.stat(caminho).st_mtime_ns
+    except FileNotFoundError:
+        return versao
+    if atual == versao:
+        return versao
+    try:
+        salva_floresta(carrega_modelo_inferencia(caminho, "compiled"), destino)
+    except Exception as e:
+        logging.error(f"Falha ao recompilar '{caminho}', mantendo o modelo compartilhado atual: {e}")
+    else:
+        logging.info(f"'{caminho}' mudou; modelo compartilhado recompilado em '{destino}'.")
+    return atual
+
+
+def abre_socket(host, porta):
+    """Socket de escuta criado no pai e herdado por todos os workers"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, porta))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+def executa_worker(nome_app, sock):
+    """Importa a aplicação no worker e atende conexões do socket herdado"""
+    modulo = importlib.import_module(APPS[nome_app][0])
+    if nome_app == "slim":
+        host, porta = sock.getsockname()
+        modulo.cria_servidor(host, porta, sock).serve_forever()
+    elif nome_app == "flask":
+        from werkzeug.serving import make_server
+        host, porta = sock.getsockname()
+        servidor = make_server(host, porta, modulo.app, threaded=True, fd=sock.fileno())
+        servidor.serve_forever()
+    else:
+        import uvicorn
+        servidor = uvicorn.Server(uvicorn.Config(modulo.app, log_level="warning"))
+        servidor.run(sockets=[sock])
+
+
+def inicia_worker(nome_app, sock):
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            executa_worker(nome_app, sock)
+        finally:
+            os._exit(0)
+    logging.info(f"Worker {pid} iniciado.")
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor multiprocesso de predição")
+    parser.add_argument("--app", choices=sorted(APPS), default="flask")
+    parser.add_argument("--workers", type=int, default=SERVING_WORKERS)
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--porta", type=int, default=None)
+    args = parser.parse_args()
+
+    # Workers carregam o artefato mapeado localmente, sem consultar o registro.
+    # src.config já foi importado aqui e é herdado pelo fork, então o ajuste é
+    # feito no próprio módulo (e no ambiente, para subprocessos)
+    ajustes = {
+        "SERVING_MODEL_PATH": prepara_modelo_compartilhado(),
+        "MODEL_SOURCE": "local",
+        "FOREST_ENGINE": "compiled",
+    }
+    for nome, valor in ajustes.items():
+        setattr(config, nome, valor)
+        os.environ[nome] = valor
+
+    porta = args.porta or APPS[args.app][1]
+    sock = abre_socket(args.host, porta)
+    logging.info(f"Escutando em {args.host}:{porta} com {args.workers} workers ({args.app}).")
+
+    workers = {inicia_worker(args.app, sock) for _ in range(args.workers)}
+    encerrando = False
+
+    def encerra(signum, frame):
+        nonlocal encerrando
+        encerrando = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, encerra)
+    signal.signal(signal.SIGINT, encerra)
+
+    # Origem compilada pelo pai (.joblib/.npz): recompila quando ela mudar
+    fonte = None
+    if RELOAD_INTERVAL > 0 and not os.path.isdir(SERVING_MODEL_PATH):
+        fonte = SERVING_MODEL_PATH
+        versao = os.stat(fonte).st_mtime_ns
+        proxima = time.monotonic() + RELOAD_INTERVAL
+
+    # Supervisiona os workers, substituindo os que terminarem inesperadamente
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG if fonte else 0)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            if time.monotonic() >= proxima:
+                versao = reexporta_se_mudou(fonte, SHARED_MODEL_PATH, versao)
+                proxima = time.monotonic() + RELOAD_INTERVAL
+            time.sleep(0.2)
+            continue
+        workers.discard(pid)
+        if not encerrando:
+            logging.warning(f"Worker {pid} terminou (status {status}); iniciando substituto.")
+            workers.add(inicia_worker(args.app, sock))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,20 @@
 import mlflow
 import mlflow.sklearn
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.model_selection import cross_val_score
+from matplotlib.figure import Figure
 import os
 import joblib
 from src.config import (
     MLFLOW_TRACKING_URI, MLFLOW_EXPERIMENT,
     MLFLOW_ARTIFACT_ROOT, MODEL_CONFIGS,
-    RANDOM_STATE, CV_SPLITS,
-    PROCESSED_DIR, MODELS_DIR, MODEL_PATH
+    RANDOM_STATE, CV_SPLITS, TRAINING_CORES,
+    SEARCH_MODE, HALVING_FACTOR, HALVING_RESOURCE, FINAL_MODEL, NEGATIVE_SAMPLING_RATE,
+    PROCESSED_DIR, MODELS_DIR, MODEL_PATH, OOF_DIR
 )
+from src.data.store import carrega_conjunto
+from src.training.evaluation import avalia_limiares, metricas_no_limiar, matriz_confusao, registra_avaliacao
+from src.training.mlflow_logger import RegistradorMlflow
+from src.training.search import executa_busca, busca_sucessiva, registra_degraus, salva_oof
 
 def treina_modelo():
     """Treina o modelo de detecção de fraude"""
@@ -47,21 +48,12 @@ def treina_modelo():
     # Carrega dados
     print("Carregando dados...")
     try:
-        print("Carregando X_train...")
-        X_train = np.load(f"{PROCESSED_DIR}/X_train.npy")
-        print(f"X_train carregado. Shape: {X_train.shape}")
-        
-        print("Carregando y_train...")
-        y_train = np.load(f"{PROCESSED_DIR}/y_train.npy")
-        print(f"y_train carregado. Shape: {y_train.shape}")
-        
-        print("Carregando X_test...")
-        X_test = np.load(f"{PROCESSED_DIR}/X_test.npy")
-        print(f"X_test carregado. Shape: {X_test.shape}")
-        
-        print("Carregando y_test...")
-        y_test = np.load(f"{PROCESSED_DIR}/y_test.npy")
-        print(f"y_test carregado. Shape: {y_test.shape}")
+        # Arrays mapeados em memória: folds e workers da busca compartilham as páginas
+        dados = carrega_conjunto(PROCESSED_DIR)
+        X_train, y_train = dados["X_train"], dados["y_train"]
+        X_test, y_test = dados["X_test"], dados["y_test"]
+        for nome, array in dados.items():
+            print(f"{nome} aberto. Shape: {array.shape}, dtype: {array.dtype}")
     except Exception as e:
         print(f"Erro ao carregar dados: {e}")
         return
@@ -71,79 +63,117 @@ def treina_modelo():
     melhor_score = 0
     melhor_modelo = None
     
-    for i, config in enumerate(MODEL_CONFIGS, 1):
+    # Todos os folds de todas as configurações são ajustados em paralelo;
+    # os resultados são logados no MLflow a seguir, por este processo.
+    # Com FINAL_MODEL=folds o ensemble dos modelos de fold substitui o ajuste final
+    ajuste_final = FINAL_MODEL != "folds"
+    print("Realizando validação cruzada e ajustes finais em paralelo..." if ajuste_final
+          else "Realizando validação cruzada em paralelo (modelo final: ensemble dos folds)...")
+    if SEARCH_MODE == "halving":
+        # Só as configurações que sobrevivem a todos os degraus chegam ao ajuste final
+        busca = busca_sucessiva(
+            MODEL_CONFIGS, X_train, y_train,
+            cv=CV_SPLITS, scoring='f1', random_state=RANDOM_STATE,
+            fator=HALVING_FACTOR, recurso=HALVING_RESOURCE, ajuste_final=ajuste_final,
+            taxa_negativos=NEGATIVE_SAMPLING_RATE
+        )
+        registra_degraus(busca, HALVING_RESOURCE, HALVING_FACTOR)
+        resultados = busca["resultados"]
+    else:
+        resultados = executa_busca(
+            MODEL_CONFIGS, X_train, y_train,
+            cv=CV_SPLITS, scoring='f1', random_state=RANDOM_STATE, ajuste_final=ajuste_final,
+            taxa_negativos=NEGATIVE_SAMPLING_RATE
+        )
+    
+    for resultado in resultados:
+        i, config = resultado["indice"] + 1, resultado["config"]
         print(f"\n=== Configuração {i}/{len(MODEL_CONFIGS)} ===")
         print(f"Parâmetros: {config}")
         
-        with mlflow.start_run(run_name=f"config_{i}"):
-            print("Criando modelo...")
-            modelo = RandomForestClassifier(
-                random_state=RANDOM_STATE,
-                **config
-            )
+        # Parâmetros, métricas, tags e gráficos vão para a fila do registrador e são
+        # enviados em lote por uma thread em segundo plano; a fila é esvaziada ao fim do run
+        with mlflow.start_run(run_name=f"config_{i}") as run, RegistradorMlflow(run.info.run_id) as registrador:
+            modelo = resultado["modelo"]
             
             # Loga parâmetros do modelo
             print("Logando parâmetros do modelo...")
-            mlflow.log_params({
+            registrador.params({
                 "model_type": "RandomForest",
                 "random_state": RANDOM_STATE,
+                # Runs com taxas diferentes comparam fit_cpu_seconds e test_pr_auc lado a lado
+                "negative_sampling_rate": NEGATIVE_SAMPLING_RATE,
                 **config
             })
             
-            print("Realizando validação cruzada...")
-            scores = cross_val_score(
-                modelo, X_train, y_train,
-                cv=CV_SPLITS, scoring='f1'
-            )
+            scores = resultado["scores"]
             score_medio = scores.mean()
             print(f"Score médio CV: {score_medio:.4f}")
             
             # Loga métricas de validação cruzada
-            mlflow.log_metrics({
+            registrador.metricas({
                 "cv_score_mean": score_medio,
                 "cv_score_std": scores.std(),
                 "cv_score_min": scores.min(),
-                "cv_score_max": scores.max()
+                "cv_score_max": scores.max(),
+                "fit_cpu_seconds": resultado["tempo_cpu"]
             })
             
-            print("Treinando modelo final...")
-            modelo.fit(X_train, y_train)
+            # Probabilidades fora do fold (mmap) para escolher limiar e calibrar sem usar o teste
+            caminho_oof = salva_oof(resultado, y_train, f"{OOF_DIR}/config_{i}")
+            registrador.artefato(lambda _, caminho=caminho_oof: caminho, "oof")
+            registra_avaliacao(avalia_limiares(y_train, resultado["oof"]), registrador, prefixo="oof_")
             
             print("Calculando métricas...")
-            y_pred = modelo.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
-            precision = precision_score(y_test, y_pred)
-            recall = recall_score(y_test, y_pred)
-            f1 = f1_score(y_test, y_pred)
+            # Uma ordenação dos scores dá a matriz de confusão em todos os limiares;
+            # as métricas pontuais são as do limiar de predict() (0.5)
+            proba = modelo.predict_proba(X_test)[:, 1]
+            avaliacao = avalia_limiares(y_test, proba)
+            pontuais = metricas_no_limiar(avaliacao)
+            accuracy, precision = pontuais["acuracia"], pontuais["precisao"]
+            recall, f1 = pontuais["recall"], pontuais["f1"]
+            y_pred = modelo.classes_[(proba > 0.5).astype(int)]
             
             # Gera e salva a matriz de confusão
-            salva_matriz_confusao(y_test, y_pred, mlflow.active_run().info.run_id)
+            salva_matriz_confusao(matriz_confusao(pontuais), registrador)
             
             print(f"Métricas:")
             print(f"- Accuracy: {accuracy:.4f}")
             print(f"- Precision: {precision:.4f}")
             print(f"- Recall: {recall:.4f}")
             print(f"- F1-Score: {f1:.4f}")
+            print(f"- ROC AUC: {avaliacao['roc_auc']:.4f}")
+            print(f"- PR AUC: {avaliacao['pr_auc']:.4f}")
+            print(f"- Custo (FP/FN ponderados): {pontuais['custo']:.0f}")
             
             # Loga métricas de teste
             print("Logando métricas de teste...")
-            mlflow.log_metrics({
+            registrador.metricas({
                 "test_accuracy": accuracy,
                 "test_precision": precision,
                 "test_recall": recall,
-                "test_f1": f1
+                "test_f1": f1,
+                "test_roc_auc": avaliacao["roc_auc"],
+                "test_pr_auc": avaliacao["pr_auc"],
+                "test_cost": pontuais["custo"]
             })
+            # Melhores limiares e a tabela da varredura (avaliacao/limiares.csv)
+            registra_avaliacao(avaliacao, registrador)
             
             # Loga tags para facilitar filtragem
-            mlflow.set_tags({
+            registrador.tags({
                 "model_type": "RandomForest",
                 "dataset": "credit_card_fraud",
                 "cv_folds": CV_SPLITS,
+                "training_cores": TRAINING_CORES,
+                "search_mode": SEARCH_MODE,
+                "final_model": FINAL_MODEL,
+                "forest_group": resultado["grupo"],
                 "is_best_model": f1 > melhor_score
             })
             
-            print(f"Run ID: {mlflow.active_run().info.run_id}")
-            print(f"Experiment ID: {mlflow.active_run().info.experiment_id}")
+            print(f"Run ID: {run.info.run_id}")
+            print(f"Experiment ID: {run.info.experiment_id}")
             
             # Salva modelo
             print("Salvando modelo no MLflow...")
@@ -182,41 +212,34 @@ def treina_modelo():
     else:
         print("Nenhum modelo foi treinado!")
 
-def salva_matriz_confusao(y_true, y_pred, run_id):
-    """Gera e salva a matriz de confusão como artifact"""
-    # ETAPA DE VERIFICAÇÃO: Vamos verificar o conteúdo das variáveis
-    print("--- Verificando y_test e y_pred ---")
-    print(f"Shape de y_test: {y_true.shape}")
-    print(f"Valores únicos em y_test: {np.unique(y_true)}")
-    print(f"Shape de y_pred: {y_pred.shape}")
-    print(f"Valores únicos em y_pred: {np.unique(y_pred)}")
-    print("------------------------------------")
+def salva_matriz_confusao(cm, registrador):
+    """Agenda a matriz de confusão como artifact, desenhada na thread do registrador"""
+    # 1. A matriz 2x2 já vem da avaliação por limiares (linhas: real, colunas: predito)
+    print(f"Matriz de confusão:\n{cm}")
 
-    # 1. Calcular a matriz de confusão
-    # Adicionamos labels=[0, 1] para garantir que a matriz seja sempre 2x2
-    cm = confusion_matrix(y_true, y_pred, labels=[0, 1])
+    def gera(diretorio):
+        # 2. Criar a figura para o gráfico (Figure sem pyplot: seguro fora da thread principal)
+        figura = Figure(figsize=(8, 6))
+        ax = figura.subplots()
+        labels_heatmap = ['Não Fraude', 'Fraude']
 
-    # 2. Criar a figura para o gráfico
-    plt.figure(figsize=(8, 6))
-    labels_heatmap = ['Não Fraude', 'Fraude']
+        # 3. Gerar o gráfico de calor (heatmap) com Seaborn
+        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
+                    xticklabels=labels_heatmap,
+                    yticklabels=labels_heatmap,
+                    ax=ax)
 
-    # 3. Gerar o gráfico de calor (heatmap) com Seaborn
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                xticklabels=labels_heatmap,
-                yticklabels=labels_heatmap)
+        ax.set_xlabel('Valor Predito')
+        ax.set_ylabel('Valor Real')
+        ax.set_title('Matriz de Confusão')
 
-    plt.xlabel('Valor Predito')
-    plt.ylabel('Valor Real')
-    plt.title('Matriz de Confusão')
-
-    # 4. Salvar o gráfico como um arquivo de imagem
-    plt.savefig("matriz_de_confusao.png")
+        # 4. Salvar o gráfico como um arquivo de imagem (removido após o envio)
+        arquivo = os.path.join(diretorio, "matriz_de_confusao.png")
+        figura.savefig(arquivo)
+        return arquivo
 
     # 5. Registrar a imagem como um artefato no MLflow
-    mlflow.log_artifact("matriz_de_confusao.png", "plots")
-
-    # Remove o arquivo temporário
-    os.remove('matriz_de_confusao.png')
+    registrador.artefato(gera, "plots")
 
 if __name__ == "__main__":
     treina_modelo() 
\ No newline at end of file
@@ -0,0 +1,359 @@
+"""Compactação da floresta após o treino
+
+Três passos sobre a floresta compilada:
+
+1. Poda de árvores: remove, uma a uma, a árvore cuja ausência menos muda as
+   probabilidades de validação, enquanto a PR-AUC de validação ficar a até
+   `tolerancia` da floresta completa.
+2. Fusão de folhas: um nó cujos dois filhos são folhas com probabilidades a
+   até `tolerancia_folhas` vira folha com a distribuição do próprio nó (a
+   média ponderada dos filhos), de baixo para cima; nós inalcançáveis saem
+   da tabela. Com tolerância 0 as predições não mudam.
+3. Quantização: limiares em float32 arredondados para baixo, índices de
+   feature e de nós nos menores inteiros que os comportam e probabilidades
+   das folhas em float32. Para entrada float32 (o caso do sklearn) os
+   caminhos não mudam: x > t equivale a x > maior float32 <= t.
+
+O artefato é uma FlorestaCompilada comum: a inferência e as APIs não mudam.
+A comparação com o original (tamanho, carga, latência e PR-AUC no restante
+do teste) vai para um run do MLflow.
+
+Uso:
+    python -m src.training.compaction
+    python -m src.training.compaction --tolerancia 0.005 --tolerancia-folhas 0.01
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from src.config import (
+    MODEL_PATH, COMPACT_MODEL_PATH, PROCESSED_DIR, SCALER_PATH, RANDOM_STATE, MLFLOW_TRACKING_URI, MLFLOW_EXPERIMENT,
+    COMPACTION_TOLERANCE, COMPACTION_LEAF_TOLERANCE, COMPACTION_VALIDATION_FRACTION
+)
+from src.inference.compiled_forest import (
+    FlorestaCompilada, carrega_modelo_inferencia, salva_floresta
+)
+from src.training.evaluation import avalia_limiares
+
+# Candidatos avaliados por vez na poda (limita a matriz candidatos × linhas)
+BLOCO_CANDIDATOS = 16
+
+
+def _substitui(floresta, **arrays):
+    """Cópia da floresta com os arrays (e a profundidade) indicados trocados"""
+    atual = {
+        "feature": floresta.feature, "limiar": floresta.limiar, "filhos": floresta.filhos,
+        "valor": floresta.valor, "raizes": floresta.raizes, "profundidade": floresta.profundidade,
+    }
+    atual.update(arrays)
+    return FlorestaCompilada(
+        classes=floresta.classes_, n_features=floresta.n_features_in_, params=floresta.params,
+        dtype_entrada=floresta.dtype_entrada, **atual
+    )
+
+
+def _alcancaveis(filhos, raizes, n_nos):
+    """Nós alcançáveis a partir das raízes e níveis até todas as árvores chegarem a folhas"""
+    filhos = np.asarray(filhos, dtype=np.intp)
+    alcancavel = np.zeros(n_nos, dtype=bool)
+    nos = np.asarray(raizes, dtype=np.intp)
+    niveis = 0
+    while True:
+        alcancavel[nos] = True
+        internos = nos[filhos[2 * nos] != nos]
+        if len(internos) == 0:
+            return alcancavel, niveis
+        nos = np.unique(np.r_[filhos[2 * internos], filhos[2 * internos + 1]])
+        niveis += 1
+
+
+def _reindexa(floresta, manter, raizes, profundidade):
+    """Floresta só com os nós em manter (fechado para os filhos), renumerados em ordem"""
+    novo = np.cumsum(manter) - 1
+    filhos = floresta.filhos.reshape(-1, 2)[manter]
+    return _substitui(
+        floresta,
+        feature=floresta.feature[manter],
+        limiar=floresta.limiar[manter],
+        filhos=novo[filhos].ravel().astype(floresta.filhos.dtype),
+        valor=floresta.valor[manter],
+        raizes=novo[raizes].astype(floresta.raizes.dtype),
+        profundidade=profundidade
+    )
+
+
+def seleciona_arvores(floresta, indices):
+    """Floresta só com as árvores de índices indicados, na ordem original"""
+    indices = np.unique(indices)
+    arvore_do_no = np.searchsorted(floresta.raizes, np.arange(floresta.n_nos), side="right") - 1
+    manter = np.isin(arvore_do_no, indices)
+    raizes = floresta.raizes[indices]
+    _, profundidade = _alcancaveis(floresta.filhos, raizes, floresta.n_nos)
+    return _reindexa(floresta, manter, raizes, profundidade)
+
+
+def probabilidades_por_arvore(floresta, X):
+    """P(classe positiva) de cada árvore em cada linha: matriz árvores × linhas"""
+    return floresta.valor[:, 1].take(floresta.apply(X).T).astype(np.float64)
+
+
+def poda_arvores(probabilidades, y, tolerancia=COMPACTION_TOLERANCE, min_arvores=1):
+    """Remoção gulosa de árvores com perda de PR-AUC de até tolerancia
+
+    probabilidades é a matriz árvores × linhas de probabilidades_por_arvore.
+    A cada rodada sai a árvore cuja remoção deixa a média das restantes mais
+    perto (erro quadrático em todas as linhas) da floresta completa; a
+    PR-AUC de validação só decide quando parar. Escolher a árvore pela
+    própria PR-AUC sobreajusta aos poucos positivos da validação. Devolve os
+    índices mantidos e a PR-AUC após cada remoção (a primeira é a da
+    floresta completa).
+    """
+    mantidas = list(range(len(probabilidades)))
+    alvo = probabilidades.mean(axis=0)
+    soma = probabilidades.sum(axis=0)
+    base = avalia_limiares(y, alvo)["pr_auc"]
+    historico = [base]
+
+    while len(mantidas) > min_arvores:
+        restantes = len(mantidas) - 1
+        candidatas = probabilidades[mantidas]
+        erros = np.concatenate([
+            (((soma - candidatas[inicio:inicio + BLOCO_CANDIDATOS]) / restantes - alvo) ** 2).sum(axis=1)
+            for inicio in range(0, len(mantidas), BLOCO_CANDIDATOS)
+        ])
+        melhor = int(np.argmin(erros))
+        pr_auc = avalia_limiares(y, (soma - candidatas[melhor]) / restantes)["pr_auc"]
+        if pr_auc < base - tolerancia:
+            break
+        del mantidas[melhor]
+        # Recalcula a soma: subtrações sucessivas acumulariam erro de arredondamento
+        soma = probabilidades[mantidas].sum(axis=0)
+        historico.append(pr_auc)
+    return np.array(mantidas), historico
+
+
+def funde_folhas(floresta, tolerancia=COMPACTION_LEAF_TOLERANCE):
+    """Transforma em folha todo nó cujos filhos são folhas com probabilidades a até tolerancia"""
+    indices = np.arange(floresta.n_nos)
+    filhos = floresta.filhos.reshape(-1, 2).astype(np.intp)
+    feature = floresta.feature.copy()
+    limiar = floresta.limiar.copy()
+    valor = floresta.valor
+
+    while True:
+        folha = filhos[:, 0] == indices
+        esquerdo, direito = filhos[:, 0], filhos[:, 1]
+        fundir = ~folha & folha[esquerdo] & folha[direito]
+        fundir[fundir] = np.abs(valor[esquerdo[fundir]] - valor[direito[fundir]]).max(axis=1) <= tolerancia
+        if not fundir.any():
+            break
+        filhos[fundir] = indices[fundir, np.newaxis]
+        feature[fundir] = 0
+        limiar[fundir] = 0
+
+    manter, profundidade = _alcancaveis(filhos.ravel(), floresta.raizes, floresta.n_nos)
+    fundida = _substitui(floresta, feature=feature, limiar=limiar,
+                         filhos=filhos.ravel().astype(floresta.filhos.dtype))
+    return _reindexa(fundida, manter, floresta.raizes, profundidade)
+
+
+def _menor_inteiro(maximo, tipos):
+    for tipo in tipos:
+        if maximo <= np.iinfo(tipo).max:
+            return np.dtype(tipo)
+    raise ValueError(f"Nenhum tipo inteiro comporta {maximo}")
+
+
+def quantiza(floresta):
+    """Limiares e folhas em float32, índices nos menores inteiros possíveis
+
+    Florestas com entrada float64 (scaler incorporado) mantêm os limiares em
+    float64: o arredondamento só preserva os caminhos para entrada float32.
+    """
+    limiar = floresta.limiar
+    if floresta.dtype_entrada == np.float32:
+        limiar = limiar.astype(np.float32)
+        acima = limiar.astype(np.float64) > floresta.limiar
+        limiar[acima] = np.nextafter(limiar[acima], np.float32(-np.inf))
+
+    # A travessia calcula 2 * nó + 1: o tipo dos nós precisa comportá-lo
+    tipo_no = _menor_inteiro(2 * floresta.n_nos + 1, (np.int16, np.int32, np.int64))
+    tipo_feature = _menor_inteiro(floresta.n_features_in_ - 1, (np.uint8, np.uint16, np.int32))
+    return _substitui(
+        floresta,
+        feature=floresta.feature.astype(tipo_feature),
+        limiar=limiar,
+        filhos=floresta.filhos.astype(tipo_no),
+        valor=floresta.valor.astype(np.float32),
+        raizes=floresta.raizes.astype(tipo_no)
+    )
+
+
+def tamanho_bytes(floresta):
+    """Memória ocupada pelas tabelas da floresta"""
+    return sum(array.nbytes for array in (floresta.feature, floresta.limiar, floresta.filhos,
+                                          floresta.valor, floresta.raizes))
+
+
+def compacta_floresta(floresta, X_validacao, y_validacao, tolerancia=COMPACTION_TOLERANCE,
+                      tolerancia_folhas=COMPACTION_LEAF_TOLERANCE, min_arvores=1):
+    """Poda, fusão de folhas e quantização; devolve a floresta compacta e um resumo"""
+    probabilidades = probabilidades_por_arvore(floresta, X_validacao)
+    mantidas, historico = poda_arvores(probabilidades, y_validacao, tolerancia, min_arvores)
+    compacta = quantiza(funde_folhas(seleciona_arvores(floresta, mantidas), tolerancia_folhas))
+    resumo = {
+        "n_trees_original": floresta.n_arvores,
+        "n_trees_compact": compacta.n_arvores,
+        "n_nodes_original": floresta.n_nos,
+        "n_nodes_compact": compacta.n_nos,
+        "depth_original": floresta.profundidade,
+        "depth_compact": compacta.profundidade,
+        "memory_bytes_original": tamanho_bytes(floresta),
+        "memory_bytes_compact": tamanho_bytes(compacta),
+        "val_pr_auc_original": historico[0],
+        "val_pr_auc_pruned": historico[-1],
+    }
+    return compacta, resumo
+
+
+def divide_validacao(y, fracao=COMPACTION_VALIDATION_FRACTION, random_state=RANDOM_STATE):
+    """Índices estratificados (validação, teste): a poda não vê as linhas de teste"""
+    indices = np.arange(len(y))
+    return train_test_split(indices, train_size=fracao, stratify=y, random_state=random_state)
+
+
+def _tamanho_em_disco(caminho):
+    if os.path.isdir(caminho):
+        return sum(os.path.getsize(os.path.join(caminho, nome)) for nome in os.listdir(caminho))
+    return os.path.getsize(caminho)
+
+
+def _mede_carga(caminho, rodadas=3):
+    """Melhor tempo de carga pronta para inferência, como nas APIs"""
+    tempos = []
+    for _ in range(rodadas):
+        inicio = time.perf_counter()
+        modelo = carrega_modelo_inferencia(caminho, "compiled")
+        tempos.append(time.perf_counter() - inicio)
+    return modelo, min(tempos)
+
+
+def _mede_latencia(modelo, X, repeticoes):
+    """Mediana da latência de predict_proba(X), em ms"""
+    modelo.predict_proba(X)
+    tempos = np.empty(repeticoes)
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        modelo.predict_proba(X)
+        tempos[i] = time.perf_counter() - inicio
+    return float(np.median(tempos) * 1000)
+
+
+def compara_modelos(caminho_original, caminho_compacto, X_teste, y_teste, tamanho_lote=1024):
+    """Tamanho em disco, carga, latência (uma linha e lote) e métricas de teste dos dois artefatos"""
+    comparacao = {}
+    probabilidades = {}
+    for nome, caminho in (("original", caminho_original), ("compact", caminho_compacto)):
+        modelo, carga = _mede_carga(caminho)
+        proba = modelo.predict_proba(X_teste)[:, 1]
+        avaliacao = avalia_limiares(y_teste, proba)
+        probabilidades[nome] = proba
+        comparacao.update({
+            f"size_bytes_{nome}": _tamanho_em_disco(caminho),
+            f"load_seconds_{nome}": carga,
+            f"latency_ms_{nome}": _mede_latencia(modelo, X_teste[:1], 200),
+            f"batch_latency_ms_{nome}": _mede_latencia(modelo, X_teste[:tamanho_lote], 20),
+            f"test_pr_auc_{nome}": avaliacao["pr_auc"],
+            f"test_roc_auc_{nome}": avaliacao["roc_auc"],
+        })
+    comparacao["delta_test_pr_auc"] = comparacao["test_pr_auc_compact"] - comparacao["test_pr_auc_original"]
+    comparacao["max_prob_diff"] = float(np.abs(probabilidades["compact"] - probabilidades["original"]).max())
+    comparacao["size_ratio"] = comparacao["size_bytes_compact"] / comparacao["size_bytes_original"]
+    return comparacao
+
+
+def compacta_modelo(caminho_modelo=MODEL_PATH, destino=COMPACT_MODEL_PATH, tolerancia=COMPACTION_TOLERANCE,
+                    tolerancia_folhas=COMPACTION_LEAF_TOLERANCE, fracao_validacao=COMPACTION_VALIDATION_FRACTION,
+                    registra=True):
+    """Etapa de compactação: salva o artefato compacto e registra a comparação no MLflow
+
+    caminho_modelo pode ser qualquer artefato de carrega_modelo_inferencia,
+    inclusive o exportado com o scaler incorporado (INFERENCE_MODEL_PATH):
+    nesse caso o teste é avaliado nas features brutas.
+    """
+    from src.data.store import carrega_conjunto
+
+    print("Carregando modelo e conjunto de teste...")
+    floresta = carrega_modelo_inferencia(caminho_modelo, "compiled")
+    dados = carrega_conjunto(PROCESSED_DIR, ["X_test", "y_test"])
+    X, y = np.asarray(dados["X_test"]), np.asarray(dados["y_test"])
+    if floresta.dtype_entrada == np.float64:
+        # Limiares no espaço bruto (export_model): desfaz a normalização do teste
+        import joblib
+        X = joblib.load(SCALER_PATH).inverse_transform(X.astype(np.float64))
+    validacao, teste = divide_validacao(y, fracao_validacao)
+
+    print(f"Compactando {floresta.n_arvores} árvores (tolerância de PR-AUC {tolerancia})...")
+    compacta, resumo = compacta_floresta(floresta, X[validacao], y[validacao], tolerancia, tolerancia_folhas)
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    salva_floresta(compacta, destino)
+    print(f"Modelo compacto salvo em: {destino}")
+
+    resultado = {**resumo, **compara_modelos(caminho_modelo, destino, X[teste], y[teste])}
+    print(f"{'':<14} {'original':>12} {'compacto':>12}")
+    for rotulo, chave, formato in (
+        ("árvores", "n_trees", "{:>12}"), ("nós", "n_nodes", "{:>12}"),
+        ("disco (MB)", "size_bytes", "{:>12.2f}"), ("carga (ms)", "load_seconds", "{:>12.1f}"),
+        ("1 linha (ms)", "latency_ms", "{:>12.3f}"), ("lote (ms)", "batch_latency_ms", "{:>12.2f}"),
+        ("PR-AUC teste", "test_pr_auc", "{:>12.4f}"),
+    ):
+        original, compacto = resultado[f"{chave}_original"], resultado[f"{chave}_compact"]
+        if chave == "size_bytes":
+            original, compacto = original / 1e6, compacto / 1e6
+        elif chave == "load_seconds":
+            original, compacto = original * 1000, compacto * 1000
+        print(f"{rotulo:<14} " + formato.format(original) + " " + formato.format(compacto))
+
+    if registra:
+        registra_compactacao(resultado, destino, tolerancia, tolerancia_folhas, fracao_validacao)
+    return resultado
+
+
+def registra_compactacao(resultado, destino, tolerancia, tolerancia_folhas, fracao_validacao):
+    """Run do MLflow com as métricas do original e do compacto lado a lado e o artefato"""
+    import mlflow
+    from src.training.mlflow_logger import RegistradorMlflow
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment(MLFLOW_EXPERIMENT)
+    with mlflow.start_run(run_name="compactacao_floresta") as run, RegistradorMlflow(run.info.run_id) as registrador:
+        registrador.params({
+            "compaction_tolerance": tolerancia,
+            "compaction_leaf_tolerance": tolerancia_folhas,
+            "compaction_validation_fraction": fracao_validacao,
+        })
+        registrador.metricas(resultado)
+        registrador.tags({"etapa": "compactacao"})
+        registrador.artefato(lambda _: destino, "modelo_compacto")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compacta a floresta treinada")
+    parser.add_argument("--modelo", default=MODEL_PATH)
+    parser.add_argument("--destino", default=COMPACT_MODEL_PATH)
+    parser.add_argument("--tolerancia", type=float, default=COMPACTION_TOLERANCE,
+                        help="perda máxima de PR-AUC de validação na poda de árvores")
+    parser.add_argument("--tolerancia-folhas", type=float, default=COMPACTION_LEAF_TOLERANCE,
+                        help="diferença máxima de probabilidade entre folhas irmãs fundidas")
+    parser.add_argument("--fracao-validacao", type=float, default=COMPACTION_VALIDATION_FRACTION)
+    parser.add_argument("--sem-mlflow", action="store_true")
+    args = parser.parse_args()
+    compacta_modelo(args.modelo, args.destino, args.tolerancia, args.tolerancia_folhas, args.fracao_validacao,
+                    registra=not args.sem_mlflow)
+
+
+if __name__ == "__main__":
+    main()
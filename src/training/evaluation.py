@@ -0,0 +1,143 @@
+"""Avaliação vetorizada em uma passada, com varredura completa de limiares
+
+Os scores são ordenados uma única vez; somas acumuladas de positivos e
+negativos dão a matriz de confusão em cada limiar distinto, e dela saem
+precisão, recall, F1, acurácia e custo em todos os limiares, além de
+ROC-AUC e PR-AUC (average precision), tudo em O(n log n).
+
+A linha k da tabela corresponde a prever fraude quando score >= limiar[k];
+a linha 0 (limiar infinito) não prevê nenhuma fraude.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.config import COST_FALSE_POSITIVE, COST_FALSE_NEGATIVE
+
+# Limiar de predict() de uma floresta binária: fraude se P(fraude) > 0.5
+LIMIAR_PADRAO = 0.5
+
+COLUNAS_TABELA = ["limiar", "tp", "fp", "fn", "tn", "precisao", "recall", "fpr", "f1", "acuracia", "custo"]
+
+
+def _divide(numerador, denominador):
+    # Divisão sem aviso: 0 onde o denominador é zero (como zero_division=0 do sklearn)
+    numerador = np.asarray(numerador, dtype=np.float64)
+    return np.divide(numerador, denominador, out=np.zeros_like(numerador), where=denominador > 0)
+
+
+def avalia_limiares(y_true, scores, custo_fp=COST_FALSE_POSITIVE, custo_fn=COST_FALSE_NEGATIVE):
+    """Matriz de confusão e métricas em todos os limiares distintos dos scores
+
+    Devolve um dicionário com um array por coluna de COLUNAS_TABELA e os
+    escalares roc_auc, pr_auc, positivos e negativos.
+    """
+    y = np.asarray(y_true).astype(bool)
+    scores = np.asarray(scores, dtype=np.float64)
+
+    ordem = np.argsort(-scores, kind="mergesort")
+    scores_ordenados = scores[ordem]
+    y_ordenado = y[ordem]
+
+    # Última posição de cada score distinto: empates entram juntos no mesmo limiar
+    fins = np.r_[np.flatnonzero(np.diff(scores_ordenados)), len(scores_ordenados) - 1]
+    tp_acumulado = np.cumsum(y_ordenado)
+    tp = np.r_[0, tp_acumulado[fins]]
+    fp = np.r_[0, fins + 1 - tp_acumulado[fins]]
+    limiar = np.r_[np.inf, scores_ordenados[fins]]
+
+    positivos, negativos = int(tp[-1]), int(fp[-1])
+    fn = positivos - tp
+    tn = negativos - fp
+
+    precisao = _divide(tp, tp + fp)
+    recall = _divide(tp, np.full_like(tp, positivos))
+    fpr = _divide(fp, np.full_like(fp, negativos))
+
+    # Trapézios na curva ROC; soma de precisão × ganho de recall na curva PR
+    roc_auc = pr_auc = float("nan")
+    if positivos and negativos:
+        roc_auc = float(np.sum(np.diff(fpr) * (recall[1:] + recall[:-1])) / 2)
+    if positivos:
+        pr_auc = float(np.sum(np.diff(recall) * precisao[1:]))
+
+    return {
+        "limiar": limiar,
+        "tp": tp,
+        "fp": fp,
+        "fn": fn,
+        "tn": tn,
+        "precisao": precisao,
+        "recall": recall,
+        "fpr": fpr,
+        "f1": _divide(2 * tp, 2 * tp + fp + fn),
+        "acuracia": (tp + tn) / max(positivos + negativos, 1),
+        "custo": custo_fp * fp + custo_fn * fn,
+        "roc_auc": roc_auc,
+        "pr_auc": pr_auc,
+        "positivos": positivos,
+        "negativos": negativos,
+    }
+
+
+def linha_no_limiar(avaliacao, limiar=LIMIAR_PADRAO):
+    """Índice da linha equivalente a prever fraude quando score > limiar"""
+    # Os limiares da tabela são decrescentes: conta quantos são maiores que limiar
+    return int(np.searchsorted(-avaliacao["limiar"][1:], -limiar, side="left"))
+
+
+def metricas_no_limiar(avaliacao, limiar=LIMIAR_PADRAO):
+    """Métricas pontuais (e matriz de confusão) para score > limiar"""
+    k = linha_no_limiar(avaliacao, limiar)
+    metricas = {coluna: avaliacao[coluna][k].item() for coluna in COLUNAS_TABELA if coluna != "limiar"}
+    metricas["roc_auc"] = avaliacao["roc_auc"]
+    metricas["pr_auc"] = avaliacao["pr_auc"]
+    return metricas
+
+
+def matriz_confusao(metricas):
+    """Matriz 2x2 (linhas: real, colunas: predito) no formato do sklearn"""
+    return np.array([[metricas["tn"], metricas["fp"]], [metricas["fn"], metricas["tp"]]])
+
+
+def melhores_limiares(avaliacao):
+    """Limiar de maior F1 e de menor custo"""
+    melhor_f1 = int(np.argmax(avaliacao["f1"]))
+    menor_custo = int(np.argmin(avaliacao["custo"]))
+    return {
+        "limiar_melhor_f1": float(avaliacao["limiar"][melhor_f1]),
+        "f1_maximo": float(avaliacao["f1"][melhor_f1]),
+        "limiar_menor_custo": float(avaliacao["limiar"][menor_custo]),
+        "custo_minimo": float(avaliacao["custo"][menor_custo]),
+    }
+
+
+def tabela_limiares(avaliacao, max_linhas=1000):
+    """DataFrame compacto da varredura: até max_linhas limiares
+
+    Linhas espaçadas uniformemente ao longo da curva, sempre incluindo os
+    extremos e os limiares de maior F1 e de menor custo.
+    """
+    n = len(avaliacao["limiar"])
+    linhas = np.unique(np.r_[
+        np.linspace(0, n - 1, min(n, max_linhas)).round().astype(int),
+        np.argmax(avaliacao["f1"]), np.argmin(avaliacao["custo"])
+    ])
+    return pd.DataFrame({coluna: avaliacao[coluna][linhas] for coluna in COLUNAS_TABELA})
+
+
+def registra_avaliacao(avaliacao, registrador, prefixo="test_", max_linhas=1000):
+    """Envia os melhores limiares e a tabela de limiares pelo registrador do MLflow
+
+    A tabela vai para avaliacao/<prefixo>limiares.csv.
+    """
+    registrador.metricas({f"{prefixo}{nome}": valor for nome, valor in melhores_limiares(avaliacao).items()})
+    tabela = tabela_limiares(avaliacao, max_linhas)
+
+    def gera(diretorio):
+        arquivo = os.path.join(diretorio, f"{prefixo}limiares.csv")
+        tabela.to_csv(arquivo, index=False, float_format="%.6g")
+        return arquivo
+
+    registrador.artefato(gera, "avaliacao")
@@ -0,0 +1,140 @@
+"""Logging assíncrono e em lote no MLflow
+
+Parâmetros, métricas e tags vão para uma fila e são enviados por uma thread
+em segundo plano, agrupados em chamadas log_batch. Artefatos (ex.: gráficos)
+são gerados e enviados na mesma thread, fora do caminho do treino. Ao sair
+do contexto a fila é esvaziada, com prazo máximo: se o servidor de tracking
+estiver lento ou fora do ar, os erros são avisados e o treino segue.
+"""
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+from src.config import MLFLOW_LOG_TIMEOUT
+
+# Limites por chamada de log_batch da API do MLflow
+MAX_METRICAS_LOTE = 1000
+MAX_PARAMS_LOTE = 100
+MAX_TAGS_LOTE = 100
+
+_FIM = object()
+
+
+class RegistradorMlflow:
+    """Fila de logging de um run do MLflow
+
+    Uso:
+        with mlflow.start_run() as run, RegistradorMlflow(run.info.run_id) as registrador:
+            registrador.params({...})
+            registrador.metricas({...})
+            registrador.artefato(gera_grafico, "plots")
+    """
+
+    def __init__(self, run_id, cliente=None, timeout=MLFLOW_LOG_TIMEOUT):
+        if cliente is None:
+            from mlflow.tracking import MlflowClient
+            cliente = MlflowClient()
+        self.run_id = run_id
+        self.cliente = cliente
+        self.timeout = timeout
+        self.falhas = 0
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._executa, name="mlflow-logger", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fecha()
+
+    def params(self, params):
+        from mlflow.entities import Param
+        for nome, valor in params.items():
+            self._fila.put(("param", Param(str(nome), str(valor))))
+
+    def metricas(self, metricas, step=0):
+        from mlflow.entities import Metric
+        instante = int(time.time() * 1000)
+        for nome, valor in metricas.items():
+            self._fila.put(("metrica", Metric(str(nome), float(valor), instante, step)))
+
+    def tags(self, tags):
+        from mlflow.entities import RunTag
+        for nome, valor in tags.items():
+            self._fila.put(("tag", RunTag(str(nome), str(valor))))
+
+    def artefato(self, gera, caminho_artefato=None):
+        """Agenda gera(diretorio) na thread de logging e envia o arquivo (ou pasta) devolvido"""
+        self._fila.put(("artefato", (gera, caminho_artefato)))
+
+    def fecha(self):
+        """Envia o que está na fila (até timeout segundos) e encerra a thread"""
+        self._fila.put(_FIM)
+        self._thread.join(self.timeout)
+        if self._thread.is_alive():
+            print(f"Aviso: logging do MLflow não terminou em {self.timeout:.0f}s; "
+                  f"{self._fila.qsize()} itens do run {self.run_id} foram descartados")
+        elif self.falhas:
+            print(f"Aviso: {self.falhas} envios ao MLflow falharam no run {self.run_id}")
+
+    def _executa(self):
+        while True:
+            itens = [self._fila.get()]
+            # Agrupa tudo o que já estiver na fila em um único envio
+            while True:
+                try:
+                    itens.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            fim = any(item is _FIM for item in itens)
+            lote = {"param": [], "metrica": [], "tag": []}
+            artefatos = []
+            for item in itens:
+                if item is _FIM:
+                    continue
+                tipo, valor = item
+                if tipo == "artefato":
+                    artefatos.append(valor)
+                else:
+                    lote[tipo].append(valor)
+
+            self._envia_lote(lote["param"], lote["metrica"], lote["tag"])
+            for gera, caminho_artefato in artefatos:
+                self._envia_artefato(gera, caminho_artefato)
+            if fim:
+                return
+
+    def _tenta(self, descricao, funcao, *args, **kwargs):
+        try:
+            funcao(*args, **kwargs)
+        except Exception as e:
+            self.falhas += 1
+            print(f"Aviso: falha ao enviar {descricao} ao MLflow: {e}")
+
+    def _envia_lote(self, params, metricas, tags):
+        while params or metricas or tags:
+            self._tenta(
+                "lote de métricas/parâmetros", self.cliente.log_batch, self.run_id,
+                metrics=metricas[:MAX_METRICAS_LOTE], params=params[:MAX_PARAMS_LOTE],
+                tags=tags[:MAX_TAGS_LOTE]
+            )
+            metricas = metricas[MAX_METRICAS_LOTE:]
+            params = params[MAX_PARAMS_LOTE:]
+            tags = tags[MAX_TAGS_LOTE:]
+
+    def _envia_artefato(self, gera, caminho_artefato):
+        diretorio = tempfile.mkdtemp(prefix="artefato_mlflow_")
+        try:
+            arquivo = gera(diretorio)
+            envia = self.cliente.log_artifacts if os.path.isdir(arquivo) else self.cliente.log_artifact
+            self._tenta(f"artefato {os.path.basename(arquivo)}", envia, self.run_id, arquivo, caminho_artefato)
+        except Exception as e:
+            self.falhas += 1
+            print(f"Aviso: falha ao gerar artefato para o MLflow: {e}")
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
@@ -0,0 +1,135 @@
+"""Subamostragem de negativos com correção por pesos
+
+O treino mantém todas as fraudes e cada transação legítima com
+probabilidade `taxa`. Para que as probabilidades continuem na taxa base real,
+cada amostra recebe um peso que devolve à sua classe o peso total que ela
+teria no treino completo (já considerando o class_weight da configuração).
+O modelo resultante é uma floresta comum: compilação e serving não mudam.
+
+Uso (compara taxas e registra no MLflow lado a lado):
+    python -m src.training.sampling --taxas 1 0.5 0.2 0.1 0.05
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils.class_weight import compute_class_weight
+
+from src.config import (
+    MLFLOW_TRACKING_URI, MLFLOW_EXPERIMENT, MODEL_CONFIGS, PROCESSED_DIR, RANDOM_STATE, TRAINING_CORES
+)
+from src.training.evaluation import avalia_limiares
+
+
+def subamostra_negativos(y, taxa, semente=None):
+    """Índices ordenados com todos os positivos e cada negativo mantido com probabilidade taxa"""
+    y = np.asarray(y)
+    mantidos = (y != 0) | (np.random.default_rng(semente).random(len(y)) < taxa)
+    return np.flatnonzero(mantidos)
+
+
+def pesos_correcao(y_completo, y_amostra, class_weight=None):
+    """Peso de cada amostra para que cada classe some o peso que teria em y_completo
+
+    class_weight segue o RandomForestClassifier (None, "balanced", dict);
+    "balanced_subsample" é tratado como "balanced" sobre o treino completo.
+    """
+    classes, contagem = np.unique(y_completo, return_counts=True)
+    if class_weight is None:
+        fator = np.ones(len(classes))
+    else:
+        modo = "balanced" if class_weight == "balanced_subsample" else class_weight
+        fator = compute_class_weight(modo, classes=classes, y=y_completo)
+    posicoes = np.searchsorted(classes, y_amostra)
+    contagem_amostra = np.bincount(posicoes, minlength=len(classes))
+    return (fator * contagem / np.maximum(contagem_amostra, 1))[posicoes]
+
+
+def subamostra_treino(X, y, taxa, class_weight=None, semente=None):
+    """(X, y, sample_weight) do treino subamostrado; sem pesos quando taxa >= 1
+
+    Com pesos, o estimador deve ser ajustado com class_weight=None: o
+    class_weight original já está incorporado em sample_weight.
+    """
+    if taxa >= 1:
+        return X, y, None
+    amostra = subamostra_negativos(y, taxa, semente)
+    y_amostra = y[amostra]
+    return X[amostra], y_amostra, pesos_correcao(y, y_amostra, class_weight)
+
+
+def compara_taxas(config, X_train, y_train, X_test, y_test, taxas, random_state=RANDOM_STATE):
+    """Ajusta config com cada taxa de negativos e mede tempo e métricas de teste
+
+    Devolve um dict por taxa com tempo de CPU do ajuste, aceleração e variação
+    de PR-AUC em relação à primeira taxa (use 1.0 como referência),
+    ROC-AUC e a probabilidade média prevista (deve ficar perto da taxa base).
+    """
+    resultados = []
+    for taxa in taxas:
+        X_s, y_s, pesos = subamostra_treino(
+            X_train, y_train, taxa, config.get("class_weight"), semente=random_state
+        )
+        params = {**config, "class_weight": None} if pesos is not None else config
+        modelo = RandomForestClassifier(random_state=random_state, n_jobs=TRAINING_CORES, **params)
+        inicio = time.process_time()
+        modelo.fit(X_s, y_s, sample_weight=pesos)
+        tempo = time.process_time() - inicio
+
+        proba = modelo.predict_proba(X_test)[:, 1]
+        avaliacao = avalia_limiares(y_test, proba)
+        resultados.append({
+            "taxa": taxa,
+            "linhas_treino": len(y_s),
+            "fit_cpu_seconds": tempo,
+            "test_pr_auc": avaliacao["pr_auc"],
+            "test_roc_auc": avaliacao["roc_auc"],
+            "test_prob_media": float(proba.mean()),
+        })
+
+    base = resultados[0]
+    for resultado in resultados:
+        resultado["speedup"] = base["fit_cpu_seconds"] / max(resultado["fit_cpu_seconds"], 1e-9)
+        resultado["delta_pr_auc"] = resultado["test_pr_auc"] - base["test_pr_auc"]
+    return resultados
+
+
+def registra_comparacao(resultados, config):
+    """Um run pai com a config e um run aninhado por taxa, com as mesmas métricas"""
+    import mlflow
+
+    with mlflow.start_run(run_name="subamostragem_negativos"):
+        mlflow.log_params(config)
+        for resultado in resultados:
+            with mlflow.start_run(run_name=f"taxa_{resultado['taxa']:g}", nested=True):
+                mlflow.log_param("negative_sampling_rate", resultado["taxa"])
+                mlflow.log_metrics({nome: valor for nome, valor in resultado.items() if nome != "taxa"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara taxas de subamostragem de negativos")
+    parser.add_argument("--taxas", type=float, nargs="+", default=[1.0, 0.5, 0.2, 0.1, 0.05])
+    parser.add_argument("--config", type=int, default=0, help="índice em MODEL_CONFIGS")
+    args = parser.parse_args()
+
+    import mlflow
+    from src.data.store import carrega_conjunto
+
+    dados = carrega_conjunto(PROCESSED_DIR)
+    config = MODEL_CONFIGS[args.config]
+    resultados = compara_taxas(config, dados["X_train"], dados["y_train"], dados["X_test"], dados["y_test"],
+                               args.taxas)
+
+    print(f"{'taxa':>6} {'linhas':>9} {'CPU':>8} {'aceleração':>11} {'PR-AUC':>8} {'Δ PR-AUC':>9} {'prob. média':>12}")
+    for r in resultados:
+        print(f"{r['taxa']:>6g} {r['linhas_treino']:>9} {r['fit_cpu_seconds']:>7.1f}s {r['speedup']:>10.1f}x "
+              f"{r['test_pr_auc']:>8.4f} {r['delta_pr_auc']:>+9.4f} {r['test_prob_media']:>12.5f}")
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment(MLFLOW_EXPERIMENT)
+    registra_comparacao(resultados, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""Busca de hiperparâmetros em paralelo sobre (configuração, fold)
+
+Cada ajuste de um fold da validação cruzada (e o ajuste final de cada
+configuração no treino completo) é uma tarefa independente em um pool de
+processos. O orçamento global de núcleos é dividido entre processos e
+threads por floresta (n_jobs), e as bibliotecas nativas de cada worker são
+limitadas ao mesmo número de threads, então o paralelismo por árvore e por
+fold nunca ultrapassa os núcleos disponíveis.
+
+A busca sucessiva (successive halving) avalia todas as configurações com
+pouco recurso (uma subamostra estratificada do treino ou menos árvores),
+promove a melhor fração e repete com mais recurso até o treino completo.
+
+Com taxa_negativos < 1, cada ajuste usa todas as fraudes e uma amostra das
+transações legítimas, com pesos que preservam a taxa base (src.training.sampling);
+a validação continua usando o fold inteiro.
+
+Os modelos de cada fold e suas probabilidades fora do fold (OOF) voltam
+dos workers: servem para escolher limiar e calibrar sem reajustes e, com
+FINAL_MODEL=folds, o ensemble dos folds substitui o ajuste final.
+
+Os workers só ajustam e pontuam; o MLflow é usado apenas pelo processo pai.
+"""
+import copy
+import math
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import check_cv, train_test_split
+
+from src.config import TRAINING_CORES, RANDOM_STATE
+from src.data.store import salva_conjunto
+from src.training.sampling import subamostra_treino
+
+# Dados do worker, recebidos uma única vez no initializer do pool
+_X = None
+_y = None
+
+
+def divide_nucleos(n_tarefas, nucleos=TRAINING_CORES):
+    """(processos, threads por ajuste) cujo produto não passa de nucleos"""
+    nucleos = max(1, nucleos)
+    processos = max(1, min(n_tarefas, nucleos))
+    return processos, max(1, nucleos // processos)
+
+
+def _referencia(array):
+    """Caminho do .npy quando o array é o arquivo inteiro mapeado, senão o próprio array
+
+    Workers reabrem o arquivo com mmap e compartilham as páginas do page
+    cache, em vez de receber uma cópia serializada dos dados.
+    """
+    caminho = getattr(array, "filename", None)
+    if isinstance(array, np.memmap) and caminho and caminho.endswith(".npy"):
+        inteiro = np.load(caminho, mmap_mode="r")
+        if (inteiro.offset, inteiro.shape, inteiro.strides) == (array.offset, array.shape, array.strides):
+            return caminho
+    return array
+
+
+def _abre(referencia):
+    if isinstance(referencia, str):
+        return np.load(referencia, mmap_mode="r")
+    return referencia
+
+
+def _inicia_worker(X, y, threads):
+    global _X, _y
+    _X, _y = _abre(X), _abre(y)
+    # Evita que BLAS/OpenMP de cada worker abra uma thread por núcleo da máquina
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=threads)
+
+
+def agrupa_por_arvores(configs):
+    """Agrupa configurações que só diferem em n_estimators
+
+    Devolve listas de índices de configs, cada uma ordenada por n_estimators:
+    uma floresta crescida com warm_start serve a todas as configurações do grupo.
+    """
+    grupos = {}
+    for i, config in enumerate(configs):
+        forma = tuple(sorted((k, repr(v)) for k, v in config.items() if k != "n_estimators"))
+        grupos.setdefault(forma, []).append(i)
+    return [sorted(g, key=lambda i: configs[i].get("n_estimators", 100)) for g in grupos.values()]
+
+
+def _instantaneo(estimador):
+    """Cópia rasa da floresta com lista própria de árvores (imune ao warm_start)"""
+    instantaneo = copy.copy(estimador)
+    instantaneo.estimators_ = list(estimador.estimators_)
+    instantaneo.set_params(warm_start=False, n_jobs=None)
+    return instantaneo
+
+
+def _ajusta(estimador, tamanhos, scoring, indices_treino, indices_validacao, guarda_folds=True,
+            taxa_negativos=1.0, semente=None):
+    """Cresce a floresta com warm_start até cada tamanho em tamanhos
+
+    Com o mesmo random_state, as árvores adicionadas a cada passo são as
+    mesmas de um ajuste do zero com aquele n_estimators. Em cada passo pontua
+    em indices_validacao ou, no ajuste final (indices_validacao None), guarda
+    um instantâneo da floresta. Com guarda_folds, os passos de validação
+    também guardam o instantâneo e a probabilidade da classe positiva em
+    indices_validacao. Devolve (scores, tempos de CPU, instantâneos,
+    probabilidades fora do fold). taxa_negativos < 1 subamostra os negativos
+    do treino (semente fixa a amostra) e ajusta com pesos de correção.
+    """
+    X_treino = _X if indices_treino is None else _X[indices_treino]
+    y_treino = _y if indices_treino is None else _y[indices_treino]
+    X_treino, y_treino, pesos = subamostra_treino(
+        X_treino, y_treino, taxa_negativos, estimador.class_weight, semente
+    )
+    if pesos is not None:
+        # O class_weight da configuração já está nos pesos
+        estimador.set_params(class_weight=None)
+    scores, tempos, instantaneos, probabilidades = [], [], [], []
+
+    estimador.set_params(warm_start=True)
+    for tamanho in tamanhos:
+        inicio = time.process_time()
+        with warnings.catch_warnings():
+            # class_weight "balanced" com warm_start só é problema se os dados mudarem entre ajustes
+            warnings.filterwarnings("ignore", message=".*warm_start.*", category=UserWarning)
+            estimador.set_params(n_estimators=tamanho).fit(X_treino, y_treino, sample_weight=pesos)
+        tempos.append(time.process_time() - inicio)
+
+        if indices_validacao is None:
+            instantaneos.append(_instantaneo(estimador))
+            continue
+        X_validacao = _X[indices_validacao]
+        scores.append(get_scorer(scoring)(estimador, X_validacao, _y[indices_validacao]))
+        if guarda_folds:
+            instantaneos.append(_instantaneo(estimador))
+            probabilidades.append(estimador.predict_proba(X_validacao)[:, 1].astype(np.float32))
+    return scores, tempos, instantaneos, probabilidades
+
+
+def combina_folds(modelos):
+    """Uma floresta com as árvores de todos os modelos de fold
+
+    Como predict_proba da floresta é a média das árvores e todos os folds
+    têm o mesmo número de árvores, o resultado é a média das probabilidades
+    dos modelos de fold. A floresta combinada pode ser compilada e servida
+    como qualquer outra.
+    """
+    classes = modelos[0].classes_
+    if any(not np.array_equal(modelo.classes_, classes) for modelo in modelos):
+        raise ValueError("Os modelos de fold não têm as mesmas classes")
+    combinado = copy.copy(modelos[0])
+    combinado.estimators_ = [arvore for modelo in modelos for arvore in modelo.estimators_]
+    combinado.set_params(n_estimators=len(combinado.estimators_))
+    return combinado
+
+
+def executa_busca(configs, X, y, cv, scoring, random_state=RANDOM_STATE,
+                  nucleos=TRAINING_CORES, ajuste_final=True, guarda_folds=True, taxa_negativos=1.0):
+    """Valida todas as configurações em paralelo
+
+    Configurações que só diferem em n_estimators compartilham uma floresta
+    crescida com warm_start, então um grid de tamanhos custa um ajuste da
+    maior floresta por fold. Devolve, na ordem de configs, um dict por
+    configuração com 'indice' (posição em configs), 'config', 'grupo' (índice
+    da floresta compartilhada), 'scores' (um por fold, na ordem dos folds),
+    'modelo', 'modelos_folds', 'oof' e 'tempo_cpu' (tempo de CPU gasto nas
+    árvores da configuração, em segundos).
+
+    Com guarda_folds, 'modelos_folds' tem o modelo de cada fold e 'oof' a
+    probabilidade da classe positiva de cada linha de X dada pelo modelo do
+    fold em que ela ficou de fora (float32). 'modelo' é o ajuste no treino
+    completo se ajuste_final; senão, com guarda_folds, o ensemble dos folds
+    (combina_folds), sem custo de ajuste extra; senão None.
+
+    taxa_negativos < 1 treina cada fold e o ajuste final com todos os
+    positivos e essa fração dos negativos (pesos corrigem a taxa base).
+    """
+    folds = list(check_cv(cv, y, classifier=True).split(X, y))
+    grupos = agrupa_por_arvores(configs)
+    tarefas = []
+    for g, grupo in enumerate(grupos):
+        for j, (treino, validacao) in enumerate(folds):
+            tarefas.append((g, j, treino, validacao))
+        if ajuste_final:
+            tarefas.append((g, None, None, None))
+
+    processos, threads = divide_nucleos(len(tarefas), nucleos)
+    print(f"Busca: {len(configs)} configurações em {len(grupos)} florestas × {len(folds)} folds = "
+          f"{len(tarefas)} tarefas em {processos} processos × {threads} threads")
+
+    # Florestas maiores primeiro: as tarefas curtas preenchem o fim da fila
+    tarefas.sort(key=lambda t: -configs[grupos[t[0]][-1]].get("n_estimators", 100))
+
+    resultados = [
+        {"indice": i, "config": config, "grupo": None, "scores": np.full(len(folds), np.nan),
+         "modelo": None, "modelos_folds": [None] * len(folds) if guarda_folds else None,
+         "oof": np.full(len(y), np.nan, dtype=np.float32) if guarda_folds else None, "tempo_cpu": 0.0}
+        for i, config in enumerate(configs)
+    ]
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(processos, initializer=_inicia_worker,
+                             initargs=(_referencia(X), _referencia(y), threads)) as pool:
+        futuros = {}
+        for g, j, treino, validacao in tarefas:
+            grupo = grupos[g]
+            tamanhos = [configs[i].get("n_estimators", 100) for i in grupo]
+            estimador = RandomForestClassifier(random_state=random_state, n_jobs=threads, **configs[grupo[0]])
+            # Uma amostra de negativos por fold, a mesma para todas as configurações
+            semente = None if random_state is None else [random_state, 0 if j is None else j + 1]
+            futuro = pool.submit(_ajusta, estimador, tamanhos, scoring, treino, validacao, guarda_folds,
+                                 taxa_negativos, semente)
+            futuros[futuro] = (g, j)
+
+        for futuro in as_completed(futuros):
+            g, j = futuros[futuro]
+            scores, tempos, instantaneos, probabilidades = futuro.result()
+            for k, i in enumerate(grupos[g]):
+                resultados[i]["grupo"] = g
+                resultados[i]["tempo_cpu"] += tempos[k]
+                if j is None:
+                    resultados[i]["modelo"] = instantaneos[k]
+                    continue
+                resultados[i]["scores"][j] = scores[k]
+                if guarda_folds:
+                    resultados[i]["modelos_folds"][j] = instantaneos[k]
+                    resultados[i]["oof"][folds[j][1]] = probabilidades[k]
+
+    if guarda_folds and not ajuste_final:
+        for resultado in resultados:
+            resultado["modelo"] = combina_folds(resultado["modelos_folds"])
+
+    duracao = time.perf_counter() - inicio
+    total = sum(r["tempo_cpu"] for r in resultados)
+    print(f"Busca concluída em {duracao:.1f}s (CPU dos ajustes: {total:.1f}s, "
+          f"aceleração {total / duracao:.1f}x em {processos * threads} núcleos)")
+    return resultados
+
+
+def salva_oof(resultado, y, diretorio):
+    """Grava as probabilidades fora do fold e os rótulos alinhados (src.data.store)
+
+    O diretório pode ser aberto com carrega_conjunto (mmap) para escolher
+    limiar ou calibrar sem reajustar nenhum modelo.
+    """
+    salva_conjunto(diretorio, oof=resultado["oof"], y=y)
+    return diretorio
+
+
+def subamostra_estratificada(y, fracao, random_state=RANDOM_STATE):
+    """Índices ordenados de uma subamostra com a mesma proporção de classes"""
+    indices = np.arange(len(y))
+    if fracao >= 1:
+        return indices
+    indices, _ = train_test_split(indices, train_size=fracao, stratify=y, random_state=random_state)
+    return np.sort(indices)
+
+
+def busca_sucessiva(configs, X, y, cv, scoring, random_state=RANDOM_STATE,
+                    nucleos=TRAINING_CORES, fator=3, recurso="amostras", fracao_minima=0.05,
+                    ajuste_final=True, taxa_negativos=1.0):
+    """Successive halving sobre configs
+
+    A cada degrau as sobreviventes são validadas com a fração do recurso do
+    degrau e só as melhores len(configs) // fator seguem, até restar uma.
+    O recurso é "amostras" (subamostra estratificada de X) ou "arvores"
+    (fração de n_estimators). O último degrau usa o recurso completo e
+    guarda modelos de fold e OOF das sobreviventes, mais o ajuste final se
+    ajuste_final (senão o modelo é o ensemble dos folds).
+
+    Devolve um dict com 'resultados' (as do último degrau, no formato de
+    executa_busca) e 'degraus' (fração, resultados e índices promovidos de
+    cada degrau, para auditoria).
+    """
+    if recurso not in ("amostras", "arvores"):
+        raise ValueError(f"Recurso desconhecido: {recurso}")
+    if fator < 2:
+        raise ValueError(f"O fator de corte deve ser ao menos 2 (recebido: {fator})")
+
+    n_degraus = 1 + int(math.floor(math.log(len(configs)) / math.log(fator) + 1e-9))
+    sobreviventes = list(range(len(configs)))
+    degraus = []
+
+    for degrau in range(n_degraus):
+        ultimo = degrau == n_degraus - 1
+        fracao = 1.0 if ultimo else max(fracao_minima, float(fator) ** (degrau - n_degraus + 1))
+        print(f"\nDegrau {degrau + 1}/{n_degraus}: {len(sobreviventes)} configurações com "
+              f"{fracao:.0%} {'das amostras' if recurso == 'amostras' else 'das árvores'}")
+
+        candidatas = [configs[i] for i in sobreviventes]
+        X_degrau, y_degrau = X, y
+        if recurso == "amostras":
+            indices = subamostra_estratificada(y, fracao, random_state)
+            X_degrau, y_degrau = X[indices], y[indices]
+        else:
+            candidatas = [
+                {**c, "n_estimators": max(1, round(c.get("n_estimators", 100) * fracao))}
+                for c in candidatas
+            ]
+
+        resultados = executa_busca(
+            candidatas, X_degrau, y_degrau, cv, scoring, random_state=random_state,
+            nucleos=nucleos, ajuste_final=ultimo and ajuste_final, guarda_folds=ultimo,
+            taxa_negativos=taxa_negativos
+        )
+        for indice, resultado in zip(sobreviventes, resultados):
+            resultado["indice"] = indice
+            resultado["config"] = configs[indice]
+
+        if ultimo:
+            promovidos = sobreviventes
+        else:
+            ordem = sorted(resultados, key=lambda r: -np.nanmean(r["scores"]))
+            promovidos = [r["indice"] for r in ordem[:max(1, len(sobreviventes) // fator)]]
+        degraus.append({"degrau": degrau, "fracao": fracao, "resultados": resultados, "promovidos": promovidos})
+        sobreviventes = promovidos
+
+    return {"resultados": resultados, "degraus": degraus}
+
+
+def registra_degraus(busca, recurso="amostras", fator=3):
+    """Registra a busca sucessiva no MLflow: um run pai e um run aninhado por
+    degrau, com um run aninhado por configuração avaliada e a decisão tomada
+    """
+    import mlflow
+
+    with mlflow.start_run(run_name="busca_sucessiva"):
+        mlflow.log_params({"recurso": recurso, "fator": fator, "degraus": len(busca["degraus"])})
+        for degrau in busca["degraus"]:
+            with mlflow.start_run(run_name=f"degrau_{degrau['degrau'] + 1}", nested=True):
+                mlflow.log_params({"fracao_recurso": degrau["fracao"], "candidatas": len(degrau["resultados"])})
+                for resultado in degrau["resultados"]:
+                    with mlflow.start_run(run_name=f"config_{resultado['indice'] + 1}", nested=True):
+                        mlflow.log_params(resultado["config"])
+                        mlflow.log_metrics({
+                            "cv_score_mean": float(np.nanmean(resultado["scores"])),
+                            "cv_score_std": float(np.nanstd(resultado["scores"])),
+                            "fit_cpu_seconds": resultado["tempo_cpu"]
+                        })
+                        mlflow.set_tag("promovida", resultado["indice"] in degrau["promovidos"])
@@ -2,11 +2,14 @@ import mlflow
 import mlflow.sklearn
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
-from sklearn.model_selection import cross_val_score, StratifiedKFold
+from sklearn.model_selection import StratifiedKFold
 import os
 import json
+from src.config import SEARCH_MODE, HALVING_FACTOR, HALVING_RESOURCE, FINAL_MODEL, NEGATIVE_SAMPLING_RATE, OOF_DIR
+from src.data.store import carrega_conjunto
+from src.training.evaluation import avalia_limiares, metricas_no_limiar, registra_avaliacao
+from src.training.mlflow_logger import RegistradorMlflow
+from src.training.search import executa_busca, busca_sucessiva, registra_degraus, salva_oof
 
 # Configurações que vamos testar
 CONFIGS = [
@@ -36,71 +39,79 @@ CONFIGS = [
 def carrega_dados():
     """Carrega os dados processados"""
     print("Carregando dados...")
-    X_train = np.load('data/processed/X_train.npy')
-    X_test = np.load('data/processed/X_test.npy')
-    y_train = np.load('data/processed/y_train.npy')
-    y_test = np.load('data/processed/y_test.npy')
+    dados = carrega_conjunto('data/processed')
+    X_train, X_test = dados['X_train'], dados['X_test']
+    y_train, y_test = dados['y_train'], dados['y_test']
     print(f"Dados carregados. Tamanho do treino: {X_train.shape}")
     return X_train, X_test, y_train, y_test
 
-def calcula_metricas(y_true, y_pred, y_pred_proba):
-    """Calcula as métricas de avaliação"""
+def calcula_metricas(avaliacao):
+    """Métricas de avaliação no limiar de predict(), a partir da varredura de limiares"""
+    pontuais = metricas_no_limiar(avaliacao)
     return {
-        "acuracia": accuracy_score(y_true, y_pred),
-        "precisao": precision_score(y_true, y_pred),
-        "recall": recall_score(y_true, y_pred),
-        "f1": f1_score(y_true, y_pred),
-        "roc_auc": roc_auc_score(y_true, y_pred_proba)
+        "acuracia": pontuais["acuracia"],
+        "precisao": pontuais["precisao"],
+        "recall": pontuais["recall"],
+        "f1": pontuais["f1"],
+        "roc_auc": pontuais["roc_auc"],
+        "pr_auc": pontuais["pr_auc"],
+        "custo": pontuais["custo"]
     }
 
-def salva_importancia(modelo, X_train):
-    """Salva a importância das features"""
+def salva_importancia(modelo, X_train, registrador):
+    """Agenda o envio da importância das features ao MLflow (importancia_features.csv)"""
     importancia = pd.DataFrame({
         'feature': [f'V{i}' for i in range(X_train.shape[1])],
         'importancia': modelo.feature_importances_
     }).sort_values('importancia', ascending=False)
-    
-    arquivo = 'data/processed/importancia_features.csv'
-    importancia.to_csv(arquivo, index=False)
-    mlflow.log_artifact(arquivo)
 
-def treina_e_avalia(config, X_train, X_test, y_train, y_test, cv):
-    """Treina e avalia um modelo com uma configuração específica"""
-    with mlflow.start_run(nested=True):
+    def gera(diretorio):
+        arquivo = os.path.join(diretorio, 'importancia_features.csv')
+        importancia.to_csv(arquivo, index=False)
+        return arquivo
+
+    registrador.artefato(gera)
+
+def treina_e_avalia(resultado, X_train, X_test, y_train, y_test):
+    """Avalia e registra uma configuração já validada e ajustada pela busca"""
+    config = resultado["config"]
+    # Chamadas ao MLflow vão em lote por uma thread em segundo plano (exceto log_model)
+    with mlflow.start_run(nested=True) as run, RegistradorMlflow(run.info.run_id) as registrador:
         # Registra parâmetros
-        mlflow.log_params(config)
-        
-        # Treina modelo
-        print("Treinando...")
-        modelo = RandomForestClassifier(**config, random_state=42)
+        registrador.params({**config, "negative_sampling_rate": NEGATIVE_SAMPLING_RATE})
         
-        # Validação cruzada
-        print("Validando...")
-        scores_cv = cross_val_score(modelo, X_train, y_train, cv=cv, scoring='roc_auc')
+        modelo = resultado["modelo"]
+        scores_cv = resultado["scores"]
         media_score = scores_cv.mean()
         std_score = scores_cv.std()
         
-        mlflow.log_metric("media_score", media_score)
-        mlflow.log_metric("std_score", std_score)
+        registrador.metricas({
+            "media_score": media_score,
+            "std_score": std_score,
+            "tempo_cpu": resultado["tempo_cpu"]
+        })
+        # Configurações do mesmo grupo são instantâneos de uma única floresta (warm_start)
+        registrador.tags({"forest_group": resultado["grupo"], "final_model": FINAL_MODEL})
         
-        # Treina com todos os dados
-        print("Treinando modelo final...")
-        modelo.fit(X_train, y_train)
+        # Probabilidades fora do fold, para escolher limiar e calibrar sem o teste
+        caminho_oof = salva_oof(resultado, y_train, f"{OOF_DIR}/config_{resultado['indice'] + 1}")
+        registrador.artefato(lambda _: caminho_oof, "oof")
+        registra_avaliacao(avalia_limiares(y_train, resultado["oof"]), registrador, prefixo="oof_")
         
         # Avalia no conjunto de teste
         print("Calculando métricas...")
-        pred = modelo.predict(X_test)
         pred_proba = modelo.predict_proba(X_test)[:, 1]
         
-        # Calcula métricas
-        metricas = calcula_metricas(y_test, pred, pred_proba)
-        for nome, valor in metricas.items():
-            mlflow.log_metric(nome, valor)
+        # Calcula métricas em todos os limiares com uma única ordenação dos scores
+        avaliacao = avalia_limiares(y_test, pred_proba)
+        metricas = calcula_metricas(avaliacao)
+        registrador.metricas(metricas)
+        registra_avaliacao(avaliacao, registrador, prefixo="")
         
         # Salva modelo e importância
         print("Salvando modelo...")
         mlflow.sklearn.log_model(modelo, "modelo_fraude")
-        salva_importancia(modelo, X_train)
+        salva_importancia(modelo, X_train, registrador)
         
         # Mostra resultados
         print("\nResultados desta configuração:")
@@ -109,6 +120,7 @@ def treina_e_avalia(config, X_train, X_test, y_train, y_test, cv):
         print(f"Precisão: {metricas['precisao']:.4f}")
         print(f"Recall: {metricas['recall']:.4f}")
         print(f"F1-Score: {metricas['f1']:.4f}")
+        print(f"PR AUC: {metricas['pr_auc']:.4f}")
         
         return modelo, metricas["roc_auc"]
 
@@ -132,13 +144,29 @@ def treina_modelo():
     melhor_config = None
     melhor_modelo = None
     
-    # Testa cada configuração
+    # Valida e ajusta todas as configurações em paralelo
+    # (com FINAL_MODEL=folds o modelo é o ensemble dos folds, sem ajuste final)
     print("\nTestando diferentes configurações...")
-    for i, config in enumerate(CONFIGS, 1):
+    ajuste_final = FINAL_MODEL != "folds"
+    if SEARCH_MODE == "halving":
+        busca = busca_sucessiva(
+            CONFIGS, X_train, y_train, cv, scoring='roc_auc', random_state=42,
+            fator=HALVING_FACTOR, recurso=HALVING_RESOURCE, ajuste_final=ajuste_final,
+            taxa_negativos=NEGATIVE_SAMPLING_RATE
+        )
+        registra_degraus(busca, HALVING_RESOURCE, HALVING_FACTOR)
+        resultados = busca["resultados"]
+    else:
+        resultados = executa_busca(
+            CONFIGS, X_train, y_train, cv, scoring='roc_auc', random_state=42, ajuste_final=ajuste_final,
+            taxa_negativos=NEGATIVE_SAMPLING_RATE
+        )
+    for resultado in resultados:
+        i, config = resultado["indice"] + 1, resultado["config"]
         print(f"\n=== Configuração {i}/{len(CONFIGS)} ===")
         print(f"Parâmetros: {config}")
         
-        modelo, score = treina_e_avalia(config, X_train, X_test, y_train, y_test, cv)
+        modelo, score = treina_e_avalia(resultado, X_train, X_test, y_train, y_test)
         
         if score > melhor_score:
             melhor_score = score
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Permite importar o pacote src ao rodar `pytest tests/` a partir da raiz
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture(scope='session')
+def dados_sinteticos():
+    """Matriz sintética com 29 features e classe minoritária"""
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(2000, 29))
+    y = ((X[:, 0] + 0.5 * X[:, 3] - X[:, 7]) > 1.8).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope='session')
+def floresta_sklearn(dados_sinteticos):
+    """Floresta pequena treinada na hora, no formato de MODEL_CONFIGS"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = dados_sinteticos
+    modelo = RandomForestClassifier(
+        n_estimators=25,
+        max_depth=8,
+        min_samples_leaf=2,
+        class_weight='balanced',
+        random_state=42
+    )
+    return modelo.fit(X, y)
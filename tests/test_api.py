@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import src.api.app as api
+from src.config import FRAUD_THRESHOLD
+from src.inference.compiled_forest import compila_floresta
+from src.inference.loader import ModeloServido
+
+
+def test_prediz_valida_formato_e_usa_o_limite(floresta_sklearn, dados_sinteticos, monkeypatch):
+    X, _ = dados_sinteticos
+    floresta = compila_floresta(floresta_sklearn)
+    monkeypatch.setattr(api, "modelo_servido", ModeloServido(lambda: floresta))
+    monkeypatch.setattr(api, "MICROBATCH_ENABLED", False)
+    cliente = TestClient(api.app)
+
+    resposta = cliente.post('/prediz', json={'features': X[0].tolist()})
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert corpo['prob_fraude'] == pytest.approx(floresta_sklearn.predict_proba(X[:1])[0, 1])
+    assert corpo['limite'] == FRAUD_THRESHOLD
+    assert corpo['eh_fraude'] == (corpo['prob_fraude'] > FRAUD_THRESHOLD)
+
+    # Formato inválido é erro do cliente, não do servidor
+    assert cliente.post('/prediz', json={'features': [1.0, 2.0]}).status_code == 422
+
+
+@pytest.mark.parametrize("valor", [np.nan, np.inf])
+def test_predicao_unica_recusa_valores_nao_finitos(floresta_sklearn, dados_sinteticos, monkeypatch, valor):
+    """Flask responde 400 e FastAPI 422, sem pontuar a transação"""
+    import src.serve as serve
+
+    X, _ = dados_sinteticos
+    floresta = compila_floresta(floresta_sklearn)
+    linha = X[0].copy()
+    linha[0] = valor
+    corpo = linha.astype('<f8').tobytes()
+    monkeypatch.setattr(serve, "modelo_servido", ModeloServido(lambda: floresta))
+    monkeypatch.setattr(api, "modelo_servido", ModeloServido(lambda: floresta))
+
+    resposta = serve.app.test_client().post('/predict', data=corpo, content_type='application/octet-stream')
+    assert resposta.status_code == 400
+    resposta = TestClient(api.app).post('/prediz', content=corpo, headers={'Content-Type': 'application/octet-stream'})
+    assert resposta.status_code == 422
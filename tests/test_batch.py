@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from src.inference.batch import prepara_lote, pontua_lote
+from src.inference.compiled_forest import compila_floresta
+from src.inference.loader import ModeloServido
+
+
+@pytest.fixture(scope='module')
+def floresta_5_features(dados_sinteticos):
+    """Floresta treinada com apenas 5 features, para validar contra n_features_in_"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = dados_sinteticos
+    return RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X[:, :5], y)
+
+
+def test_prepara_lote_separa_linhas_invalidas(dados_sinteticos):
+    X, _ = dados_sinteticos
+    linhas = [X[0].tolist(), [1.0, 2.0], ["a"] * 29, [np.nan] * 29, X[1].tolist()]
+
+    validas, indices, erros = prepara_lote(linhas, 29)
+
+    np.testing.assert_array_equal(validas, X[:2])
+    np.testing.assert_array_equal(indices, [0, 4])
+    assert [e['indice'] for e in erros] == [1, 2, 3]
+
+    # Matriz retangular: caminho rápido, só as linhas não finitas saem
+    matriz = X[:3].copy()
+    matriz[1, 5] = np.inf
+    validas, indices, erros = prepara_lote(matriz, 29)
+    np.testing.assert_array_equal(indices, [0, 2])
+    assert erros == [{'indice': 1, 'erro': 'Features contêm valores não finitos.'}]
+
+
+def test_pontua_lote_marca_invalidas_com_none(floresta_sklearn, dados_sinteticos):
+    X, _ = dados_sinteticos
+    esperado = floresta_sklearn.predict_proba(X[:2])[:, 1]
+
+    resultado = pontua_lote(floresta_sklearn, [X[0].tolist(), [0.0], X[1].tolist()], 29, 0.5)
+
+    assert resultado['prob_fraude'][1] is None and resultado['eh_fraude'][1] is None
+    np.testing.assert_allclose([resultado['prob_fraude'][i] for i in (0, 2)], esperado)
+    assert resultado['eh_fraude'][0] == bool(esperado[0] > 0.5)
+    assert [e['indice'] for e in resultado['erros']] == [1]
+
+    # Nenhuma linha válida: predict_proba não é chamado
+    resultado = pontua_lote(None, [[0.0]], 29, 0.5)
+    assert resultado['prob_fraude'] == [None] and len(resultado['erros']) == 1
+
+
+def test_lote_flask(floresta_sklearn, floresta_5_features, dados_sinteticos, monkeypatch):
+    import src.serve as serve
+
+    X, _ = dados_sinteticos
+    floresta = compila_floresta(floresta_sklearn)
+    monkeypatch.setattr(serve, "modelo_servido", ModeloServido(lambda: floresta))
+    cliente = serve.app.test_client()
+    esperado = floresta_sklearn.predict_proba(X[:4])[:, 1]
+
+    resposta = cliente.post('/predict/batch', json={'features': X[:4].tolist()})
+    assert resposta.status_code == 200
+    np.testing.assert_allclose(resposta.get_json()['prob_fraude'], esperado)
+
+    # Corpo binário N×F
+    resposta = cliente.post('/predict/batch', data=X[:4].astype('<f8').tobytes(),
+                            content_type='application/octet-stream')
+    np.testing.assert_allclose(resposta.get_json()['prob_fraude'], esperado)
+    resposta = cliente.post('/predict/batch', data=X[0, :5].astype('<f8').tobytes(),
+                            content_type='application/octet-stream')
+    assert resposta.status_code == 400
+
+    monkeypatch.setattr(serve, "BATCH_MAX_SIZE", 3)
+    assert cliente.post('/predict/batch', json={'features': X[:4].tolist()}).status_code == 413
+
+    # A validação segue o modelo servido, não NUM_FEATURES
+    monkeypatch.setattr(serve, "modelo_servido", ModeloServido(lambda: floresta_5_features))
+    resposta = cliente.post('/predict/batch', json={'features': [X[0, :5].tolist(), X[1].tolist()]})
+    assert resposta.status_code == 200
+    assert [e['indice'] for e in resposta.get_json()['erros']] == [1]
+
+
+def test_lote_fastapi(floresta_sklearn, floresta_5_features, dados_sinteticos, monkeypatch):
+    from fastapi.testclient import TestClient
+    import src.api.app as api
+
+    X, _ = dados_sinteticos
+    floresta = compila_floresta(floresta_sklearn)
+    monkeypatch.setattr(api, "modelo_servido", ModeloServido(lambda: floresta))
+    cliente = TestClient(api.app)  # Sem o startup: o modelo vem do ModeloServido acima
+    esperado = floresta_sklearn.predict_proba(X[:4])[:, 1]
+
+    resposta = cliente.post('/prediz/lote', json={'features': X[:4].tolist()})
+    assert resposta.status_code == 200
+    np.testing.assert_allclose(resposta.json()['prob_fraude'], esperado)
+
+    resposta = cliente.post('/prediz/lote', content=X[:4].astype('<f8').tobytes(),
+                            headers={'Content-Type': 'application/octet-stream'})
+    np.testing.assert_allclose(resposta.json()['prob_fraude'], esperado)
+    resposta = cliente.post('/prediz/lote', content=X[0, :5].astype('<f8').tobytes(),
+                            headers={'Content-Type': 'application/octet-stream'})
+    assert resposta.status_code == 422
+
+    monkeypatch.setattr(api, "BATCH_MAX_SIZE", 3)
+    assert cliente.post('/prediz/lote', json={'features': X[:4].tolist()}).status_code == 413
+
+    monkeypatch.setattr(api, "modelo_servido", ModeloServido(lambda: floresta_5_features))
+    resposta = cliente.post('/prediz/lote', json={'features': [X[0, :5].tolist(), X[1].tolist()]})
+    assert resposta.status_code == 200
+    assert [e['indice'] for e in resposta.json()['erros']] == [1]
@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.inference.cache import CachePredicoes, BackendMemoria, chave_predicao
+
+
+class Relogio:
+    """Relógio controlado manualmente para testar o TTL"""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_chave_depende_do_vetor_e_da_versao():
+    """Vetores idênticos compartilham a chave, desde que o modelo seja o mesmo"""
+    x = np.linspace(-1.0, 1.0, 29)
+
+    assert chave_predicao(x, 'v1') == chave_predicao(x.tolist(), 'v1')
+    assert chave_predicao(x, 'v1') != chave_predicao(x, 'v2')
+    assert chave_predicao(x, 'v1') != chave_predicao(x + 1e-12, 'v1')
+
+
+def test_lru_respeita_capacidade_e_ttl():
+    """Entradas antigas saem por capacidade e entradas vencidas por TTL"""
+    relogio = Relogio()
+    cache = CachePredicoes(max_itens=2, ttl=10, relogio=relogio)
+
+    cache.guarda(b'a', 0.1)
+    cache.guarda(b'b', 0.2)
+    assert cache.obtem(b'a') == 0.1  # 'a' passa a ser o mais recente
+    cache.guarda(b'c', 0.3)
+
+    assert cache.obtem(b'b') is None
+    assert cache.obtem(b'a') == 0.1
+    assert len(cache) == 2
+
+    relogio.agora = 11
+    assert cache.obtem(b'c') is None
+
+
+def test_limpa_ao_recarregar_o_modelo():
+    """limpa() descarta todas as predições do modelo anterior"""
+    cache = CachePredicoes(max_itens=10, ttl=60)
+    cache.guarda(b'a', 0.5)
+
+    cache.limpa('arquivo:novo')
+
+    assert cache.obtem(b'a') is None
+
+
+def test_backend_compartilhado_entre_workers():
+    """Uma predição feita por um worker é reaproveitada pelo outro"""
+    backend = BackendMemoria()
+    worker_1 = CachePredicoes(max_itens=10, ttl=60, backend=backend)
+    worker_2 = CachePredicoes(max_itens=10, ttl=60, backend=backend)
+
+    worker_1.guarda(b'transacao', 0.75)
+
+    assert worker_2.obtem(b'transacao') == 0.75
+    assert len(worker_2) == 1
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from src.inference.codecs import decodifica, codifica, FormatoNaoSuportado
+
+
+def test_corpo_binario_equivale_ao_json():
+    """float32/float64 crus decodificam para o mesmo vetor enviado em JSON"""
+    x = np.linspace(-1.0, 1.0, 29)
+
+    json = decodifica(b'{"features": %s}' % str(x.tolist()).encode(), "application/json")
+    f64 = decodifica(x.tobytes(), "application/octet-stream")
+    f32 = decodifica(x.astype('<f4').tobytes(), "application/octet-stream; dtype=float32")
+
+    np.testing.assert_array_equal(f64["features"], json["features"])
+    np.testing.assert_array_equal(f32["features"], x.astype(np.float32))
+
+
+def test_formatos_invalidos():
+    """Content-Type desconhecido, dtype não suportado e corpo truncado"""
+    with pytest.raises(FormatoNaoSuportado):
+        decodifica(b"1,2", "text/csv")
+    with pytest.raises(FormatoNaoSuportado):
+        decodifica(b"\x00" * 8, "application/octet-stream; dtype=int64")
+    with pytest.raises(ValueError):
+        decodifica(b"\x00" * 7, "application/octet-stream")
+
+
+def test_resposta_binaria_de_lote():
+    """Accept binário devolve só as probabilidades, com NaN nas linhas inválidas"""
+    corpo, tipo = codifica(
+        {"prob_fraude": [0.25, None], "eh_fraude": [False, None], "erros": []},
+        "application/octet-stream"
+    )
+
+    assert tipo == "application/octet-stream"
+    np.testing.assert_array_equal(np.frombuffer(corpo), [0.25, np.nan])
+    assert codifica({"prob_fraude": 0.25}, None)[1] == "application/json"
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.data import columnar
+from src.data.columnar import carrega_bruto, atualiza_colunar, le_colunar
+
+
+def escreve_csv(caminho, n=500, semente=0):
+    rng = np.random.default_rng(semente)
+    dados = pd.DataFrame(rng.normal(size=(n, 3)), columns=["Time", "V1", "Amount"])
+    dados["Class"] = (rng.random(n) < 0.1).astype(int)
+    dados.to_csv(caminho, index=False)
+    return dados
+
+
+def test_copia_colunar_tipada_e_com_colunas_selecionadas(tmp_path):
+    """float32 nas features, uint8 na classe e leitura só das colunas pedidas"""
+    csv = str(tmp_path / "creditcard.csv")
+    esperado = escreve_csv(csv)
+
+    dados = carrega_bruto(csv)
+    parcial = carrega_bruto(csv, colunas=["V1", "Class"])
+
+    assert os.path.exists(str(tmp_path / "creditcard.arrow"))
+    assert dados["V1"].dtype == np.float32 and dados["Class"].dtype == np.uint8
+    np.testing.assert_allclose(dados["Amount"], esperado["Amount"], rtol=1e-6)
+    np.testing.assert_array_equal(dados["Class"], esperado["Class"])
+    assert list(parcial.columns) == ["V1", "Class"]
+
+
+def test_leitura_sem_pyarrow_tem_os_mesmos_tipos(tmp_path, monkeypatch):
+    csv = str(tmp_path / "creditcard.csv")
+    escreve_csv(csv)
+    colunar = carrega_bruto(csv)
+
+    monkeypatch.setattr(columnar, "pa", None)
+    dados = carrega_bruto(csv)
+
+    assert dict(dados.dtypes) == dict(colunar.dtypes)
+    np.testing.assert_array_equal(dados.to_numpy(), colunar.to_numpy())
+
+
+def test_csv_alterado_refaz_a_copia(tmp_path):
+    """Só o mtime mudou: mantém; conteúdo mudou: converte de novo"""
+    csv, destino = str(tmp_path / "creditcard.csv"), str(tmp_path / "creditcard.arrow")
+    escreve_csv(csv)
+    assert atualiza_colunar(csv, destino)
+    assert not atualiza_colunar(csv, destino)
+
+    os.utime(csv, ns=(0, 1))
+    assert not atualiza_colunar(csv, destino)
+
+    novo = escreve_csv(csv, n=400, semente=1)
+    assert atualiza_colunar(csv, destino)
+    assert le_colunar(destino).num_rows == len(novo)
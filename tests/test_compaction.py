@@ -0,0 +1,81 @@
+import numpy as np
+
+from src.inference.compiled_forest import carrega_floresta, compila_floresta, salva_floresta
+from src.training.compaction import (
+    compacta_floresta, funde_folhas, poda_arvores, probabilidades_por_arvore, quantiza,
+    seleciona_arvores, tamanho_bytes
+)
+
+
+def test_quantizacao_mantem_os_caminhos(floresta_sklearn, dados_sinteticos, tmp_path):
+    """Limiares float32 arredondados para baixo levam às mesmas folhas com entrada float32"""
+    X, _ = dados_sinteticos
+    floresta = compila_floresta(floresta_sklearn)
+    compacta = quantiza(floresta)
+
+    assert compacta.feature.dtype == np.uint8 and compacta.limiar.dtype == np.float32
+    assert compacta.filhos.itemsize < floresta.filhos.itemsize and compacta.valor.dtype == np.float32
+    assert tamanho_bytes(compacta) < tamanho_bytes(floresta) / 2
+    np.testing.assert_array_equal(compacta.apply(X), floresta.apply(X))
+    np.testing.assert_allclose(compacta.predict_proba(X), floresta_sklearn.predict_proba(X), atol=1e-6)
+
+    salva_floresta(compacta, tmp_path / "compacta")
+    np.testing.assert_array_equal(carrega_floresta(tmp_path / "compacta").apply(X), floresta.apply(X))
+
+
+def test_selecao_e_fusao_de_folhas(floresta_sklearn, dados_sinteticos):
+    X, _ = dados_sinteticos
+    floresta = compila_floresta(floresta_sklearn)
+
+    selecionada = seleciona_arvores(floresta, [3, 0, 7])
+    esperado = np.mean([floresta_sklearn.estimators_[i].predict_proba(X) for i in (0, 3, 7)], axis=0)
+    np.testing.assert_allclose(selecionada.predict_proba(X), esperado, atol=1e-12)
+
+    # Tolerância 0 só funde folhas idênticas: predições inalteradas
+    np.testing.assert_array_equal(funde_folhas(floresta, 0.0).predict_proba(X), floresta.predict_proba(X))
+    fundida = funde_folhas(floresta, 0.05)
+    assert fundida.n_nos < floresta.n_nos
+    assert np.abs(fundida.predict_proba(X) - floresta.predict_proba(X)).max() <= 0.05
+
+
+def test_poda_respeita_a_tolerancia(floresta_sklearn, dados_sinteticos):
+    X, y = dados_sinteticos
+    floresta = compila_floresta(floresta_sklearn)
+    probabilidades = probabilidades_por_arvore(floresta, X[1000:])
+
+    mantidas, historico = poda_arvores(probabilidades, y[1000:], tolerancia=0.01)
+    assert 1 <= len(mantidas) < floresta.n_arvores
+    assert len(historico) == floresta.n_arvores - len(mantidas) + 1
+    assert min(historico) >= historico[0] - 0.01
+
+    compacta, resumo = compacta_floresta(floresta, X[1000:], y[1000:], tolerancia=0.01)
+    assert resumo["n_trees_compact"] == len(mantidas) == compacta.n_arvores
+    assert resumo["memory_bytes_compact"] < resumo["memory_bytes_original"]
+
+
+def test_compacta_modelo_aceita_o_artefato_com_scaler(floresta_sklearn, dados_sinteticos, tmp_path, monkeypatch):
+    """Com INFERENCE_MODEL_PATH (espaço bruto) o teste é desnormalizado e os limiares ficam em float64"""
+    import joblib
+    from sklearn.preprocessing import StandardScaler
+    from src.data import store
+    from src.inference.compiled_forest import incorpora_scaler
+    from src.training import compaction
+
+    X, y = dados_sinteticos
+    scaler = StandardScaler().fit(X * 100.0 + 5.0)
+    joblib.dump(scaler, tmp_path / "scaler.joblib")
+    bruto = str(tmp_path / "modelo_inferencia")
+    salva_floresta(incorpora_scaler(compila_floresta(floresta_sklearn), scaler), bruto)
+    monkeypatch.setattr(compaction, "SCALER_PATH", str(tmp_path / "scaler.joblib"))
+    monkeypatch.setattr(store, "carrega_conjunto", lambda diretorio, nomes: {"X_test": X, "y_test": y})
+
+    destino = str(tmp_path / "compacto")
+    resultado = compaction.compacta_modelo(bruto, destino, tolerancia=0.0, registra=False)
+
+    compacta = carrega_floresta(destino)
+    assert compacta.limiar.dtype == np.float64
+    assert resultado["test_pr_auc_compact"] >= resultado["test_pr_auc_original"] - 0.01
+    # Sem arredondar os limiares, a quantização não muda nenhum caminho em float64
+    original = carrega_floresta(bruto)
+    X_bruto = scaler.inverse_transform(X)
+    np.testing.assert_array_equal(quantiza(original).apply(X_bruto), original.apply(X_bruto))
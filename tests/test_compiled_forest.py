@@ -0,0 +1,131 @@
+import numpy as np
+import joblib
+import pytest
+
+from src.inference.compiled_forest import (
+    FlorestaCompilada, compila_floresta, carrega_modelo_inferencia,
+    incorpora_scaler, salva_floresta
+)
+
+
+def test_paridade_lote(floresta_sklearn, dados_sinteticos):
+    """A floresta compilada reproduz o predict_proba do sklearn em lote"""
+    X, _ = dados_sinteticos
+    compilada = compila_floresta(floresta_sklearn)
+
+    np.testing.assert_allclose(
+        compilada.predict_proba(X), floresta_sklearn.predict_proba(X), rtol=0, atol=1e-12
+    )
+    np.testing.assert_array_equal(compilada.predict(X), floresta_sklearn.predict(X))
+
+
+def test_paridade_linha_unica(floresta_sklearn, dados_sinteticos):
+    """O caminho rápido de uma linha devolve o mesmo resultado do lote"""
+    X, _ = dados_sinteticos
+    compilada = compila_floresta(floresta_sklearn)
+
+    for x in X[:50]:
+        np.testing.assert_allclose(
+            compilada.predict_proba(x.reshape(1, -1)),
+            floresta_sklearn.predict_proba(x.reshape(1, -1)),
+            rtol=0, atol=1e-12
+        )
+
+
+def test_paridade_arvores_sem_limite_de_profundidade(dados_sinteticos):
+    """Árvores profundas e desbalanceadas também são percorridas até a folha"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = dados_sinteticos
+    modelo = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    compilada = compila_floresta(modelo)
+
+    np.testing.assert_allclose(
+        compilada.predict_proba(X), modelo.predict_proba(X), rtol=0, atol=1e-12
+    )
+
+
+def test_motor_sklearn_desativa_compilacao(floresta_sklearn, tmp_path):
+    """Com o motor 'sklearn' o estimador original é usado sem compilação"""
+    caminho = tmp_path / 'modelo.joblib'
+    joblib.dump(floresta_sklearn, caminho)
+
+    assert isinstance(carrega_modelo_inferencia(caminho, motor='compiled'), FlorestaCompilada)
+    assert not isinstance(carrega_modelo_inferencia(caminho, motor='sklearn'), FlorestaCompilada)
+
+
+def test_scaler_incorporado_paridade_no_teste(dados_sinteticos, tmp_path):
+    """Floresta com scaler incorporado equivale a scaler + modelo no conjunto de teste"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    X, y = dados_sinteticos
+    # Features brutas com escalas e deslocamentos bem diferentes
+    X_bruto = X * np.linspace(0.01, 500.0, X.shape[1]) + np.linspace(-1000.0, 1000.0, X.shape[1])
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_bruto, y, test_size=0.2, random_state=42, stratify=y
+    )
+    scaler = StandardScaler().fit(X_train)
+    modelo = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=42)
+    modelo.fit(scaler.transform(X_train), y_train)
+
+    caminho = tmp_path / 'modelo_inferencia.npz'
+    salva_floresta(incorpora_scaler(compila_floresta(modelo), scaler), caminho)
+    floresta = carrega_modelo_inferencia(caminho)
+
+    np.testing.assert_allclose(
+        floresta.predict_proba(X_test),
+        modelo.predict_proba(scaler.transform(X_test)),
+        rtol=0, atol=1e-12
+    )
+
+
+def test_formato_diretorio_mapeado_em_memoria(floresta_sklearn, dados_sinteticos, tmp_path):
+    """O diretório exportado é aberto com mmap e pontua igual ao original"""
+    X, _ = dados_sinteticos
+    caminho = tmp_path / 'modelo_inferencia'
+    salva_floresta(compila_floresta(floresta_sklearn), caminho)
+
+    floresta = carrega_modelo_inferencia(caminho)
+
+    assert isinstance(floresta.limiar.base, np.memmap)
+    np.testing.assert_allclose(
+        floresta.predict_proba(X), floresta_sklearn.predict_proba(X), rtol=0, atol=1e-12
+    )
+
+
+def test_exportacao_so_salva_com_paridade(floresta_sklearn, dados_sinteticos, tmp_path, monkeypatch):
+    """Acima da tolerância a exportação falha e não grava o artefato"""
+    from sklearn.preprocessing import StandardScaler
+    from src.inference import export_model
+
+    X, _ = dados_sinteticos
+    joblib.dump(floresta_sklearn, tmp_path / 'modelo.joblib')
+    joblib.dump(StandardScaler(with_mean=False, with_std=False).fit(X), tmp_path / 'scaler.joblib')
+    monkeypatch.setattr(export_model, 'carrega_conjunto', lambda diretorio, nomes: {'X_test': X[:200]})
+
+    def exporta(destino, tolerancia):
+        return export_model.exporta_modelo(
+            tmp_path / 'modelo.joblib', tmp_path / 'scaler.joblib', tmp_path / destino, tolerancia
+        )
+
+    assert exporta('ok', 1e-9).max() <= 1e-9
+    assert (tmp_path / 'ok').exists()
+    with pytest.raises(ValueError, match='Paridade'):
+        exporta('falha', -1.0)
+    assert not (tmp_path / 'falha').exists()
+
+
+@pytest.mark.parametrize("valor", [np.nan, np.inf, -np.inf])
+def test_valores_nao_finitos_sao_rejeitados(floresta_sklearn, dados_sinteticos, valor):
+    """A travessia compilada não trata NaN como o sklearn: a entrada é recusada"""
+    X, _ = dados_sinteticos
+    compilada = compila_floresta(floresta_sklearn)
+    linha = X[:3].copy()
+    linha[1, 0] = valor
+
+    with pytest.raises(ValueError, match="não finitos"):
+        compilada.predict_proba(linha[1])
+    with pytest.raises(ValueError, match="não finitos"):
+        compilada.predict_proba(linha)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    accuracy_score, average_precision_score, confusion_matrix, f1_score,
+    precision_score, recall_score, roc_auc_score
+)
+
+from src.training.evaluation import (
+    avalia_limiares, matriz_confusao, melhores_limiares, metricas_no_limiar, tabela_limiares
+)
+
+
+@pytest.fixture(scope='module')
+def scores_teste(floresta_sklearn, dados_sinteticos):
+    X, y = dados_sinteticos
+    return y, floresta_sklearn.predict_proba(X)[:, 1]
+
+
+def test_metricas_iguais_ao_sklearn(scores_teste, floresta_sklearn, dados_sinteticos):
+    """AUCs e métricas no limiar de predict() batem com sklearn.metrics"""
+    y, scores = scores_teste
+    pred = floresta_sklearn.predict(dados_sinteticos[0])
+    avaliacao = avalia_limiares(y, scores)
+    metricas = metricas_no_limiar(avaliacao)
+
+    assert avaliacao["roc_auc"] == pytest.approx(roc_auc_score(y, scores))
+    assert avaliacao["pr_auc"] == pytest.approx(average_precision_score(y, scores))
+    assert metricas["acuracia"] == pytest.approx(accuracy_score(y, pred))
+    assert metricas["precisao"] == pytest.approx(precision_score(y, pred))
+    assert metricas["recall"] == pytest.approx(recall_score(y, pred))
+    assert metricas["f1"] == pytest.approx(f1_score(y, pred))
+    np.testing.assert_array_equal(matriz_confusao(metricas), confusion_matrix(y, pred))
+
+
+def test_varredura_confere_com_cada_limiar():
+    """Cada linha da tabela é a matriz de confusão de score >= limiar, com empates agrupados"""
+    rng = np.random.default_rng(0)
+    y = (rng.random(500) < 0.1).astype(int)
+    scores = np.round(rng.random(500) * 0.5 + 0.4 * y, 1)
+    avaliacao = avalia_limiares(y, scores, custo_fp=1, custo_fn=5)
+
+    assert avaliacao["tp"][0] == avaliacao["fp"][0] == 0
+    assert len(avaliacao["limiar"]) == len(np.unique(scores)) + 1
+    for k, limiar in enumerate(avaliacao["limiar"][1:], start=1):
+        pred = scores >= limiar
+        tn, fp, fn, tp = confusion_matrix(y, pred).ravel()
+        assert (avaliacao["tp"][k], avaliacao["fp"][k], avaliacao["fn"][k], avaliacao["tn"][k]) == (tp, fp, fn, tn)
+        assert avaliacao["custo"][k] == fp + 5 * fn
+
+    melhores = melhores_limiares(avaliacao)
+    assert melhores["custo_minimo"] == avaliacao["custo"].min()
+    assert melhores["f1_maximo"] == avaliacao["f1"].max()
+
+
+def test_tabela_compacta_mantem_extremos_e_otimos(scores_teste):
+    y, scores = scores_teste
+    avaliacao = avalia_limiares(y, scores)
+    tabela = tabela_limiares(avaliacao, max_linhas=20)
+
+    assert len(tabela) <= 22
+    assert np.isinf(tabela["limiar"].iloc[0])
+    assert tabela["limiar"].iloc[-1] == scores.min()
+    assert melhores_limiares(avaliacao)["limiar_melhor_f1"] in tabela["limiar"].values
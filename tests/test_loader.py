@@ -0,0 +1,56 @@
+import joblib
+
+from src.inference import loader
+from src.inference.compiled_forest import FlorestaCompilada
+
+
+def test_fonte_local_nao_consulta_o_registro(floresta_sklearn, tmp_path, monkeypatch):
+    """Com MODEL_SOURCE=local e o arquivo presente, o registro nunca é consultado"""
+    caminho = tmp_path / 'modelo.joblib'
+    joblib.dump(floresta_sklearn, caminho)
+
+    def registro_indisponivel(uri, timeout):
+        raise AssertionError("o registro não deveria ser consultado")
+
+    monkeypatch.setattr(loader, 'carrega_do_registro', registro_indisponivel)
+    modelo = loader.carrega_modelo(fonte='local', caminho=str(caminho))
+
+    assert isinstance(modelo, FlorestaCompilada)
+
+
+def test_registro_indisponivel_cai_para_o_arquivo_local(floresta_sklearn, tmp_path, monkeypatch):
+    """Falhas ou timeouts do registro levam ao arquivo local"""
+    caminho = tmp_path / 'modelo.joblib'
+    joblib.dump(floresta_sklearn, caminho)
+    consultas = []
+
+    def registro_lento(uri, timeout):
+        consultas.append(uri)
+        raise TimeoutError(f"Model Registry não respondeu em {timeout}s ({uri})")
+
+    monkeypatch.setattr(loader, 'carrega_do_registro', registro_lento)
+    modelo = loader.carrega_modelo(fonte='registry', caminho=str(caminho))
+
+    assert len(consultas) == 2
+    assert isinstance(modelo, FlorestaCompilada)
+
+
+def test_modelo_servido_carrega_sob_demanda():
+    """ModeloServido só carrega na primeira chamada e reaproveita o resultado"""
+    chamadas = []
+    servido = loader.ModeloServido(lambda: chamadas.append(1) or 'modelo')
+
+    assert not servido.carregado
+    assert servido.obtem() == 'modelo'
+    assert servido.obtem() == 'modelo'
+    assert chamadas == [1]
+
+
+def test_modelo_e_versao_mudam_juntos():
+    """obtem_com_versao devolve sempre o par de uma mesma troca"""
+    servido = loader.ModeloServido(lambda: 'v1')
+    servido.versao = 'arquivo:1'
+    assert servido.obtem_com_versao() == ('v1', 'arquivo:1')
+
+    servido.troca('v2', 'arquivo:2')
+    assert servido.obtem_com_versao() == ('v2', 'arquivo:2')
@@ -0,0 +1,75 @@
+import asyncio
+
+import numpy as np
+
+from src.api.micro_batch import MicroLote
+
+
+def test_requisicoes_concorrentes_sao_agrupadas():
+    """Requisições simultâneas viram um único lote e cada uma recebe o seu resultado"""
+    lotes = []
+
+    def pontua(X):
+        lotes.append(X.shape[0])
+        return X.sum(axis=1)
+
+    micro_lote = MicroLote(pontua, espera_max_us=50_000, tamanho_max=64)
+
+    async def principal():
+        linhas = [np.full(29, float(i)) for i in range(40)]
+        return await asyncio.gather(*[micro_lote.submete(x) for x in linhas])
+
+    resultados = asyncio.run(principal())
+
+    assert resultados == [29.0 * i for i in range(40)]
+    assert sum(lotes) == 40
+    assert max(lotes) > 1
+
+
+def test_erro_no_lote_propaga_para_cada_requisicao():
+    """Uma falha do modelo é entregue a todas as requisições do lote"""
+    def pontua(X):
+        raise ValueError("falha no modelo")
+
+    micro_lote = MicroLote(pontua, espera_max_us=1_000, tamanho_max=8)
+
+    async def principal():
+        return await asyncio.gather(
+            *[micro_lote.submete(np.zeros(29)) for _ in range(3)],
+            return_exceptions=True
+        )
+
+    resultados = asyncio.run(principal())
+    assert all(isinstance(r, ValueError) for r in resultados)
+
+
+def test_troca_de_modelo_no_meio_do_lote_nao_mistura_versoes():
+    """O modelo é lido uma vez por lote: uma recarga pendente vale só para o próximo"""
+    from src.inference.loader import ModeloServido
+
+    modelo_servido = ModeloServido(lambda: "antigo")
+    lidos = []
+
+    def obtem_modelo():
+        modelo = modelo_servido.obtem()
+        lidos.append(modelo)
+        # Recarga concorrente logo depois da leitura do lote
+        modelo_servido.troca("novo")
+        return modelo
+
+    def pontua(modelo, X):
+        return [modelo] * X.shape[0]
+
+    micro_lote = MicroLote(pontua, espera_max_us=50_000, tamanho_max=64,
+                           obtem_modelo=obtem_modelo)
+
+    async def principal():
+        primeiro = await asyncio.gather(*[micro_lote.submete(np.zeros(29)) for _ in range(10)])
+        segundo = await asyncio.gather(*[micro_lote.submete(np.zeros(29)) for _ in range(10)])
+        return primeiro, segundo
+
+    primeiro, segundo = asyncio.run(principal())
+
+    assert lidos == ["antigo", "novo"]
+    assert primeiro == ["antigo"] * 10
+    assert segundo == ["novo"] * 10
@@ -0,0 +1,79 @@
+import os
+import threading
+
+from src.training.mlflow_logger import RegistradorMlflow
+
+
+class ClienteFalso:
+    """Substituto do MlflowClient que registra as chamadas recebidas"""
+
+    def __init__(self, atraso=None, falha=False):
+        self.lotes = []
+        self.artefatos = []
+        self.atraso = atraso
+        self.falha = falha
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        if self.atraso is not None:
+            self.atraso.wait()
+        if self.falha:
+            raise ConnectionError("servidor fora do ar")
+        self.lotes.append((list(metrics), list(params), list(tags)))
+
+    def log_artifact(self, run_id, arquivo, caminho_artefato=None):
+        self.artefatos.append((os.path.basename(arquivo), open(arquivo).read(), caminho_artefato))
+
+
+def test_itens_sao_agrupados_e_enviados_ao_fechar():
+    """Parâmetros, métricas e tags pendentes viram poucos log_batch; artefatos são gerados na thread"""
+    liberado = threading.Event()
+    cliente = ClienteFalso(atraso=liberado)
+
+    def gera(diretorio):
+        arquivo = os.path.join(diretorio, "grafico.txt")
+        with open(arquivo, "w") as f:
+            f.write(threading.current_thread().name)
+        return arquivo
+
+    with RegistradorMlflow("run", cliente=cliente) as registrador:
+        registrador.params({"max_depth": 10})
+        registrador.metricas({f"m{i}": i for i in range(1500)})
+        registrador.tags({"modelo": "rf"})
+        registrador.artefato(gera, "plots")
+        liberado.set()
+
+    metricas = [m for lote in cliente.lotes for m in lote[0]]
+    assert len(metricas) == 1500
+    assert len(cliente.lotes) <= 3
+    assert all(len(lote[0]) <= 1000 for lote in cliente.lotes)
+    assert cliente.artefatos == [("grafico.txt", "mlflow-logger", "plots")]
+
+
+def test_servidor_lento_ou_fora_do_ar_nao_trava_o_treino():
+    """Falhas são contadas e o fechamento respeita o timeout"""
+    cliente = ClienteFalso(falha=True)
+    with RegistradorMlflow("run", cliente=cliente) as registrador:
+        registrador.metricas({"f1": 0.9})
+    assert registrador.falhas == 1
+
+    travado = threading.Event()
+    registrador = RegistradorMlflow("run", cliente=ClienteFalso(atraso=travado), timeout=0.2)
+    registrador.metricas({"f1": 0.9})
+    registrador.fecha()
+    assert registrador._thread.is_alive()
+    travado.set()
+
+
+def test_importancia_e_gerada_no_diretorio_do_artefato(floresta_sklearn, dados_sinteticos, tmp_path, monkeypatch):
+    """salva_importancia não grava nada fora do diretório temporário do registrador"""
+    from src.training.train import salva_importancia
+
+    X, _ = dados_sinteticos
+    monkeypatch.chdir(tmp_path)
+    cliente = ClienteFalso()
+    with RegistradorMlflow("run", cliente=cliente) as registrador:
+        salva_importancia(floresta_sklearn, X, registrador)
+
+    [(nome, conteudo, caminho)] = cliente.artefatos
+    assert nome == "importancia_features.csv" and conteudo.startswith("feature,importancia")
+    assert os.listdir(tmp_path) == []
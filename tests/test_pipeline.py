@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from src.pipeline import Etapa, executa_pipeline
+
+
+def etapas_de_teste(pasta, execucoes):
+    """Duas etapas: gera um arquivo a partir de uma entrada e o transforma"""
+    entrada, meio, fim = (str(pasta / nome) for nome in ("entrada.txt", "meio.txt", "fim.txt"))
+
+    def gera():
+        execucoes.append("gera")
+        with open(entrada) as f, open(meio, "w") as g:
+            g.write(f.read().upper())
+
+    def transforma():
+        execucoes.append("transforma")
+        with open(meio) as f, open(fim, "w") as g:
+            g.write(f.read()[::-1])
+
+    return [
+        Etapa("gera", gera, saidas=[meio], entradas=[entrada], config={"fator": 1}),
+        Etapa("transforma", transforma, saidas=[fim], entradas=[meio]),
+    ], entrada, fim
+
+
+def test_etapas_sem_mudanca_sao_reaproveitadas(tmp_path):
+    """Segunda execução restaura as saídas do cache sem rodar as etapas"""
+    execucoes = []
+    etapas, entrada, fim = etapas_de_teste(tmp_path, execucoes)
+    cache = str(tmp_path / "cache")
+    with open(entrada, "w") as f:
+        f.write("abc")
+
+    executa_pipeline(etapas, cache)
+    os.remove(fim)
+    relatorio = executa_pipeline(etapas, cache)
+
+    assert execucoes == ["gera", "transforma"]
+    assert [item["situacao"] for item in relatorio] == ["cache", "cache"]
+    assert open(fim).read() == "CBA"
+
+
+def test_entrada_alterada_refaz_a_etapa_e_as_dependentes(tmp_path):
+    """Nova entrada muda a chave; o cache antigo não é corrompido"""
+    execucoes = []
+    etapas, entrada, fim = etapas_de_teste(tmp_path, execucoes)
+    cache = str(tmp_path / "cache")
+    with open(entrada, "w") as f:
+        f.write("abc")
+    executa_pipeline(etapas, cache)
+
+    with open(entrada, "w") as f:
+        f.write("xyz!")
+    executa_pipeline(etapas, cache)
+    assert open(fim).read() == "!ZYX"
+
+    with open(entrada, "w") as f:
+        f.write("abc")
+    executa_pipeline(etapas, cache)
+    assert open(fim).read() == "CBA"
+    assert execucoes == ["gera", "transforma"] * 2
+
+
+def test_from_stage_e_force(tmp_path):
+    """a_partir_de refaz a etapa e as seguintes; forca refaz todas"""
+    execucoes = []
+    etapas, entrada, _ = etapas_de_teste(tmp_path, execucoes)
+    cache = str(tmp_path / "cache")
+    with open(entrada, "w") as f:
+        f.write("abc")
+    executa_pipeline(etapas, cache)
+
+    executa_pipeline(etapas, cache, a_partir_de="transforma")
+    assert execucoes[2:] == ["transforma"]
+    executa_pipeline(etapas, cache, forca=True)
+    assert execucoes[3:] == ["gera", "transforma"]
+    with pytest.raises(ValueError):
+        executa_pipeline(etapas, cache, a_partir_de="inexistente")
+
+
+def test_saida_em_diretorio_e_restaurada(floresta_sklearn, tmp_path):
+    """Saídas que são diretórios (floresta mapeável) vão para o cache arquivo a arquivo"""
+    from src.inference.compiled_forest import carrega_floresta, compila_floresta, salva_floresta
+
+    destino = str(tmp_path / "modelo_compacto")
+    execucoes = []
+
+    def compacta():
+        execucoes.append("compacta")
+        salva_floresta(compila_floresta(floresta_sklearn), destino)
+
+    etapas = [Etapa("compact", compacta, saidas=[destino])]
+    cache = str(tmp_path / "cache")
+    executa_pipeline(etapas, cache)
+    os.unlink(destino)
+    relatorio = executa_pipeline(etapas, cache)
+
+    assert execucoes == ["compacta"]
+    assert relatorio[0]["situacao"] == "cache"
+    assert carrega_floresta(destino).n_arvores == len(floresta_sklearn.estimators_)
+
+    # Reexecutar grava uma versão nova sem tocar nos arquivos do cache
+    executa_pipeline(etapas, cache, forca=True)
+    assert execucoes == ["compacta", "compacta"]
+    executa_pipeline(etapas, cache)
+    assert carrega_floresta(destino).n_arvores == len(floresta_sklearn.estimators_)
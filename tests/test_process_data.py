@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from src.data.process_data import processa_dados_streaming, eh_teste
+from src.data.store import carrega_conjunto
+
+
+def escreve_csv(dados_sinteticos, caminho):
+    X, y = dados_sinteticos
+    dados = pd.DataFrame(X, columns=[f"V{i}" for i in range(X.shape[1])])
+    dados["Class"] = y
+    dados.to_csv(caminho, index=False)
+    return dados
+
+
+def test_streaming_independe_do_tamanho_do_bloco(dados_sinteticos, tmp_path):
+    """Divisão, scaler e saídas iguais com blocos de tamanhos diferentes"""
+    csv = tmp_path / "creditcard.csv"
+    dados = escreve_csv(dados_sinteticos, csv)
+
+    saidas = []
+    for tamanho in (97, 5000):
+        destino = tmp_path / f"blocos_{tamanho}"
+        processa_dados_streaming(str(csv), str(destino), str(destino / "scaler.joblib"), tamanho)
+        saidas.append(carrega_conjunto(str(destino), verifica=True))
+
+    for nome in ("X_train", "y_train", "X_test", "y_test"):
+        np.testing.assert_array_equal(saidas[0][nome], saidas[1][nome])
+
+    # Mesmo resultado de um StandardScaler ajustado em memória nas linhas de treino
+    valores = pd.read_csv(csv, dtype=np.float64).to_numpy()
+    teste = eh_teste(valores)
+    X = valores[:, :-1]
+    scaler = StandardScaler().fit(X[~teste])
+    np.testing.assert_allclose(saidas[0]["X_train"], scaler.transform(X[~teste]).astype(np.float32), rtol=1e-5)
+    np.testing.assert_array_equal(saidas[0]["y_test"], dados["Class"].to_numpy()[teste])
+
+
+def test_divisao_por_hash_preserva_a_proporcao_das_classes(dados_sinteticos):
+    """Cada classe manda ~20% das linhas para o teste"""
+    X, y = dados_sinteticos
+    teste = eh_teste(np.column_stack([X, y]), test_size=0.2)
+
+    for classe in (0, 1):
+        assert abs(teste[y == classe].mean() - 0.2) < 0.1
+    assert abs(teste.mean() - 0.2) < 0.03
+
+
+def test_csv_so_com_cabecalho_e_rejeitado(dados_sinteticos, tmp_path):
+    csv = tmp_path / "creditcard.csv"
+    escreve_csv(dados_sinteticos, csv).head(0).to_csv(csv, index=False)
+
+    with pytest.raises(ValueError, match="Nenhuma linha de treino"):
+        processa_dados_streaming(str(csv), str(tmp_path / "saida"), str(tmp_path / "scaler.joblib"), 100)
@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+
+from src.inference.compiled_forest import compila_floresta, salva_floresta, carrega_floresta
+from src.inference.loader import ModeloServido
+from src.inference.reload import RecarregadorModelo
+
+
+def test_nova_versao_do_arquivo_e_trocada_apos_canario(floresta_sklearn, tmp_path):
+    """Um artefato atualizado é carregado, validado e passa a ser servido"""
+    caminho = str(tmp_path / 'modelo_inferencia')
+    floresta = compila_floresta(floresta_sklearn)
+    salva_floresta(floresta, caminho)
+
+    servido = ModeloServido(lambda: carrega_floresta(caminho))
+    trocas = []
+    recarregador = RecarregadorModelo(servido, caminho=caminho, fonte='file', ao_trocar=[trocas.append])
+    recarregador.inicia()
+    recarregador.para()
+    antigo = servido.obtem()
+
+    assert not recarregador.verifica()
+
+    salva_floresta(floresta, caminho)
+    os.utime(os.path.join(caminho, 'metadados.json'), ns=(0, 1))
+
+    assert recarregador.verifica()
+    assert servido.obtem() is not antigo
+    assert trocas == [servido.versao]
+
+
+def test_canario_invalido_mantem_o_modelo_atual(floresta_sklearn, tmp_path):
+    """Se o canário falhar, o modelo em produção não é substituído"""
+    caminho = str(tmp_path / 'modelo_inferencia')
+    floresta = compila_floresta(floresta_sklearn)
+    salva_floresta(floresta, caminho)
+    servido = ModeloServido(lambda: carrega_floresta(caminho))
+    antigo = servido.obtem()
+
+    floresta.valor = np.full_like(floresta.valor, np.nan)
+    salva_floresta(floresta, caminho)
+    recarregador = RecarregadorModelo(servido, caminho=caminho, fonte='file')
+
+    assert not recarregador.recarrega('arquivo:novo')
+    assert servido.obtem() is antigo
+
+
+def test_artefato_quebrado_na_partida_e_tentado_de_novo(floresta_sklearn, tmp_path):
+    """Sem modelo carregado a versão não é registrada: a verificação recarrega"""
+    caminho = str(tmp_path / 'modelo_inferencia')
+    salva_floresta(compila_floresta(floresta_sklearn), caminho)
+    servido = ModeloServido(lambda: None)  # Carga inicial falhou
+
+    recarregador = RecarregadorModelo(servido, caminho=caminho, fonte='file')
+    recarregador.inicia()
+    recarregador.para()
+    assert servido.versao is None
+
+    assert recarregador.verifica()
+    assert servido.obtem() is not None
+
+
+def test_salva_troca_o_link_sem_remover_o_caminho(floresta_sklearn, dados_sinteticos, tmp_path):
+    """Cada versão tem seu diretório; o caminho é um link trocado atomicamente"""
+    X, _ = dados_sinteticos
+    caminho = str(tmp_path / 'modelo_inferencia')
+    floresta = compila_floresta(floresta_sklearn)
+    salva_floresta(floresta, caminho)
+    mapeada = carrega_floresta(caminho)
+
+    for _ in range(3):
+        salva_floresta(floresta, caminho)
+
+    assert os.path.islink(caminho)
+    # Só a versão atual e a anterior ficam em disco
+    assert len([n for n in os.listdir(tmp_path) if n.startswith('modelo_inferencia.v')]) == 2
+    np.testing.assert_array_equal(carrega_floresta(caminho).apply(X), floresta.apply(X))
+    np.testing.assert_array_equal(mapeada.apply(X), floresta.apply(X))
+
+
+def test_pai_recompila_a_origem_alterada(floresta_sklearn, tmp_path):
+    """serve_workers recompila o artefato compartilhado quando o .joblib muda"""
+    import joblib
+    from src.serve_workers import reexporta_se_mudou
+
+    origem, destino = str(tmp_path / 'modelo.joblib'), str(tmp_path / 'compartilhado')
+    joblib.dump(floresta_sklearn, origem)
+    versao = os.stat(origem).st_mtime_ns
+
+    assert reexporta_se_mudou(origem, destino, versao) == versao
+    assert not os.path.exists(destino)
+
+    os.utime(origem, ns=(0, 1))
+    assert reexporta_se_mudou(origem, destino, versao) == 1
+    assert carrega_floresta(destino).n_arvores == len(floresta_sklearn.estimators_)
@@ -0,0 +1,56 @@
+import io
+import json
+import logging
+import queue
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+from src.inference.request_log import FilaLimitadaHandler, configura_logging, para_logging, registra_sucesso
+
+
+@pytest.fixture
+def saida():
+    """Logger raiz com a fila escrevendo em um buffer; restaura os handlers no fim"""
+    raiz = logging.getLogger()
+    handlers, nivel = list(raiz.handlers), raiz.level
+    buffer = io.StringIO()
+    configura_logging(nivel="INFO", formato="json", destino=buffer)
+    yield buffer
+    para_logging()
+    raiz.handlers[:] = handlers
+    raiz.setLevel(nivel)
+
+
+def linhas_json(buffer):
+    para_logging()
+    return [json.loads(linha) for linha in buffer.getvalue().splitlines()]
+
+
+def test_sucessos_amostrados_e_erros_sempre_registrados(saida):
+    for _ in range(50):
+        registra_sucesso("Predição bem-sucedida", taxa=0.0, prob_fraude=0.1)
+    registra_sucesso("Predição bem-sucedida", taxa=1.0, features=np.array([0.5, 1.0]), prob_fraude=0.9)
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        logging.exception("Erro inesperado durante a predição:")
+
+    sucesso, erro = linhas_json(saida)
+    assert sucesso["nivel"] == "INFO"
+    assert sucesso["features"] == [0.5, 1.0] and sucesso["prob_fraude"] == 0.9
+    assert erro["nivel"] == "ERROR" and "ValueError: falhou" in erro["excecao"]
+
+
+def test_fila_cheia_descarta_e_conta():
+    fila = queue.Queue(maxsize=2)
+    handler = FilaLimitadaHandler(fila)
+    antes = REGISTRY.get_sample_value("log_records_dropped_total", {"nivel": "WARNING"}) or 0
+
+    for i in range(5):
+        handler.handle(logging.LogRecord("teste", logging.WARNING, __file__, 1, "aviso %d", (i,), None))
+
+    assert fila.qsize() == 2
+    assert fila.get_nowait().msg == "aviso 0"
+    assert REGISTRY.get_sample_value("log_records_dropped_total", {"nivel": "WARNING"}) == antes + 3
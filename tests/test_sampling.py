@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils.class_weight import compute_sample_weight
+
+from src.training.sampling import compara_taxas, pesos_correcao, subamostra_negativos, subamostra_treino
+from src.training.search import executa_busca
+
+
+def test_subamostra_mantem_positivos():
+    y = np.r_[np.ones(50), np.zeros(10000)].astype(np.uint8)
+    amostra = subamostra_negativos(y, 0.1, semente=0)
+
+    assert np.all(y[amostra][:50] == 1)
+    assert (y[amostra] == 0).sum() == pytest.approx(1000, rel=0.15)
+    np.testing.assert_array_equal(amostra, subamostra_negativos(y, 0.1, semente=0))
+
+
+@pytest.mark.parametrize("class_weight", [None, "balanced"])
+def test_pesos_devolvem_o_peso_total_de_cada_classe(class_weight):
+    """Cada classe soma na amostra o mesmo peso que teria no treino completo"""
+    y = np.r_[np.ones(30), np.zeros(3000)].astype(np.uint8)
+    _, y_amostra, pesos = subamostra_treino(np.zeros((len(y), 1)), y, 0.2, class_weight, semente=1)
+
+    completo = compute_sample_weight(class_weight, y) if class_weight else np.ones(len(y))
+    for classe in (0, 1):
+        assert pesos[y_amostra == classe].sum() == pytest.approx(completo[y == classe].sum())
+
+
+def test_pesos_correcao_aceita_os_class_weight_da_floresta():
+    """balanced_subsample vira balanced no treino completo; dicts são multiplicados pela correção"""
+    y = np.r_[np.ones(10), np.zeros(100)].astype(np.uint8)
+    y_amostra = np.r_[np.ones(10), np.zeros(20)].astype(np.uint8)
+
+    np.testing.assert_array_equal(
+        pesos_correcao(y, y_amostra, "balanced_subsample"), pesos_correcao(y, y_amostra, "balanced")
+    )
+    pesos = pesos_correcao(y, y_amostra, {0: 1.0, 1: 4.0})
+    assert pesos[y_amostra == 0] == pytest.approx(np.full(20, 5.0))
+    assert pesos[y_amostra == 1] == pytest.approx(np.full(10, 4.0))
+
+
+def test_busca_com_negativos_subamostrados(dados_sinteticos):
+    """O ajuste final equivale a uma floresta ajustada na amostra com os pesos de correção"""
+    X, y = dados_sinteticos
+    config = {"n_estimators": 6, "max_depth": 5, "class_weight": "balanced"}
+
+    [resultado] = executa_busca([config], X, y, cv=3, scoring='roc_auc', random_state=5, nucleos=1,
+                                taxa_negativos=0.3)
+
+    X_s, y_s, pesos = subamostra_treino(X, y, 0.3, "balanced", semente=[5, 0])
+    esperado = RandomForestClassifier(random_state=5, **{**config, "class_weight": None})
+    esperado.fit(X_s, y_s, sample_weight=pesos)
+    np.testing.assert_array_equal(resultado["modelo"].predict_proba(X), esperado.predict_proba(X))
+    assert not np.isnan(resultado["oof"]).any()
+
+
+def test_comparacao_de_taxas(dados_sinteticos):
+    X, y = dados_sinteticos
+    resultados = compara_taxas({"n_estimators": 5, "max_depth": 4}, X[:1500], y[:1500], X[1500:], y[1500:],
+                               taxas=[1.0, 0.3])
+
+    assert [r["taxa"] for r in resultados] == [1.0, 0.3]
+    assert resultados[0]["delta_pr_auc"] == 0 and resultados[0]["speedup"] == pytest.approx(1)
+    assert resultados[1]["linhas_treino"] < resultados[0]["linhas_treino"]
+    # Pesos de correção mantêm a probabilidade média perto da taxa base
+    assert resultados[1]["test_prob_media"] == pytest.approx(y.mean(), abs=0.05)
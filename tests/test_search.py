@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import cross_val_predict, cross_val_score
+
+from src.data.store import carrega_conjunto
+from src.inference.compiled_forest import compila_floresta
+from src.training.search import divide_nucleos, executa_busca, busca_sucessiva, agrupa_por_arvores, salva_oof
+
+
+def test_divisao_de_nucleos_nao_ultrapassa_o_orcamento():
+    """processos × threads nunca passa do total de núcleos"""
+    assert divide_nucleos(20, 8) == (8, 1)
+    assert divide_nucleos(3, 8) == (3, 2)
+    assert divide_nucleos(5, 1) == (1, 1)
+
+
+def test_busca_paralela_reproduz_cross_val_score(dados_sinteticos):
+    """Scores por fold e modelo final iguais aos da busca sequencial"""
+    X, y = dados_sinteticos
+    configs = [
+        {"n_estimators": 10, "max_depth": 4, "class_weight": "balanced"},
+        {"n_estimators": 5, "max_depth": 6},
+    ]
+
+    resultados = executa_busca(configs, X, y, cv=3, scoring='f1', random_state=42, nucleos=2)
+
+    for config, resultado in zip(configs, resultados):
+        modelo = RandomForestClassifier(random_state=42, **config)
+        esperado = cross_val_score(modelo, X, y, cv=3, scoring='f1')
+        np.testing.assert_allclose(resultado["scores"], esperado)
+        np.testing.assert_array_equal(
+            resultado["modelo"].predict_proba(X), modelo.fit(X, y).predict_proba(X)
+        )
+
+
+def test_grid_de_tamanhos_cresce_uma_floresta_so(dados_sinteticos):
+    """Instantâneos do warm_start equivalem a ajustes do zero com cada n_estimators"""
+    X, y = dados_sinteticos
+    configs = [
+        {"n_estimators": 12, "max_depth": 5, "class_weight": "balanced"},
+        {"n_estimators": 4, "max_depth": 5, "class_weight": "balanced"},
+        {"n_estimators": 8, "max_depth": 3, "class_weight": "balanced"},
+    ]
+
+    assert agrupa_por_arvores(configs) == [[1, 0], [2]]
+
+    resultados = executa_busca(configs, X, y, cv=3, scoring='roc_auc', random_state=7, nucleos=1)
+
+    assert [r["grupo"] for r in resultados] == [0, 0, 1]
+    for config, resultado in zip(configs, resultados):
+        modelo = RandomForestClassifier(random_state=7, **config)
+        np.testing.assert_allclose(resultado["scores"], cross_val_score(modelo, X, y, cv=3, scoring='roc_auc'))
+        assert len(resultado["modelo"].estimators_) == config["n_estimators"]
+        np.testing.assert_array_equal(
+            resultado["modelo"].predict_proba(X), modelo.fit(X, y).predict_proba(X)
+        )
+
+
+def test_busca_sucessiva_promove_as_melhores(dados_sinteticos):
+    """Degraus com recurso crescente; só a melhor chega ao treino completo"""
+    X, y = dados_sinteticos
+    configs = [{"n_estimators": 8, "max_depth": p} for p in (1, 2, 6, 8)] + [{"n_estimators": 1, "max_depth": 1}]
+
+    busca = busca_sucessiva(configs, X, y, cv=3, scoring='roc_auc', nucleos=2, fator=2)
+    degraus = busca["degraus"]
+
+    assert [len(d["resultados"]) for d in degraus] == [5, 2, 1]
+    assert [d["fracao"] for d in degraus] == [0.25, 0.5, 1.0]
+    melhores = sorted(degraus[0]["resultados"], key=lambda r: -r["scores"].mean())[:2]
+    assert degraus[0]["promovidos"] == [r["indice"] for r in melhores]
+    [final] = busca["resultados"]
+    assert final["indice"] in degraus[1]["promovidos"]
+    assert final["modelo"].n_estimators == 8
+    assert degraus[0]["resultados"][0]["modelo"] is None
+    assert degraus[0]["resultados"][0]["oof"] is None
+    assert not np.isnan(final["oof"]).any()
+
+    with pytest.raises(ValueError, match="fator"):
+        busca_sucessiva(configs, X, y, cv=3, scoring='roc_auc', fator=1)
+
+
+def test_folds_e_oof_substituem_o_ajuste_final(dados_sinteticos, tmp_path):
+    """OOF igual ao cross_val_predict; sem ajuste final o modelo é o ensemble dos folds"""
+    X, y = dados_sinteticos
+    configs = [
+        {"n_estimators": 6, "max_depth": 4, "class_weight": "balanced"},
+        {"n_estimators": 3, "max_depth": 4, "class_weight": "balanced"},
+    ]
+
+    resultados = executa_busca(configs, X, y, cv=3, scoring='roc_auc', random_state=3, nucleos=2,
+                               ajuste_final=False)
+
+    for config, resultado in zip(configs, resultados):
+        modelo = RandomForestClassifier(random_state=3, **config)
+        esperado = cross_val_predict(modelo, X, y, cv=3, method='predict_proba')[:, 1]
+        np.testing.assert_allclose(resultado["oof"], esperado, rtol=1e-6)
+
+        folds = resultado["modelos_folds"]
+        assert len(folds) == 3
+        ensemble = resultado["modelo"]
+        assert ensemble.n_estimators == len(ensemble.estimators_) == 3 * config["n_estimators"]
+        media = np.mean([m.predict_proba(X) for m in folds], axis=0)
+        np.testing.assert_allclose(ensemble.predict_proba(X), media)
+        np.testing.assert_allclose(compila_floresta(ensemble).predict_proba(X), media)
+
+    salva_oof(resultados[0], y, tmp_path / "oof")
+    salvo = carrega_conjunto(tmp_path / "oof", verifica=True)
+    assert salvo["oof"].dtype == np.float32 and salvo["y"].dtype == np.uint8
+    np.testing.assert_array_equal(salvo["oof"], resultados[0]["oof"])
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from werkzeug.test import Client
+
+from src.inference.compiled_forest import compila_floresta, salva_floresta
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Orçamento da importação de src.serve_slim (com a carga do modelo), em ms
+ORCAMENTO_IMPORTACAO_MS = float(os.getenv("SLIM_IMPORT_BUDGET_MS", 400))
+PROIBIDOS = ("sklearn", "joblib", "scipy", "pandas", "mlflow", "flask", "werkzeug", "fastapi", "prometheus_client")
+
+
+@pytest.fixture(scope='module')
+def caminho_modelo(floresta_sklearn, tmp_path_factory):
+    caminho = str(tmp_path_factory.mktemp("slim") / "modelo")
+    salva_floresta(compila_floresta(floresta_sklearn), caminho)
+    return caminho
+
+
+def test_importacao_dentro_do_orcamento(caminho_modelo):
+    """python -X importtime: só o runtime mínimo e dentro do orçamento"""
+    codigo = "import sys, src.serve_slim as s; print(s.modelo is not None); print(' '.join(sys.modules))"
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ, capture_output=True, text=True,
+        env={**os.environ, "SERVING_MODEL_PATH": caminho_modelo}, check=True
+    )
+    carregado, modulos = processo.stdout.splitlines()
+    assert carregado == "True"
+    assert not [m for m in PROIBIDOS if m in modulos.split()]
+
+    [linha] = [l for l in processo.stderr.splitlines() if l.endswith("| src.serve_slim")]
+    acumulado_ms = int(linha.split("|")[1]) / 1000
+    assert acumulado_ms < ORCAMENTO_IMPORTACAO_MS
+
+
+def test_rotas_respondem_como_o_flask(caminho_modelo, floresta_sklearn, dados_sinteticos, monkeypatch):
+    import src.serve_slim as slim
+
+    monkeypatch.setattr(slim, "modelo", slim.carrega_modelo(caminho_modelo))
+    cliente = Client(slim.app)
+    X, _ = dados_sinteticos
+    esperado = floresta_sklearn.predict_proba(X[:3])[:, 1]
+
+    resposta = cliente.post("/predict", json={"features": X[0].tolist()})
+    assert resposta.status_code == 200
+    assert resposta.get_json()["prob_fraude"] == pytest.approx(esperado[0])
+
+    resposta = cliente.post("/predict/batch", data=X[:3].astype("<f8").tobytes(),
+                            content_type="application/octet-stream")
+    np.testing.assert_allclose(resposta.get_json()["prob_fraude"], esperado)
+
+    assert cliente.post("/predict", json={"features": [1.0, 2.0]}).status_code == 400
+    nao_finita = X[0].copy()
+    nao_finita[0] = np.nan
+    assert cliente.post("/predict", data=nao_finita.astype("<f8").tobytes(),
+                        content_type="application/octet-stream").status_code == 400
+    assert cliente.post("/predict", data="{", content_type="application/json").status_code == 400
+    assert cliente.post("/predict", data="x", content_type="text/csv").status_code == 415
+    assert cliente.get("/predict").status_code == 405
+    assert json.loads(cliente.get("/health").data) == {"status": "ok"}
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.data.store import salva_conjunto, carrega_conjunto
+from src.training.search import executa_busca, _referencia
+
+
+def test_conjunto_float32_uint8_com_manifesto(dados_sinteticos, tmp_path):
+    """Features em float32, rótulos em uint8, abertos com mmap e conferidos pelo manifesto"""
+    X, y = dados_sinteticos
+    manifesto = salva_conjunto(str(tmp_path), X_train=X, y_train=y.astype(np.int64))
+
+    dados = carrega_conjunto(str(tmp_path), verifica=True)
+
+    assert isinstance(dados["X_train"], np.memmap)
+    assert dados["X_train"].dtype == np.float32 and dados["X_train"].flags.c_contiguous
+    assert dados["y_train"].dtype == np.uint8
+    np.testing.assert_array_equal(dados["X_train"], X.astype(np.float32))
+    np.testing.assert_array_equal(dados["y_train"], y)
+    assert manifesto["X_train"]["shape"] == list(X.shape)
+
+
+def test_arquivo_divergente_do_manifesto_e_rejeitado(dados_sinteticos, tmp_path):
+    """Checksum e formato são conferidos contra o manifesto"""
+    X, y = dados_sinteticos
+    salva_conjunto(str(tmp_path), X_train=X, y_train=y)
+    np.save(tmp_path / "y_train.npy", y[:-1].astype(np.uint8))
+
+    with pytest.raises(ValueError, match="Checksum"):
+        carrega_conjunto(str(tmp_path), verifica=True)
+    with pytest.raises(ValueError, match="formato"):
+        carrega_conjunto(str(tmp_path))
+
+
+def test_workers_reabrem_o_arquivo_mapeado(dados_sinteticos, tmp_path):
+    """Arrays mapeados inteiros vão aos workers como caminho; fatias e cópias não"""
+    X, y = dados_sinteticos
+    salva_conjunto(str(tmp_path), X_train=X, y_train=y)
+    dados = carrega_conjunto(str(tmp_path))
+
+    assert _referencia(dados["X_train"]) == os.path.join(str(tmp_path), "X_train.npy")
+    assert not isinstance(_referencia(dados["X_train"][:10]), str)
+    assert not isinstance(_referencia(X), str)
+
+    config = [{"n_estimators": 5, "max_depth": 4}]
+    mapeado = executa_busca(config, dados["X_train"], dados["y_train"], cv=3, scoring='f1', nucleos=2)
+    em_memoria = executa_busca(config, np.array(dados["X_train"]), y, cv=3, scoring='f1', nucleos=2)
+    np.testing.assert_allclose(mapeado[0]["scores"], em_memoria[0]["scores"])
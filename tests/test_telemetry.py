@@ -0,0 +1,88 @@
+import threading
+
+from prometheus_client import REGISTRY
+
+from src.inference.batch import pontua_lote
+from src.inference.loader import ModeloServido
+from src.inference.telemetry import Cronometro, PerfiladorAmostragem
+
+
+def amostras(nome, **rotulos):
+    return REGISTRY.get_sample_value(nome, rotulos) or 0
+
+
+def test_cronometro_observa_etapas_e_lote(floresta_sklearn):
+    """pontua_lote marca validação e predição; o cronômetro registra o lote e a latência total"""
+    rotulos = {"app": "teste", "endpoint": "/lote"}
+    antes = {etapa: amostras("inference_stage_duration_seconds_count", etapa=etapa, **rotulos)
+             for etapa in ("parse", "validate", "predict", "serialize")}
+
+    cronometro = Cronometro("teste", "/lote")
+    cronometro.marca("parse")
+    cronometro.lote(3)
+    pontua_lote(floresta_sklearn, [[0.0] * 29, [1.0] * 29, [0.5] * 29], 29, 0.5, cronometro)
+    cronometro.marca("serialize")
+    cronometro.finaliza()
+
+    for etapa, anterior in antes.items():
+        assert amostras("inference_stage_duration_seconds_count", etapa=etapa, **rotulos) == anterior + 1
+    assert amostras("inference_batch_size_sum", **rotulos) >= 3
+    assert amostras("inference_request_duration_seconds_count", **rotulos) >= 1
+
+
+def test_perfilador_grava_pilhas_collapsed(tmp_path):
+    """Armado por N requisições, amostra as threads e grava 'pilha contagem' por linha"""
+    perfilador = PerfiladorAmostragem(intervalo_ms=1, diretorio=str(tmp_path))
+    parar = threading.Event()
+
+    def trabalho_ocupado():
+        while not parar.is_set():
+            sum(i * i for i in range(1000))
+
+    trabalhador = threading.Thread(target=trabalho_ocupado, name="trabalhador")
+    trabalhador.start()
+    try:
+        arquivo = perfilador.arma(3)
+        assert perfilador.ativo
+        for _ in range(3):
+            parar.wait(0.02)
+            perfilador.requisicao_concluida()
+        assert perfilador.aguarda(5)
+    finally:
+        parar.set()
+        trabalhador.join()
+
+    assert not perfilador.ativo
+    linhas = open(arquivo).read().splitlines()
+    assert linhas
+    pilha, contagem = linhas[0].rsplit(" ", 1)
+    assert int(contagem) >= 1
+    assert any(linha.startswith("trabalhador;") and "trabalho_ocupado" in linha for linha in linhas)
+
+
+def test_carga_inicial_publica_a_versao():
+    """model_info existe desde a primeira carga, mesmo sem recarga a quente"""
+    servido = ModeloServido(lambda: 'modelo', versiona=lambda: 'arquivo:42')
+
+    assert servido.obtem_com_versao() == ('modelo', 'arquivo:42')
+    assert amostras("model_info", versao="arquivo:42") == 1
+
+
+def test_erros_tambem_entram_na_latencia(floresta_sklearn, monkeypatch):
+    """Respostas 4xx do Flask e do FastAPI são observadas no histograma de latência"""
+    from fastapi.testclient import TestClient
+    import src.api.app as api
+    import src.serve as serve
+
+    monkeypatch.setattr(serve, "modelo_servido", ModeloServido(lambda: floresta_sklearn))
+    monkeypatch.setattr(api, "modelo_servido", ModeloServido(lambda: floresta_sklearn))
+    casos = [
+        (serve.app.test_client(), "flask", "/predict", 400),
+        (serve.app.test_client(), "flask", "/predict/batch", 400),
+        (TestClient(api.app), "fastapi", "/prediz", 422),
+        (TestClient(api.app), "fastapi", "/prediz/lote", 400),
+    ]
+    for cliente, app, rota, status in casos:
+        antes = amostras("inference_request_duration_seconds_count", app=app, endpoint=rota)
+        assert cliente.post(rota, json={"features": []}).status_code == status
+        assert amostras("inference_request_duration_seconds_count", app=app, endpoint=rota) == antes + 1